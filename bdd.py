@@ -0,0 +1,229 @@
+# Reduced ordered BDDs. A manager owns every node; nodes are ints indexing
+# its _level/_low/_high lists, 0 and 1 being the terminals. Minterm numbers
+# follow the rest of boolean_EQN: variables[0] is the most significant bit,
+# whatever order the levels of the diagram are in.
+
+FALSE = 0
+TRUE = 1
+
+
+class BDD:
+
+    def __init__(self, variables, order=None) -> None:
+        self.variables = list(variables)
+        self.order = list(variables if order is None else order)  # level -> variable
+        if sorted(self.order) != sorted(self.variables):
+            raise ValueError("order must be a permutation of the variables")
+        self.level_of = {var: level for level, var in enumerate(self.order)}
+        num_vars = len(self.variables)
+        self._level = [num_vars, num_vars]
+        self._low = [FALSE, TRUE]
+        self._high = [FALSE, TRUE]
+        self._unique = {}  # (level, low, high) -> node
+        self._computed = {}  # (operation, operands...) -> node
+
+    def __len__(self):
+        return len(self._level)
+
+    def node(self, level, low, high):
+        if low == high:
+            return low
+        key = (level, low, high)
+        node = self._unique.get(key)
+        if node is None:
+            node = len(self._level)
+            self._level.append(level)
+            self._low.append(low)
+            self._high.append(high)
+            self._unique[key] = node
+        return node
+
+    def var(self, name):
+        return self.node(self.level_of[name], FALSE, TRUE)
+
+    def _cofactors(self, f, level):
+        if self._level[f] == level:
+            return self._low[f], self._high[f]
+        return f, f
+
+    def ite(self, f, g, h):
+        if f == TRUE:
+            return g
+        if f == FALSE:
+            return h
+        if g == h:
+            return g
+        if g == TRUE and h == FALSE:
+            return f
+        key = ('ite', f, g, h)
+        result = self._computed.get(key)
+        if result is not None:
+            return result
+        level = min(self._level[f], self._level[g], self._level[h])
+        f0, f1 = self._cofactors(f, level)
+        g0, g1 = self._cofactors(g, level)
+        h0, h1 = self._cofactors(h, level)
+        result = self.node(level, self.ite(f0, g0, h0), self.ite(f1, g1, h1))
+        self._computed[key] = result
+        return result
+
+    def negate(self, f):
+        return self.ite(f, FALSE, TRUE)
+
+    def conjoin(self, f, g):
+        return self.ite(f, g, FALSE)
+
+    def disjoin(self, f, g):
+        return self.ite(f, TRUE, g)
+
+    def exclusive_or(self, f, g):
+        return self.ite(f, self.negate(g), g)
+
+    def restrict(self, f, name, value):
+        level = self.level_of[name]
+        cache = {}
+
+        def visit(node):
+            if self._level[node] > level:
+                return node
+            if node in cache:
+                return cache[node]
+            if self._level[node] == level:
+                result = self._high[node] if value else self._low[node]
+            else:
+                result = self.node(self._level[node], visit(self._low[node]), visit(self._high[node]))
+            cache[node] = result
+            return result
+
+        return visit(f)
+
+    def from_ast(self, node):
+        # Diagram of a sop_parser parse tree
+        cache = {}
+
+        def visit(node):
+            if node in cache:
+                return cache[node]
+            kind = node[0]
+            if kind == 'var':
+                if node[1] not in self.level_of:
+                    raise ValueError(f"Unknown variable '{node[1]}' in expression")
+                result = self.var(node[1])
+            elif kind == 'const':
+                result = TRUE if node[1] else FALSE
+            elif kind == 'not':
+                result = self.negate(visit(node[1]))
+            elif kind == 'and':
+                result = TRUE
+                for child in node[1]:
+                    result = self.conjoin(result, visit(child))
+            else:
+                result = FALSE
+                for child in node[1]:
+                    result = self.disjoin(result, visit(child))
+            cache[node] = result
+            return result
+
+        return visit(node)
+
+    def reachable(self, roots):
+        seen = set()
+        stack = [root for root in roots if root > TRUE]
+        while stack:
+            node = stack.pop()
+            if node in seen:
+                continue
+            seen.add(node)
+            stack.extend(child for child in (self._low[node], self._high[node]) if child > TRUE)
+        return seen
+
+    def size(self, roots):
+        # Internal nodes reachable from the roots
+        return len(self.reachable(roots))
+
+    def sat_count(self, f):
+        # Number of ON-set minterms over all the variables, in one pass over
+        # the nodes below f. Every level skipped by an edge doubles the count
+        num_vars = len(self.variables)
+        counts = {FALSE: 0, TRUE: 1}
+
+        def count(node):
+            if node in counts:
+                return counts[node]
+            level = self._level[node]
+            low, high = self._low[node], self._high[node]
+            result = (
+                count(low) << (self._level[low] - level - 1)
+            ) + (
+                count(high) << (self._level[high] - level - 1)
+            )
+            counts[node] = result
+            return result
+
+        return count(f) << (min(self._level[f], num_vars))
+
+    def iter_minterms(self, f):
+        # Yields the ON-set minterms in increasing order without materializing
+        # them. Variables are fixed from the most significant one down; with
+        # the identity order that is just walking the diagram
+        num_vars = len(self.variables)
+        identity = self.order == self.variables
+
+        def walk(node, depth, prefix):
+            if node == FALSE:
+                return
+            if node == TRUE:
+                remaining = num_vars - depth
+                yield from range(prefix << remaining, (prefix + 1) << remaining)
+                return
+            if identity:
+                if self._level[node] > depth:
+                    low = high = node
+                else:
+                    low, high = self._low[node], self._high[node]
+            else:
+                name = self.variables[depth]
+                low = self.restrict(node, name, 0)
+                high = self.restrict(node, name, 1)
+            yield from walk(low, depth + 1, prefix << 1)
+            yield from walk(high, depth + 1, (prefix << 1) | 1)
+
+        return walk(f, 0, 0)
+
+    # reorder and sift are API only: the report walks diagrams in the
+    # identity order and does not call them
+
+    def reorder(self, roots, order):
+        # New manager using the given level order, with the roots rebuilt in it
+        target = BDD(self.variables, order)
+        cache = {FALSE: FALSE, TRUE: TRUE}
+
+        def transfer(node):
+            if node in cache:
+                return cache[node]
+            var = target.var(self.order[self._level[node]])
+            result = target.ite(var, transfer(self._high[node]), transfer(self._low[node]))
+            cache[node] = result
+            return result
+
+        return target, [transfer(root) for root in roots]
+
+    def sift(self, roots):
+        # Exhaustive sifting by rebuilding: every variable in turn is tried at
+        # every level, each trial a full reorder rather than Rudell's
+        # adjacent-level swaps, and left where the diagram is smallest. That
+        # is O(n^2) rebuilds, so it only suits small diagrams. Returns the
+        # best (manager, roots)
+        best, best_roots = self, list(roots)
+        best_size = self.size(roots)
+        for var in list(self.order):
+            current = [v for v in best.order if v != var]
+            for position in range(len(current) + 1):
+                order = current[:position] + [var] + current[position:]
+                if order == best.order:
+                    continue
+                candidate, candidate_roots = best.reorder(best_roots, order)
+                size = candidate.size(candidate_roots)
+                if size < best_size:
+                    best, best_roots, best_size = candidate, candidate_roots, size
+        return best, best_roots
@@ -0,0 +1,80 @@
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fpga_simulator import FPGA
+
+# Times reassigning LUT functions on fabrics of growing size. Every edit goes
+# through LUT.assign_function, which updates the connections of that one LUT,
+# followed by a read of the connection count; the cost per edit should not
+# depend on the number of LUTs
+
+
+def build_fabric(num_luts, rng):
+    # Every LUT ORs the outputs of two earlier ones
+    fpga = FPGA(num_luts, 6, 8, 1)
+    for lut_id in range(num_luts):
+        if lut_id < 2:
+            fpga.luts[lut_id].assign_function("(A & ~B)")
+        else:
+            drivers = rng.sample(range(lut_id), 2)
+            fpga.luts[lut_id].assign_function(f"Output of LUT {drivers[0]} | Output of LUT {drivers[1]}")
+    return fpga
+
+
+def time_edits(fpga, edits, rng):
+    num_luts = len(fpga.luts)
+    functions = []
+    for _ in range(edits):
+        lut_id = rng.randrange(2, num_luts)
+        drivers = rng.sample(range(lut_id), 2)
+        functions.append((lut_id, f"Output of LUT {drivers[0]} & ~Output of LUT {drivers[1]}"))
+    connections = 0
+    start = time.perf_counter()
+    for lut_id, function in functions:
+        fpga.luts[lut_id].assign_function(function)
+        connections += fpga.num_connections
+    return (time.perf_counter() - start) / edits
+
+
+def time_full_rebuild(fpga, runs):
+    start = time.perf_counter()
+    for _ in range(runs):
+        fpga.update_lut_connections()
+    return (time.perf_counter() - start) / runs
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Time incremental connection updates against fabric size")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--edits", type=int, default=20000)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--max-growth", type=float, default=2.0,
+                        help="largest allowed ratio between the per-edit cost on the biggest and smallest fabric")
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    per_edit = []
+    print(f"{'LUTs':>10} {'per edit':>12} {'full rebuild':>14}")
+    for size in args.sizes:
+        fpga = build_fabric(size, rng)
+        cost = statistics.median(time_edits(fpga, args.edits, rng) for _ in range(args.runs))
+        rebuild = time_full_rebuild(fpga, 1)
+        per_edit.append(cost)
+        print(f"{size:>10} {cost * 1e6:>9.2f} us {rebuild * 1e3:>11.1f} ms")
+
+    growth = per_edit[-1] / per_edit[0]
+    print(f"per-edit growth from {args.sizes[0]} to {args.sizes[-1]} LUTs: {growth:.2f}x")
+    if growth > args.max_growth:
+        print(f"FAIL: per-edit cost grew more than {args.max_growth:.1f}x")
+        sys.exit(1)
+    print("OK: per-edit cost is flat")
+
+
+if __name__ == "__main__":
+    main()
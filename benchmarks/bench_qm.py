@@ -0,0 +1,45 @@
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from boolean_EQN import QM, get_minterms
+
+
+def random_sop(num_vars, num_terms, literals_per_term, rng):
+    variables = [f"X{i}" for i in range(num_vars)]
+    terms = []
+    for _ in range(num_terms):
+        chosen = rng.sample(variables, min(literals_per_term, num_vars))
+        terms.append("(" + " & ".join(("~" if rng.random() < 0.5 else "") + var for var in chosen) + ")")
+    return " | ".join(terms), variables
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Time the QM merge phase on random SOP functions")
+    parser.add_argument("--min-vars", type=int, default=8)
+    parser.add_argument("--max-vars", type=int, default=20)
+    parser.add_argument("--terms", type=int, default=6)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    print(f"{'vars':>4} {'minterms':>9} {'primes':>7} {'merge (s)':>10}")
+    for num_vars in range(args.min_vars, args.max_vars + 1):
+        # Half-width terms make the ON-set grow with the number of variables
+        expression, variables = random_sop(num_vars, args.terms, max(3, num_vars // 2), rng)
+        minterms = get_minterms(expression, variables)
+        if not minterms:
+            continue
+        qm = QM(num_vars, minterms)
+        start = time.perf_counter()
+        qm.run()
+        elapsed = time.perf_counter() - start
+        print(f"{num_vars:>4} {len(minterms):>9} {len(qm.PI):>7} {elapsed:>10.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+import argparse
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Runs in a fresh interpreter: imports the simulator, maps input.eqn with the
+# minimized expressions taken from a warm cache and reports the elapsed time
+# and whether the heavy dependencies were loaded
+MAPPING_PATH = """
+import sys, time
+start = time.perf_counter()
+sys.path.insert(0, {repo!r})
+import fpga_simulator
+imported = time.perf_counter()
+from min_cache import open_cache
+cache = open_cache({cache!r})
+expressions = fpga_simulator.get_minimized_expressions_multi_output({input!r}, cache)
+fpga = fpga_simulator.FPGA(64, 6, 26, len(expressions))
+fpga.split_and_assign_functions(expressions)
+fpga.generate_bitstream()
+done = time.perf_counter()
+print(imported - start, done - start, 'sympy' in sys.modules, 'numpy' in sys.modules, cache.stats()['misses'])
+"""
+
+
+def run(script):
+    output = subprocess.run([sys.executable, "-c", script], capture_output=True, text=True, check=True).stdout
+    import_time, total_time, sympy_loaded, numpy_loaded, misses = output.split()
+    return float(import_time), float(total_time), sympy_loaded == "True", numpy_loaded == "True", int(misses)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Time the startup of the mapping-only path of fpga_simulator")
+    parser.add_argument("--input", default=os.path.join(REPO, "input.eqn"))
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--budget-ms", type=float, default=100.0)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        input_filename = os.path.join(directory, "input.eqn")
+        shutil.copy(args.input, input_filename)
+        script = MAPPING_PATH.format(
+            repo=REPO, cache=os.path.join(directory, "cache.sqlite"), input=input_filename,
+        )
+        # The first run fills the cache and pays for sympy
+        _, cold_time, _, _, _ = run(script)
+        results = [run(script) for _ in range(args.runs)]
+
+    import_ms = statistics.median(result[0] for result in results) * 1000
+    total_ms = statistics.median(result[1] for result in results) * 1000
+    heavy = any(result[2] or result[3] for result in results)
+    misses = max(result[4] for result in results)
+    print(f"cold run:                 {cold_time * 1000:8.1f} ms")
+    print(f"import fpga_simulator:    {import_ms:8.1f} ms (median of {args.runs})")
+    print(f"mapping-only path:        {total_ms:8.1f} ms (median of {args.runs})")
+    print(f"sympy/NumPy loaded:       {heavy}")
+    print(f"cache misses on warm run: {misses}")
+    if heavy or misses or total_ms > args.budget_ms:
+        print(f"FAIL: mapping-only path must stay under {args.budget_ms:.0f} ms without sympy/NumPy")
+        sys.exit(1)
+    print(f"OK: under the {args.budget_ms:.0f} ms budget")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,268 @@
+import mmap
+import struct
+import zlib
+
+import espresso
+import lut_logic
+import placement
+from lut_simulator import CompiledNetwork
+
+# Binary bitstream of a mapped FPGA, little-endian throughout:
+#
+#   header   magic "LUTB", version, flags, LUT size K, number of LUTs,
+#            system inputs, output ports, grid width and height
+#   used     one bit per LUT, set for the LUTs with a function
+#   INIT     2^K bits per LUT, every LUT at a fixed offset; pin j is bit j of
+#            the row as in lut_logic, and pins a LUT leaves unconnected do
+#            not change its output
+#   names    the system input names (varint length + UTF-8)
+#   routing  per used LUT, in id order: varint pin count, then the source of
+#            every pin as a varint, 2 * LUT id + 1 for a LUT output and
+#            2 * input index for a system input
+#   outputs  per output port a varint, LUT id + 1 or 0 when unassigned
+#   sites    with FLAG_PLACED, varint x and y of every used LUT in id order
+#   CRC-32   of everything before it
+#
+# load() memory-maps the file: INIT tables are read in place when asked for,
+# only the varint sections are decoded up front.
+
+MAGIC = b"LUTB"
+VERSION = 1
+FLAG_PLACED = 1
+_HEADER = struct.Struct('<4sBBBxIHHHH')
+_CHECKSUM = struct.Struct('<I')
+
+
+class BitstreamError(ValueError):
+    pass
+
+
+def _put_varint(buffer, value):
+    while value >= 0x80:
+        buffer.append((value & 0x7F) | 0x80)
+        value >>= 7
+    buffer.append(value)
+
+
+def _get_varint(data, offset):
+    value = 0
+    shift = 0
+    while True:
+        if offset >= len(data):
+            raise BitstreamError("Bitstream ends inside a varint")
+        byte = data[offset]
+        offset += 1
+        value |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return value, offset
+        shift += 7
+
+
+def _init_size(lut_size):
+    return max(1, (1 << lut_size) // 8)
+
+
+def _function_table(function, memo):
+    # lut_logic.function_table, shared by functions that differ only in the
+    # LUTs they read: those are renumbered by rank, which keeps the pin order
+    refs = lut_logic.referenced_luts(function)
+    rank = {lut_id: k for k, lut_id in enumerate(refs)}
+    shape = lut_logic.LUT_REFERENCE.sub(lambda m: f"Output of LUT {rank[int(m.group(1))]}", function)
+    if shape not in memo:
+        memo[shape] = lut_logic.function_table(shape)
+    inputs, bits = memo[shape]
+    return [refs[signal] if isinstance(signal, int) else signal for signal in inputs], bits
+
+
+def encode(fpga):
+    netlist = fpga.netlist
+    lut_size = fpga.lut_type
+    num_luts = len(fpga.luts)
+    input_names = list(fpga.luts.max_variables)
+    input_index = {name: idx for idx, name in enumerate(input_names)}
+    init_size = _init_size(lut_size)
+    placed = fpga.placement is not None
+
+    used = bytearray((num_luts + 7) // 8)
+    inits = bytearray(init_size * num_luts)
+    routing = bytearray()
+    sites = bytearray()
+    memo = {}
+    for lut_id in sorted(netlist.functions):
+        inputs, bits = _function_table(netlist.functions[lut_id], memo)
+        if len(inputs) > lut_size:
+            raise ValueError(f"LUT {lut_id} has {len(inputs)} inputs, a LUT has {lut_size}")
+        used[lut_id >> 3] |= 1 << (lut_id & 7)
+        for pin in range(len(inputs), lut_size):
+            bits |= bits << (1 << pin)
+        inits[lut_id * init_size:(lut_id + 1) * init_size] = bits.to_bytes(init_size, 'little')
+        _put_varint(routing, len(inputs))
+        for signal in inputs:
+            if isinstance(signal, int):
+                _put_varint(routing, 2 * signal + 1)
+            elif signal in input_index:
+                _put_varint(routing, 2 * input_index[signal])
+            else:
+                raise ValueError(f"LUT {lut_id} reads {signal!r}, which is not a system input")
+        if placed:
+            x, y = fpga.placement.positions[lut_id]
+            _put_varint(sites, x)
+            _put_varint(sites, y)
+
+    names = bytearray()
+    for name in input_names:
+        encoded = name.encode()
+        _put_varint(names, len(encoded))
+        names += encoded
+    outputs = bytearray()
+    for lut in fpga.system_outputs:
+        _put_varint(outputs, 0 if lut is None else lut.id + 1)
+
+    width, height = (fpga.placement.width, fpga.placement.height) if placed else (0, 0)
+    data = bytearray(_HEADER.pack(
+        MAGIC, VERSION, FLAG_PLACED if placed else 0, lut_size, num_luts,
+        len(input_names), len(fpga.system_outputs), width, height,
+    ))
+    data += used + inits + names + routing + outputs + sites
+    data += _CHECKSUM.pack(zlib.crc32(data))
+    return bytes(data)
+
+
+def write(fpga, filename):
+    # Returns the number of bytes written
+    data = encode(fpga)
+    with open(filename, 'wb') as file:
+        file.write(data)
+    return len(data)
+
+
+class Bitstream:
+
+    def __init__(self, data) -> None:
+        # data: bytes or a memory map of a whole bitstream
+        self._data = data
+        if len(data) < _HEADER.size + _CHECKSUM.size:
+            raise BitstreamError("Bitstream too short")
+        magic, version, flags, lut_size, num_luts, num_inputs, num_outputs, width, height = _HEADER.unpack_from(data)
+        if magic != MAGIC:
+            raise BitstreamError("Not a LUT bitstream")
+        if version != VERSION:
+            raise BitstreamError(f"Bitstream version {version} is not supported")
+        with memoryview(data) as view:
+            checksum = zlib.crc32(view[:-_CHECKSUM.size])
+        if checksum != _CHECKSUM.unpack_from(data, len(data) - _CHECKSUM.size)[0]:
+            raise BitstreamError("Bitstream checksum mismatch")
+        self.lut_size = lut_size
+        self.num_luts = num_luts
+        self.num_outputs = num_outputs
+        self.placed = bool(flags & FLAG_PLACED)
+        self.width = width
+        self.height = height
+
+        offset = _HEADER.size
+        used = data[offset:offset + (num_luts + 7) // 8]
+        self.lut_ids = [lut_id for lut_id in range(num_luts) if used[lut_id >> 3] >> (lut_id & 7) & 1]
+        offset += len(used)
+        self._init_offset = offset
+        self._init_size = _init_size(lut_size)
+        offset += self._init_size * num_luts
+
+        self.input_names = []
+        for _ in range(num_inputs):
+            length, offset = _get_varint(data, offset)
+            self.input_names.append(bytes(data[offset:offset + length]).decode())
+            offset += length
+        self.pins = {}  # used LUT id -> input signals, in pin order
+        for lut_id in self.lut_ids:
+            count, offset = _get_varint(data, offset)
+            signals = []
+            for _ in range(count):
+                source, offset = _get_varint(data, offset)
+                if source & 1:
+                    signals.append(source >> 1)
+                else:
+                    signals.append(self.input_names[source >> 1])
+            self.pins[lut_id] = signals
+        self.outputs = []  # LUT id on each output port, None when unassigned
+        for _ in range(num_outputs):
+            value, offset = _get_varint(data, offset)
+            self.outputs.append(value - 1 if value else None)
+        self.sites = {}  # LUT id -> (x, y) when placed
+        if self.placed:
+            for lut_id in self.lut_ids:
+                x, offset = _get_varint(data, offset)
+                y, offset = _get_varint(data, offset)
+                self.sites[lut_id] = (x, y)
+        if offset != len(data) - _CHECKSUM.size:
+            raise BitstreamError("Bitstream sections do not add up to its size")
+
+    def init(self, lut_id):
+        # INIT bits of the LUT over its connected pins
+        start = self._init_offset + lut_id * self._init_size
+        bits = int.from_bytes(self._data[start:start + self._init_size], 'little')
+        return bits & ((1 << (1 << len(self.pins.get(lut_id, ())))) - 1)
+
+    def tables(self):
+        # LUT id -> (input signals, INIT bits), as CompiledNetwork.from_tables takes them
+        return {lut_id: (self.pins[lut_id], self.init(lut_id)) for lut_id in self.lut_ids}
+
+    def compile_network(self, outputs=None):
+        # Simulator for the LUTs as stored; by default over the assigned output ports
+        if outputs is None:
+            outputs = [lut_id for lut_id in self.outputs if lut_id is not None]
+        return CompiledNetwork.from_tables(self.tables(), self.input_names, outputs)
+
+    def to_fpga(self, fpga_class):
+        # An FPGA of fpga_class (either simulator's) configured as stored. LUT
+        # functions are written back as minimized SOPs of their INIT bits
+        fpga = fpga_class(self.num_luts, self.lut_size, len(self.input_names), self.num_outputs)
+        memo = {}
+        for lut_id in self.lut_ids:
+            pins = self.pins[lut_id]
+            key = (self.init(lut_id), len(pins))
+            if key not in memo:
+                table, num_pins = key
+                full = (1 << num_pins) - 1
+                memo[key] = espresso.espresso([(row, full) for row in range(1 << num_pins) if table >> row & 1], num_pins)
+            # The first variable of a cover is the most significant row bit
+            names = [f"Output of LUT {signal}" if isinstance(signal, int) else signal for signal in reversed(pins)]
+            fpga.luts[lut_id].assign_function(espresso.cover_to_SOP(memo[key], names))
+        for port, lut_id in enumerate(self.outputs):
+            if lut_id is not None:
+                fpga.system_outputs[port] = fpga.luts[lut_id]
+                fpga.final_or_lut_ids.append(lut_id)
+                fpga.expression_outputs.append(f"Output of LUT {lut_id}")
+        if self.placed:
+            input_luts = [[] for _ in self.input_names]
+            input_index = {name: idx for idx, name in enumerate(self.input_names)}
+            for lut_id, signals in self.pins.items():
+                for signal in signals:
+                    if isinstance(signal, str):
+                        input_luts[input_index[signal]].append(lut_id)
+            fpga.placement = placement.Placement.at_sites(
+                fpga.netlist, input_luts, self.outputs, self.sites, self.width, self.height
+            )
+        return fpga
+
+    def close(self):
+        if isinstance(self._data, mmap.mmap):
+            self._data.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def load(filename):
+    with open(filename, 'rb') as file:
+        try:
+            data = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            raise BitstreamError(f"{filename} is empty")
+    try:
+        return Bitstream(data)
+    except BitstreamError:
+        data.close()
+        raise
@@ -1,430 +1,925 @@
-import sympy
-import numpy as np
-import math
-import queue
-
-
-class Node:
-
-    def __init__(self, term, level) -> None:
-        self.level = level 
-        self.term = term 
-        self.covered = False
-
-    def one_num(self):
-        return self.term.count('1')
-
-    def compare(self, node1):
-        res = []
-        for i in range(len(self.term)):
-            if self.term[i] == node1.term[i]:
-                continue
-            elif self.term[i] == '-' or node1.term[i] == "-":
-                return (False, None)
-            else:
-                res.append(i)
-        if len(res) == 1:
-            return (True, res[0])
-        return (False, None)
-
-    def term2logic(self):
-        logic_term = ''
-        count=0
-        for i in range(len(self.term)):
-            if self.term[i] == "-":
-                count+=1
-            elif self.term[i] == "1":
-                if count == 0:
-                    logic_term += 'A'
-                elif count==1:
-                    logic_term += 'B'
-                elif count==2:
-                    logic_term += 'C'
-                elif count==3:
-                    logic_term += 'D'
-                elif count==4:
-                    logic_term += 'E'
-                count+=1    
-            else:
-                if count == 0:
-                    logic_term += "A'"
-                elif count==1:
-                    logic_term += "B'"
-                elif count==2:
-                    logic_term += "C'"
-                elif count==3:
-                    logic_term += "D'"
-                elif count==4:
-                    logic_term += "E'"
-                count+=1    
-        if len(logic_term) == 0:
-            logic_term = '1'
-        return logic_term
-
-
-class QM:
-
-    def __init__(self, num, lst) -> None:
-        self.max_bits = num
-        self.minterm_list = sorted(lst) 
-        if len(self.minterm_list) == 0:
-            print(0)
-            exit()
-        if self.minterm_list[-1] >= 2**self.max_bits:
-            raise ValueError('input wrong！')
-        self.node_list = []
-        self.PI = []
-
-    def num2str(self, num):
-        str = format(num, "b").zfill(self.max_bits)
-        return str
-
-    def _comp_binary_same(self, term, number):
-        for i in range(len(term)):
-            if term[i] != '-':
-                if term[i] != number[i]:
-                    return False
-        return True
-
-    def _initial(self):
-        flag = True 
-        groups = [[] for i in range(self.max_bits + 1)]
-        for minterm in self.minterm_list:
-            tmp_node = Node(term=self.num2str(minterm), level=0)
-            groups[tmp_node.one_num()].append(tmp_node)
-            flag = True
-        self.node_list.append(groups)
-        return flag
-
-    def merge(self, level):
-        flag = False                                        
-        if level == 0:
-            flag = self._initial()
-        else:
-            groups = self.node_list[level - 1]
-            new_groups = [[] for i in range(self.max_bits + 1)]
-            term_set = set()                                
-            for i in range(len(groups) - 1):
-                for node0 in groups[i]:
-                    for node1 in groups[i + 1]:
-                        cmp_res = node0.compare(node1)
-                        if cmp_res[0]:
-                            node0.covered = True
-                            node1.covered = True
-                            new_term = '{}-{}'.format(
-                                node0.term[:cmp_res[1]],
-                                node0.term[cmp_res[1] + 1:]
-                            )
-                            tmp_node = Node(term=new_term, level=level)
-                            if tmp_node.term not in term_set:
-                                new_groups[tmp_node.one_num()].append(tmp_node)
-                                term_set.add(tmp_node.term)
-                                flag = True
-            self.node_list.append(new_groups)
-        if flag:
-            self.merge(level + 1)
-
-    def backtracking(self):
-        for groups in self.node_list:
-            for group in groups:
-                for node in group:
-                    if not node.covered:
-                        self.PI.append(node)
-        return self.PI
-
-    def find_essential_prime(self, Chart):
-        pos = np.argwhere(Chart.sum(axis=0) == 1)
-        essential_prime = []
-        for i in range(len(self.PI)):
-            for j in range(len(pos)):
-                if Chart[i][pos[j][0]] == 1:
-                    essential_prime.append(i)
-        essential_prime = list(set(essential_prime)) 
-        return essential_prime
-
-    def cover_left(self, Chart):
-        list_result = []
-        max_len = len(Chart)                          
-        myQueue = queue.Queue(math.factorial(max_len)) 
-        for i in range(max_len):
-            myQueue.put([i])
-
-        stop_flag = False                        
-        while not myQueue.empty():
-            minterm_mark = np.zeros(len(Chart[0])) 
-            choice = myQueue.get()
-            if stop_flag and len(list_result[-1]) < len(choice):
-                break
-
-            for row in choice:
-                minterm_mark += Chart[row]
-
-            if all(minterm_mark): 
-                list_result.append(choice)
-                stop_flag = True  
-
-            for row in range(choice[-1] + 1, max_len):
-                myQueue.put(choice + [row]) 
-        return list_result
-
-    def find_minimum_cost(self, Chart):
-        QM_final = []
-        essential_prime = self.find_essential_prime(Chart)
-        for i in range(len(essential_prime)):
-            for j in range(len(Chart[0])):
-                if Chart[essential_prime[i]][j] == 1:
-                    for row in range(len(Chart)):
-                        Chart[row][j] = 0
-
-        if not np.sum(Chart):
-            QM_final = [essential_prime]
-        else:
-            pos_col_left = np.argwhere(Chart.sum(axis=0) > 0) 
-            pos_row_left = np.argwhere(Chart.sum(axis=1) > 0) 
-
-            new_Chart = np.zeros([len(pos_row_left), len(pos_col_left)])
-            for i in range(len(pos_row_left)):
-                for j in range(len(pos_col_left)):
-                    if Chart[pos_row_left[i][0]][pos_col_left[j][0]] == 1:
-                        new_Chart[i][j] = 1
-
-            list_result = self.cover_left(new_Chart)
-            for lst in list_result:
-                final_solution = essential_prime + list(
-                    map(lambda x: pos_row_left[x], lst)
-                )
-                QM_final.append(final_solution)
-        return QM_final
-
-    def select(self):
-        Chart = np.zeros([len(self.PI), len(self.minterm_list)])
-        for i in range(len(self.PI)):
-            for j in range(len(self.minterm_list)):
-                if self._comp_binary_same(
-                    self.PI[i].term, self.num2str(self.minterm_list[j])
-                ):
-                    Chart[i][j] = 1
-
-        primes = self.find_minimum_cost(Chart)
-        count=0
-        for prime in primes:
-            str = ''
-            for i in range(len(self.PI)):
-                for j in prime:
-                    if i == j:
-                        str = str + self.PI[i].term2logic() + ', '
-                        count+=1
-            if str[-2] == ',':
-                str = str[:-2]
-        return str,count
-
-    def run(self):
-        self.merge(0)
-        self.backtracking()
-    
-    def get_prime_implicants(self):
-        prime_implicants = ", ".join([pi.term2logic() for pi in self.PI])
-        count = len(self.PI)
-        return prime_implicants, count
-    
-
-
-def extract_variables(expression):
-    return sorted(set(filter(lambda x: x.isalpha(), expression)))
-
-def get_minterms(expression, variables):
-    minterms = []
-    symbols = {var: sympy.symbols(var) for var in variables}
-    for var in variables:
-        expression = expression.replace(f"{var}!S", f"~{var}")
-
-    expr = sympy.sympify(expression, locals=symbols)
-    total_vars = len(variables)
-    for i in range(2**total_vars):
-        assignments = {symbols[var]: (i >> j) & 1 for j, var in enumerate(reversed(variables))}
-        if expr.subs(assignments):
-            minterms.append(i)
-    return minterms
-
-def get_maxterms(expression, variables):
-    maxterms = []
-    symbols = {var: sympy.symbols(var) for var in variables}
-    for var in variables:
-        expression = expression.replace(f"{var}!S", f"~{var}")
-
-    expr = sympy.sympify(expression, locals=symbols)
-    total_vars = len(variables)
-    for i in range(2**total_vars):
-        assignments = {symbols[var]: (i >> j) & 1 for j, var in enumerate(reversed(variables))}
-        if not expr.subs(assignments):
-            maxterms.append(i)
-    return maxterms
-
-def minterms_to_SOP(minterms, variables):
-    sop_expressions = []
-    for minterm in minterms:
-        terms = []
-        for idx, var in enumerate(variables):
-            if (minterm >> idx) & 1:
-                terms.append(var)
-            else:
-                terms.append(f"~{var}")
-        sop_expressions.append(f"({' & '.join(terms)})")
-    return " | ".join(sop_expressions)
-
-def maxterms_to_POS(maxterms, variables):
-    pos_expressions = []
-    for maxterm in maxterms:
-        terms = []
-        for idx, var in enumerate(variables):
-            if (maxterm >> idx) & 1:
-                terms.append(f"~{var}")
-            else:
-                terms.append(var)
-        pos_expressions.append(f"({' | '.join(terms)})")
-    return " & ".join(pos_expressions)
-
-def minimized_SOP(expression, variables):
-    symbols = {var: sympy.symbols(var) for var in variables}
-    
-    for var in variables:
-        expression = expression.replace(f"{var}'", f"~{var}")
-
-    expr = sympy.sympify(expression, locals=symbols)
-
-    minimized_expr = sympy.simplify_logic(expr, form='dnf')
-
-    return str(minimized_expr)
-
-def extract_literals(expression):
-    """Returns a set of all literals in the expression."""
-    literals = set()
-    for char in expression:
-        if char.isalpha(): 
-            literals.add(char)
-    return literals
-
-def saved_literals(original, minimized):
-    original_literals = extract_literals(original)
-    minimized_literals = extract_literals(minimized)
-    return len(original_literals - minimized_literals)
-
-def minimized_POS(expression, variables):
-    symbols = {var: sympy.symbols(var) for var in variables}
-    
-    for var in variables:
-        expression = expression.replace(f"{var}'", f"~{var}")
-
-    expr = sympy.sympify(expression, locals=symbols)
-
-    minimized_expr = sympy.simplify_logic(expr, form='cnf')
-
-    return str(minimized_expr)
-
-def get_minimized_expressions_from_file(input_filename):
-    minimized_expressions = []
-    with open(input_filename, 'r') as infile:
-        for line in infile:
-            expression = line.strip()
-            variables = extract_variables(expression)
-            minimized_expression = minimized_SOP(expression, variables)
-            minimized_expressions.append(minimized_expression)
-    return minimized_expressions
-
-def get_variables_from_file(input_filename):
-    variables = []
-    with open(input_filename, 'r') as infile:
-        for line in infile:
-            expression = line.strip()
-            variables = extract_variables(expression)
-    return variables
-
-def parse_sop_formulas(input_lines):
-    formulas = {}
-    for line in input_lines:
-        key, expression = line.split(" = ")
-        formulas[key.strip()] = expression.strip()
-    return formulas
-
-
-def write_to_file(filename, data):
-    with open(filename, 'a') as f: 
-        f.write(data + '\n')
-
-def main(input_filename, output_filename):
-    output_data = []
-
-    with open(input_filename, 'r') as infile:
-        for line in infile:
-            expression = line.strip()
-            variables = extract_variables(expression)
-
-
-            # SOP
-            minterms = get_minterms(expression, variables)
-            sop_expression = minterms_to_SOP(minterms, variables)
-            output_data.append(f"SOP: {sop_expression}")
-
-            # POS
-            maxterms = get_maxterms(expression, variables)
-            pos_expression = maxterms_to_POS(maxterms, variables)
-            output_data.append(f"POS: {pos_expression}")
-
-            # Inverse SOP
-            inverse_expr = f"~({expression})"
-            inverse_minterms = get_minterms(inverse_expr, variables)
-            inverse_sop_expression = minterms_to_SOP(inverse_minterms, variables)
-            output_data.append(f"Inverse SOP: {inverse_sop_expression}")
-
-            # Inverse POS
-            inverse_maxterms = get_maxterms(inverse_expr, variables)
-            inverse_pos_expression = maxterms_to_POS(inverse_maxterms, variables)
-            output_data.append(f"Inverse POS: {inverse_pos_expression}")
-
-            # Minimized SOP
-            minimized_sop_expression = minimized_SOP(expression, variables)
-            output_data.append(f"Minimized SOP: {minimized_sop_expression}")
-
-            literal_savings = saved_literals(sop_expression, minimized_sop_expression)
-            output_data.append(f"Saved literals (vs canonical SOP): {literal_savings}")
-
-            # Minimized POS
-            minimized_pos_expression = minimized_POS(expression, variables)
-            output_data.append(f"Minimized POS: {minimized_pos_expression}")
-
-            literal_savings_pos = saved_literals(pos_expression, minimized_pos_expression)
-            output_data.append(f"Saved literals (vs canonical POS): {literal_savings_pos}")
-
-            # Extract prime implicants and Essential prime implicants and their count and add to output data
-            minterms_list = get_minterms(expression, variables)
-            qm = QM(len(variables), minterms_list)
-            qm.run()
-            epi,epi_count=qm.select()
-            prime_implicants, pi_count = qm.get_prime_implicants()
-            output_data.append(f"Prime Implicants: {prime_implicants}")
-            output_data.append(f"Number of Prime Implicants: {pi_count}")
-            output_data.append(f"Essential Prime Implicants: {epi}")
-            output_data.append(f"Number of Essential Prime Implicants: {epi_count}")
-
-            # ON-Set minterms and their number
-            minterms = get_minterms(expression, variables)
-            output_data.append(f"ON-Set minterms: {minterms}")
-            output_data.append(f"Number of ON-Set minterms: {len(minterms)}")
-
-            # ON-Set maxterms and their number
-            maxterms  = get_maxterms(expression, variables)
-            output_data.append(f"ON-Set maxterms: {maxterms}")
-            output_data.append(f"Number of ON-Set maxterms: {len(maxterms)}")
-
-
-
-            output_data.append("\n")  
-
-    with open(output_filename, 'w') as outfile:
-        for line in output_data:
-            outfile.write(line + "\n")
-
-
-if __name__ == "__main__":
-    main("input.eqn", "output_ENQ.txt")
-
+import collections
+import functools
+import itertools
+import os
+import signal
+import threading
+from lazy_import import lazy_module
+import espresso
+import sop_parser
+from min_cache import cover_key, from_positional, open_cache, table_key, to_positional
+from set_cover import DEFAULT_TIME_LIMIT, PackedChart, solve_cover
+
+# Only loaded once a path that needs them runs, see lazy_import
+sympy = lazy_module('sympy')
+np = lazy_module('numpy')
+bdd = lazy_module('bdd')
+canonical_io = lazy_module('canonical_io')
+
+
+class Node:
+
+    def __init__(self, value, mask, level, num_bits) -> None:
+        self.level = level 
+        self.value = value  # literal polarity of every cared bit, 0 on '-' positions
+        self.mask = mask  # 1 for every bit the cube cares about
+        self.num_bits = num_bits
+        self.covered = False
+
+    @property
+    def term(self):
+        chars = []
+        for bit in range(self.num_bits - 1, -1, -1):
+            if not (self.mask >> bit) & 1:
+                chars.append('-')
+            else:
+                chars.append('1' if (self.value >> bit) & 1 else '0')
+        return ''.join(chars)
+
+    def one_num(self):
+        return self.value.bit_count()
+
+    def compare(self, node1):
+        if self.mask != node1.mask:
+            return (False, None)
+        diff = self.value ^ node1.value
+        if diff.bit_count() != 1:
+            return (False, None)
+        return (True, self.num_bits - diff.bit_length())
+
+    def term2logic(self):
+        logic_term = ''
+        count=0
+        for i in range(len(self.term)):
+            if self.term[i] == "-":
+                count+=1
+            elif self.term[i] == "1":
+                if count == 0:
+                    logic_term += 'A'
+                elif count==1:
+                    logic_term += 'B'
+                elif count==2:
+                    logic_term += 'C'
+                elif count==3:
+                    logic_term += 'D'
+                elif count==4:
+                    logic_term += 'E'
+                count+=1    
+            else:
+                if count == 0:
+                    logic_term += "A'"
+                elif count==1:
+                    logic_term += "B'"
+                elif count==2:
+                    logic_term += "C'"
+                elif count==3:
+                    logic_term += "D'"
+                elif count==4:
+                    logic_term += "E'"
+                count+=1    
+        if len(logic_term) == 0:
+            logic_term = '1'
+        return logic_term
+
+
+class QM:
+
+    def __init__(self, num, lst, max_nodes=None, on_budget='warn', cover_method='auto', cover_time_limit=DEFAULT_TIME_LIMIT) -> None:
+        if on_budget not in ('warn', 'heuristic'):
+            raise ValueError("on_budget must be 'warn' or 'heuristic'")
+        self.max_bits = num
+        self.minterm_list = sorted(lst) 
+        if self.minterm_list and self.minterm_list[-1] >= 2**self.max_bits:
+            raise ValueError('input wrong！')
+        self.node_list = []  # only the level currently being merged is kept
+        self.PI = []
+        self.max_nodes = max_nodes  # budget on cubes alive at once, None for unlimited
+        self.on_budget = on_budget
+        self.budget_exceeded = False
+        self.cover_method = cover_method  # 'auto', 'bnb', 'petrick' or 'greedy', see set_cover.solve_cover
+        self.cover_time_limit = cover_time_limit  # seconds, None for no limit
+        self.cover_optimal = True  # False when the cover search stopped before proving a minimum
+
+    def num2str(self, num):
+        str = format(num, "b").zfill(self.max_bits)
+        return str
+
+    def _initial(self):
+        groups = [[] for i in range(self.max_bits + 1)]
+        full_mask = (1 << self.max_bits) - 1
+        for minterm in self.minterm_list:
+            tmp_node = Node(value=int(minterm), mask=full_mask, level=0, num_bits=self.max_bits)
+            groups[tmp_node.one_num()].append(tmp_node)
+        return groups
+
+    def _merge_level(self, groups, level):
+        live_nodes = sum(len(group) for group in groups)
+        new_groups = [[] for i in range(self.max_bits + 1)]
+        cube_set = set()                                
+        for i in range(len(groups) - 1):
+            upper = groups[i + 1]
+            if not groups[i] or not upper:
+                continue
+            # Two cubes merge iff they share a mask and differ in exactly one
+            # bit, so each node only has to probe its candidate partners
+            partners = {(node.mask, node.value): pos for pos, node in enumerate(upper)}
+            for node0 in groups[i]:
+                zero_bits = node0.mask & ~node0.value
+                matches = []
+                while zero_bits:
+                    bit = zero_bits & -zero_bits
+                    zero_bits ^= bit
+                    pos = partners.get((node0.mask, node0.value | bit))
+                    if pos is not None:
+                        matches.append((pos, bit))
+                # Visit partners in group order so the emitted order matches
+                # the pairwise scan
+                for pos, bit in sorted(matches):
+                    node0.covered = True
+                    upper[pos].covered = True
+                    key = (node0.mask & ~bit, node0.value)
+                    if key not in cube_set:
+                        tmp_node = Node(value=node0.value, mask=key[0], level=level, num_bits=self.max_bits)
+                        new_groups[tmp_node.one_num()].append(tmp_node)
+                        cube_set.add(key)
+                if self.max_nodes is not None and live_nodes + len(cube_set) > self.max_nodes:
+                    if self.on_budget == 'heuristic':
+                        return None
+                    if not self.budget_exceeded:
+                        print(f"Warning: QM merge exceeded the budget of {self.max_nodes} cubes at level {level}.")
+                    self.budget_exceeded = True
+        return new_groups
+
+    def _release_level(self, groups):
+        # A level is finished once the next one is built: its uncovered cubes are prime
+        for group in groups:
+            for node in group:
+                if not node.covered:
+                    self.PI.append(node)
+
+    def merge(self, level=0):
+        self.PI = []
+        groups = self._initial()
+        while any(groups):
+            self.node_list = [groups]
+            new_groups = self._merge_level(groups, level + 1)
+            if new_groups is None:
+                self.budget_exceeded = True
+                print(f"Warning: QM merge exceeded the budget of {self.max_nodes} cubes at level {level + 1}, "
+                      "falling back to heuristic prime expansion.")
+                self._expand_level_to_primes(groups)
+                break
+            self._release_level(groups)
+            groups = new_groups
+            level += 1
+        self.node_list = []
+
+    def _is_implicant(self, value, mask, on_bitmap):
+        free_bits = [1 << bit for bit in range(self.max_bits) if not (mask >> bit) & 1]
+        rows = np.array([value], dtype=np.int64)
+        for bit in free_bits:
+            rows = np.concatenate([rows, rows | bit])
+        return bool(on_bitmap[rows].all())
+
+    def _expand_level_to_primes(self, groups):
+        # Every cube of the current level is an implicant and together they cover
+        # the ON-set, so greedily raising each one to a prime keeps the cover valid
+        on_bitmap = np.zeros(1 << self.max_bits, dtype=bool)
+        on_bitmap[np.asarray(self.minterm_list, dtype=np.int64)] = True
+        seen = {(pi.mask, pi.value) for pi in self.PI}
+        for group in groups:
+            for node in group:
+                value, mask = node.value, node.mask
+                for bit in range(self.max_bits - 1, -1, -1):
+                    literal = 1 << bit
+                    if mask & literal and self._is_implicant(value & ~literal, mask & ~literal, on_bitmap):
+                        value &= ~literal
+                        mask &= ~literal
+                if (mask, value) not in seen:
+                    seen.add((mask, value))
+                    self.PI.append(Node(value=value, mask=mask, level=node.level, num_bits=self.max_bits))
+
+    def backtracking(self):
+        # Primes are collected while merging; kept for callers of the old API
+        return self.PI
+
+    def build_chart(self):
+        return PackedChart.from_cubes(
+            [pi.value for pi in self.PI], [pi.mask for pi in self.PI], self.minterm_list
+        )
+
+    def find_essential_prime(self, Chart):
+        # A minterm covered by exactly one prime makes that prime essential
+        return np.unique(Chart.column_owner[Chart.column_count == 1]).tolist()
+
+    def find_minimum_cost(self, Chart):
+        essential_prime = self.find_essential_prime(Chart)
+        cols_left = ~Chart.covered_columns(essential_prime)
+        if not cols_left.any():
+            return [essential_prime]
+
+        pos_row_left = Chart.rows_touching(cols_left)
+        rows = Chart.row_bitsets(pos_row_left, cols_left)
+        choice, self.cover_optimal = solve_cover(
+            rows, int(cols_left.sum()), method=self.cover_method, time_limit=self.cover_time_limit
+        )
+        return [essential_prime + [int(pos_row_left[x]) for x in choice]]
+
+    def select(self):
+        Chart = self.build_chart()
+
+        primes = self.find_minimum_cost(Chart)
+        count=0
+        for prime in primes:
+            str = ''
+            chosen = set(prime)
+            for i in range(len(self.PI)):
+                if i in chosen:
+                    str = str + self.PI[i].term2logic() + ', '
+                    count+=1
+            if str.endswith(', '):
+                str = str[:-2]
+        return str,count
+
+    def run(self):
+        self.merge()
+        self.backtracking()
+    
+    def get_prime_implicants(self):
+        prime_implicants = ", ".join([pi.term2logic() for pi in self.PI])
+        count = len(self.PI)
+        return prime_implicants, count
+    
+
+
+def extract_variables(expression):
+    return sorted(sop_parser.variables_of(sop_parser.parse(expression)))
+
+@functools.lru_cache(maxsize=sop_parser.PARSE_CACHE_SIZE)
+def _sympy_expression(node):
+    return sop_parser.to_sympy(node)
+
+def parse_expression(expression, variables):
+    # sympy form of the expression, built from the cached parse tree
+    node = sop_parser.parse(expression)
+    sop_parser.check_variables(node, variables)
+    return _sympy_expression(node)
+
+def truth_table(expression, variables):
+    # Evaluates every row of the truth table at once on packed 64-bit slices
+    return sop_parser.compile_table(sop_parser.parse(expression), variables)()
+
+def get_on_off_sets(expression, variables):
+    table = truth_table(expression, variables)
+    return table.on_set(), table.off_set()
+
+# Engine that derives ON/OFF sets: 'table' evaluates packed truth tables,
+# 'bdd' builds a reduced ordered BDD and walks it, which suits sparse or
+# highly structured functions
+SET_ENGINE = 'table'
+
+def build_bdd(expression, variables):
+    # Straight from the parse tree, so the BDD engine never loads sympy
+    node = sop_parser.parse(expression)
+    sop_parser.check_variables(node, variables)
+    manager = bdd.BDD(variables)
+    return manager, manager.from_ast(node)
+
+def iter_minterms(expression, variables):
+    # Lazily yields the ON-set in increasing order
+    manager, root = build_bdd(expression, variables)
+    return manager.iter_minterms(root)
+
+def iter_maxterms(expression, variables):
+    manager, root = build_bdd(expression, variables)
+    return manager.iter_minterms(manager.negate(root))
+
+def count_minterms(expression, variables):
+    manager, root = build_bdd(expression, variables)
+    return manager.sat_count(root)
+
+def get_minterms(expression, variables, set_engine='table'):
+    if set_engine == 'bdd':
+        return list(iter_minterms(expression, variables))
+    return truth_table(expression, variables).on_set().tolist()
+
+def get_maxterms(expression, variables, set_engine='table'):
+    if set_engine == 'bdd':
+        return list(iter_maxterms(expression, variables))
+    return truth_table(expression, variables).off_set().tolist()
+
+# Row-by-row sympy reference implementations, kept for checking the truth table engine
+def get_minterms_sympy(expression, variables):
+    minterms = []
+    symbols = {var: sympy.symbols(var) for var in variables}
+    for var in variables:
+        expression = expression.replace(f"{var}!S", f"~{var}")
+
+    expr = sympy.sympify(expression, locals=symbols)
+    total_vars = len(variables)
+    for i in range(2**total_vars):
+        assignments = {symbols[var]: (i >> j) & 1 for j, var in enumerate(reversed(variables))}
+        if expr.subs(assignments):
+            minterms.append(i)
+    return minterms
+
+def get_maxterms_sympy(expression, variables):
+    maxterms = []
+    symbols = {var: sympy.symbols(var) for var in variables}
+    for var in variables:
+        expression = expression.replace(f"{var}!S", f"~{var}")
+
+    expr = sympy.sympify(expression, locals=symbols)
+    total_vars = len(variables)
+    for i in range(2**total_vars):
+        assignments = {symbols[var]: (i >> j) & 1 for j, var in enumerate(reversed(variables))}
+        if not expr.subs(assignments):
+            maxterms.append(i)
+    return maxterms
+
+def minterms_to_SOP(minterms, variables):
+    sop_expressions = []
+    for minterm in minterms:
+        terms = []
+        for idx, var in enumerate(variables):
+            if (minterm >> idx) & 1:
+                terms.append(var)
+            else:
+                terms.append(f"~{var}")
+        sop_expressions.append(f"({' & '.join(terms)})")
+    return " | ".join(sop_expressions)
+
+def maxterms_to_POS(maxterms, variables):
+    pos_expressions = []
+    for maxterm in maxterms:
+        terms = []
+        for idx, var in enumerate(variables):
+            if (maxterm >> idx) & 1:
+                terms.append(f"~{var}")
+            else:
+                terms.append(var)
+        pos_expressions.append(f"({' | '.join(terms)})")
+    return " & ".join(pos_expressions)
+
+# How main writes the canonical SOP/POS sections: 'full' spells out every
+# term, 'compact' lists the term numbers (see canonical_io) and 'omit' leaves
+# them out, both only once a section has more than CANONICAL_FULL_MAX_TERMS terms
+CANONICAL_OUTPUT = 'compact'
+CANONICAL_FULL_MAX_TERMS = 4096
+
+def canonical_section(indices, variables, form, mode='full'):
+    # form is 'SOP' (indices are minterms) or 'POS' (indices are maxterms)
+    if mode not in ('full', 'compact', 'omit'):
+        raise ValueError(f"Unknown canonical output mode '{mode}'")
+    if mode == 'full' or len(indices) <= CANONICAL_FULL_MAX_TERMS:
+        return minterms_to_SOP(indices, variables) if form == 'SOP' else maxterms_to_POS(indices, variables)
+    if mode == 'omit':
+        return canonical_io.omitted(len(indices))
+    return canonical_io.compact('minterms' if form == 'SOP' else 'maxterms', indices, variables)
+
+# sympy.simplify_logic only minimizes up to this many variables
+SIMPLIFY_LOGIC_MAX_VARS = 8
+# Wider expressions are minimized heuristically with espresso on cube lists
+ESPRESSO_MIN_VARS = SIMPLIFY_LOGIC_MAX_VARS + 1
+# Above this many variables the canonical sections and ON/OFF sets, which run
+# to 2^n terms, are only counted and exact QM is skipped
+SET_LISTING_MAX_VARS = 16
+# Cube budget of QM on espresso lines it still runs for; past it the primes
+# are grown heuristically
+ESPRESSO_LINE_QM_MAX_NODES = 100000
+
+def _already_minimal(expr, form):
+    return (
+        (sympy.logic.boolalg.is_dnf(expr) if form == 'dnf' else sympy.logic.boolalg.is_cnf(expr))
+        and all(sympy.logic.boolalg.is_literal(arg) for arg in expr.args)
+    )
+
+def _minimize_two_level(expr, variables, minterms, form):
+    if _already_minimal(expr, form) or len(variables) > SIMPLIFY_LOGIC_MAX_VARS:
+        return sympy.simplify_logic(expr, form=form)
+    # Feed the truth table engine's ON-set straight to sympy's QM instead of
+    # letting simplify_logic enumerate the rows again
+    symbols = [sympy.symbols(var) for var in variables]
+    if form == 'dnf':
+        return sympy.SOPform(symbols, minterms)
+    return sympy.POSform(symbols, minterms)
+
+def sop_cover(expr, variables):
+    # Cube list of an expression, in the (value, mask) encoding QM's Node uses
+    num_vars = len(variables)
+    position = {var: 1 << (num_vars - 1 - k) for k, var in enumerate(variables)}
+    if not sympy.logic.boolalg.is_dnf(expr):
+        expr = sympy.to_dnf(expr)
+    if expr is sympy.true:
+        return [(0, 0)]
+    if expr is sympy.false:
+        return []
+    terms = expr.args if isinstance(expr, sympy.Or) else (expr,)
+    cubes = []
+    for term in terms:
+        literals = term.args if isinstance(term, sympy.And) else (term,)
+        value, mask = 0, 0
+        for literal in literals:
+            negated = isinstance(literal, sympy.Not)
+            bit = position[str(literal.args[0] if negated else literal)]
+            if mask & bit and bool(value & bit) == negated:
+                break  # x & ~x, the term is empty
+            mask |= bit
+            if not negated:
+                value |= bit
+        else:
+            cubes.append((value, mask))
+    return cubes
+
+
+class ExpressionAnalysis:
+    # Parses an expression once and derives every report section from shared
+    # state. The truth table is only built when a section needs it, so wide
+    # expressions minimized by espresso never enumerate 2^n rows
+
+    def __init__(self, expression, variables=None, cache=None, set_engine='table') -> None:
+        self.expression = expression
+        self.ast = sop_parser.parse(expression)
+        self.variables = sorted(sop_parser.variables_of(self.ast)) if variables is None else variables
+        self._expr = None
+        self.engines = {}  # 'SOP'/'POS' -> name of the minimizer that produced it
+        self.cache = cache  # optional min_cache.MinimizationCache
+        self.set_engine = set_engine  # SET_ENGINE value used for the ON/OFF sets
+        self._table = None
+        self._bdd = None
+        self._minterms = None
+        self._maxterms = None
+        self._cover = None
+        self._key = None
+
+    @property
+    def expr(self):
+        # sympy form, only needed by the sympy minimizers
+        if self._expr is None:
+            self._expr = parse_expression(self.expression, self.variables)
+        return self._expr
+
+    @property
+    def table(self):
+        if self._table is None:
+            self._table = sop_parser.compile_table(self.ast, self.variables)()
+        return self._table
+
+    @property
+    def bdd(self):
+        # (manager, root node) of the expression
+        if self._bdd is None:
+            manager = bdd.BDD(self.variables)
+            self._bdd = (manager, manager.from_ast(self.ast))
+        return self._bdd
+
+    @property
+    def minterms(self):
+        if self._minterms is None:
+            if self.set_engine == 'bdd':
+                manager, root = self.bdd
+                self._minterms = list(manager.iter_minterms(root))
+            else:
+                self._minterms = self.table.on_set().tolist()
+        return self._minterms
+
+    @property
+    def maxterms(self):
+        if self._maxterms is None:
+            if self.set_engine == 'bdd':
+                manager, root = self.bdd
+                self._maxterms = list(manager.iter_minterms(manager.negate(root)))
+            else:
+                self._maxterms = self.table.off_set().tolist()
+        return self._maxterms
+
+    def count_minterms(self):
+        if self._minterms is not None:
+            return len(self._minterms)
+        # Lines too wide to list their sets are counted without the 2^n table
+        if self.set_engine == 'bdd' or not self.lists_sets():
+            manager, root = self.bdd
+            return manager.sat_count(root)
+        return self.table.count()
+
+    def count_maxterms(self):
+        return (1 << len(self.variables)) - self.count_minterms()
+
+    # The inverse function's ON-set is this function's OFF-set and vice versa
+    @property
+    def inverse_minterms(self):
+        return self.maxterms
+
+    @property
+    def inverse_maxterms(self):
+        return self.minterms
+
+    def lists_sets(self):
+        return len(self.variables) <= SET_LISTING_MAX_VARS
+
+    def canonical_SOP(self, mode='full'):
+        if not self.lists_sets():
+            return canonical_io.omitted(self.count_minterms())
+        return canonical_section(self.minterms, self.variables, 'SOP', mode)
+
+    def canonical_POS(self, mode='full'):
+        if not self.lists_sets():
+            return canonical_io.omitted(self.count_maxterms())
+        return canonical_section(self.maxterms, self.variables, 'POS', mode)
+
+    def inverse_SOP(self, mode='full'):
+        if not self.lists_sets():
+            return canonical_io.omitted(self.count_maxterms())
+        return canonical_section(self.inverse_minterms, self.variables, 'SOP', mode)
+
+    def inverse_POS(self, mode='full'):
+        if not self.lists_sets():
+            return canonical_io.omitted(self.count_minterms())
+        return canonical_section(self.inverse_maxterms, self.variables, 'POS', mode)
+
+    @property
+    def cover(self):
+        if self._cover is None:
+            # Expressions already written as a sum of products need no sympy
+            self._cover = sop_parser.to_cover(self.ast, self.variables)
+            if self._cover is None:
+                self._cover = sop_cover(self.expr, self.variables)
+        return self._cover
+
+    def uses_espresso(self):
+        return len(self.variables) >= ESPRESSO_MIN_VARS
+
+    def function_key(self):
+        # Cache key of the function: its truth table, or its cube cover when
+        # the table is too wide to build
+        if self._key is None:
+            if self.uses_espresso():
+                self._key = cover_key(self.cover, len(self.variables))
+            else:
+                # Built from Python ints so a cache hit never loads NumPy
+                self._key = table_key(sop_parser.compile_int(self.ast, self.variables), len(self.variables))
+        return self._key
+
+    def _cached(self, kind, compute, cacheable=True):
+        # compute returns (result, engine); results are stored with positional
+        # variables so a renamed copy of the function hits as well
+        if self.cache is None or not cacheable:
+            return compute()
+        entry = self.cache.get(kind, self.function_key())
+        if entry is not None:
+            return from_positional(entry['result'], self.variables), f"{entry['engine']} (cached)"
+        result, engine = compute()
+        self.cache.put(kind, self.function_key(), {'result': to_positional(result, self.variables), 'engine': engine})
+        return result, engine
+
+    def minimized_SOP(self):
+        # simplify_logic's quick exit depends on how the expression is written,
+        # not only on the function, so it bypasses the cache
+        cacheable = self.uses_espresso() or not sop_parser.is_literal_clause(self.ast)
+        minimized, self.engines['SOP'] = self._cached('SOP', self._minimize_SOP, cacheable)
+        return minimized
+
+    def minimized_POS(self):
+        cacheable = self.uses_espresso() or not sop_parser.is_literal_clause(self.ast)
+        minimized, self.engines['POS'] = self._cached('POS', self._minimize_POS, cacheable)
+        return minimized
+
+    def _minimize_SOP(self):
+        if self.uses_espresso():
+            return espresso.minimize_SOP(self.cover, self.variables), 'espresso'
+        return str(_minimize_two_level(self.expr, self.variables, self.minterms, 'dnf')), 'sympy'
+
+    def _minimize_POS(self):
+        if self.uses_espresso():
+            try:
+                return espresso.minimize_POS(self.cover, self.variables), 'espresso'
+            except espresso.CoverTooLarge as error:
+                return f"Not computed ({error})", 'espresso (gave up)'
+        return str(_minimize_two_level(self.expr, self.variables, self.minterms, 'cnf')), 'sympy'
+
+    def qm(self, max_nodes=None, on_budget='warn', cover_method='auto', cover_time_limit=DEFAULT_TIME_LIMIT):
+        qm = QM(
+            len(self.variables), self.minterms, max_nodes=max_nodes, on_budget=on_budget,
+            cover_method=cover_method, cover_time_limit=cover_time_limit,
+        )
+        qm.run()
+        return qm
+
+    def prime_implicants(self, max_nodes=None, on_budget='warn', cover_method='auto', cover_time_limit=DEFAULT_TIME_LIMIT):
+        # QM's report as a dict. term2logic names variables by position, so
+        # the strings are stored as they are
+        if self.cache is not None:
+            kind = f"QM:{max_nodes}:{on_budget}:{cover_method}:{cover_time_limit}"
+            entry = self.cache.get(kind, self.function_key())
+            if entry is not None:
+                return entry
+        qm = self.qm(max_nodes, on_budget, cover_method, cover_time_limit)
+        epi, epi_count = qm.select()
+        prime_implicants, pi_count = qm.get_prime_implicants()
+        result = {
+            'prime_implicants': prime_implicants,
+            'pi_count': pi_count,
+            'epi': epi,
+            'epi_count': epi_count,
+            'cover_optimal': qm.cover_optimal,
+        }
+        if self.cache is not None:
+            self.cache.put(kind, self.function_key(), result)
+        return result
+
+def minimized_SOP(expression, variables):
+    return ExpressionAnalysis(expression, variables).minimized_SOP()
+
+def extract_literals(expression):
+    """Returns a set of all literals in the expression."""
+    # Names as the sop_parser tokenizer reads them, so IN_1 is one variable
+    # and True/False are not variables at all
+    return {text for kind, text, _ in sop_parser.tokenize(expression) if kind == 'name'}
+
+def saved_literals(original, minimized):
+    original_literals = extract_literals(original)
+    minimized_literals = extract_literals(minimized)
+    return len(original_literals - minimized_literals)
+
+def minimized_POS(expression, variables):
+    return ExpressionAnalysis(expression, variables).minimized_POS()
+
+def get_minimized_expressions_with_engines(input_filename, cache=None):
+    # (minimized SOP, engine that produced it) for every line of the file
+    results = []
+    with open(input_filename, 'r') as infile:
+        for line in infile:
+            expression = line.strip()
+            variables = extract_variables(expression)
+            analysis = ExpressionAnalysis(expression, variables, cache)
+            minimized_expression = analysis.minimized_SOP()
+            results.append((minimized_expression, analysis.engines['SOP']))
+    return results
+
+def get_minimized_expressions_multi_output(input_filename, cache=None):
+    # Minimizes all lines together over their shared variables so a product
+    # term needed by several outputs is only produced once. Returns the
+    # minimized SOP of every line
+    with open(input_filename, 'r') as infile:
+        expressions = [line.strip() for line in infile if line.strip()]
+    variables = sorted(set().union(*(extract_variables(expression) for expression in expressions)))
+    analyses = [ExpressionAnalysis(expression, variables, cache) for expression in expressions]
+    covers = [analysis.cover for analysis in analyses]
+    # Minimized SOPs are sums of products, so they read straight into cubes
+    initial = [
+        sop_parser.to_cover(sop_parser.parse(analysis.minimized_SOP()), variables)
+        for analysis in analyses
+    ]
+    selected = espresso.minimize_multi_output(covers, len(variables), initial)
+
+    return [espresso.cover_to_SOP(cover, variables) for cover in selected]
+
+def get_minimized_expressions_from_file(input_filename, multi_output=False, cache=None):
+    if multi_output:
+        return get_minimized_expressions_multi_output(input_filename, cache)
+    return [expression for expression, _ in get_minimized_expressions_with_engines(input_filename, cache)]
+
+def get_variables_from_file(input_filename):
+    variables = []
+    with open(input_filename, 'r') as infile:
+        for line in infile:
+            expression = line.strip()
+            variables = extract_variables(expression)
+    return variables
+
+def parse_sop_formulas(input_lines):
+    formulas = {}
+    for line in input_lines:
+        key, expression = line.split(" = ")
+        formulas[key.strip()] = expression.strip()
+    return formulas
+
+
+def write_to_file(filename, data):
+    with open(filename, 'a') as f: 
+        f.write(data + '\n')
+
+def analyze_line(expression, cache=None, canonical=CANONICAL_OUTPUT, set_engine=SET_ENGINE):
+    # Report block of one input line, as the list of lines main writes
+    output_data = []
+    variables = extract_variables(expression)
+    analysis = ExpressionAnalysis(expression, variables, cache, set_engine)
+
+    # SOP
+    output_data.append(f"SOP: {analysis.canonical_SOP(canonical)}")
+
+    # POS
+    output_data.append(f"POS: {analysis.canonical_POS(canonical)}")
+
+    # Inverse SOP
+    output_data.append(f"Inverse SOP: {analysis.inverse_SOP(canonical)}")
+
+    # Inverse POS
+    output_data.append(f"Inverse POS: {analysis.inverse_POS(canonical)}")
+
+    # A canonical form mentions every variable as soon as it has one term,
+    # which is all saved_literals looks at, so the sections need not be spelled out
+    sop_expression = " ".join(variables) if analysis.count_minterms() else ""
+    pos_expression = " ".join(variables) if analysis.count_maxterms() else ""
+
+    # Minimized SOP
+    minimized_sop_expression = analysis.minimized_SOP()
+    output_data.append(f"Minimized SOP: {minimized_sop_expression}")
+
+    literal_savings = saved_literals(sop_expression, minimized_sop_expression)
+    output_data.append(f"Saved literals (vs canonical SOP): {literal_savings}")
+
+    # Minimized POS
+    minimized_pos_expression = analysis.minimized_POS()
+    output_data.append(f"Minimized POS: {minimized_pos_expression}")
+
+    literal_savings_pos = saved_literals(pos_expression, minimized_pos_expression)
+    output_data.append(f"Saved literals (vs canonical POS): {literal_savings_pos}")
+    output_data.append(f"Minimization engine: SOP {analysis.engines['SOP']}, POS {analysis.engines['POS']}")
+
+    # Extract prime implicants and Essential prime implicants and their count and add to output data
+    if analysis.lists_sets():
+        if analysis.uses_espresso():
+            qm = analysis.prime_implicants(max_nodes=ESPRESSO_LINE_QM_MAX_NODES, on_budget='heuristic')
+        else:
+            qm = analysis.prime_implicants()
+    else:
+        skipped = f"Not computed ({len(variables)} variables)"
+        qm = dict.fromkeys(('prime_implicants', 'pi_count', 'epi', 'epi_count', 'cover_optimal'), skipped)
+    output_data.append(f"Prime Implicants: {qm['prime_implicants']}")
+    output_data.append(f"Number of Prime Implicants: {qm['pi_count']}")
+    output_data.append(f"Essential Prime Implicants: {qm['epi']}")
+    output_data.append(f"Number of Essential Prime Implicants: {qm['epi_count']}")
+    output_data.append(f"Minimum cover proven optimal: {qm['cover_optimal']}")
+
+    # ON-Set minterms and their number
+    minterm_count = analysis.count_minterms()
+    listed = analysis.minterms if analysis.lists_sets() else canonical_io.omitted(minterm_count)
+    output_data.append(f"ON-Set minterms: {listed}")
+    output_data.append(f"Number of ON-Set minterms: {minterm_count}")
+
+    # ON-Set maxterms and their number
+    maxterm_count = analysis.count_maxterms()
+    listed = analysis.maxterms if analysis.lists_sets() else canonical_io.omitted(maxterm_count)
+    output_data.append(f"ON-Set maxterms: {listed}")
+    output_data.append(f"Number of ON-Set maxterms: {maxterm_count}")
+
+
+
+    output_data.append("\n")
+    return output_data
+
+class LineTimeout(Exception):
+    pass
+
+def _raise_line_timeout(signum, frame):
+    raise LineTimeout()
+
+def _analyze_line_limited(expression, cache, line_timeout, canonical=CANONICAL_OUTPUT, set_engine=SET_ENGINE):
+    # Runs one line under a wall-clock limit so a single slow, exploding or
+    # malformed line cannot stall or abort the batch. SIGALRM only exists on Unix and only works
+    # in the main thread; elsewhere the limit is not enforced
+    timed = (
+        bool(line_timeout) and hasattr(signal, 'setitimer')
+        and threading.current_thread() is threading.main_thread()
+    )
+    if timed:
+        previous = signal.signal(signal.SIGALRM, _raise_line_timeout)
+        signal.setitimer(signal.ITIMER_REAL, line_timeout)
+    try:
+        return analyze_line(expression, cache, canonical, set_engine)
+    except LineTimeout:
+        return [f"Timed out after {line_timeout} s: {expression}", "\n"]
+    except MemoryError:
+        return [f"Out of memory: {expression}", "\n"]
+    except Exception as error:
+        # e.g. a syntax error; the other lines of the batch still get their blocks
+        return [f"Failed ({type(error).__name__}: {error}): {expression}", "\n"]
+    finally:
+        if timed:
+            signal.setitimer(signal.ITIMER_REAL, 0)
+            signal.signal(signal.SIGALRM, previous)
+
+# Cache of a pool worker, opened once per process by _init_worker
+_worker_cache = None
+
+def _init_worker(cache_path):
+    global _worker_cache
+    if cache_path:
+        _worker_cache = open_cache(cache_path)
+
+def _analyze_chunk_in_worker(expressions, line_timeout, canonical, set_engine):
+    blocks = [
+        _analyze_line_limited(expression, _worker_cache, line_timeout, canonical, set_engine)
+        for expression in expressions
+    ]
+    # Worker processes are never closed, so their lookups are written per chunk
+    if _worker_cache is not None:
+        _worker_cache.flush()
+    return blocks
+
+def read_expressions(input_filename, start_line=0):
+    # Lazily yields the stripped lines of the input, skipping the first start_line
+    with open(input_filename, 'r') as infile:
+        for expression in itertools.islice(infile, start_line, None):
+            yield expression.strip()
+
+def _chunks(iterable, size):
+    iterator = iter(iterable)
+    while True:
+        chunk = list(itertools.islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+def iter_reports(
+    expressions, cache=None, workers=1, chunk_size=4, line_timeout=None, canonical=CANONICAL_OUTPUT,
+    set_engine=SET_ENGINE,
+):
+    # Yields the report block of every expression in input order. With
+    # workers > 1 chunks of chunk_size lines go to a process pool; only a few
+    # chunks per worker are in flight, so memory does not grow with the input
+    if workers <= 1:
+        for expression in expressions:
+            yield _analyze_line_limited(expression, cache, line_timeout, canonical, set_engine)
+        return
+    from concurrent.futures import ProcessPoolExecutor
+    cache_path = cache.path if cache is not None else None
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(cache_path,)) as executor:
+        pending = collections.deque()
+        for chunk in _chunks(expressions, chunk_size):
+            pending.append(executor.submit(_analyze_chunk_in_worker, chunk, line_timeout, canonical, set_engine))
+            if len(pending) >= 2 * workers:
+                yield from pending.popleft().result()
+        while pending:
+            yield from pending.popleft().result()
+
+def _progress_filename(output_filename):
+    return output_filename + ".progress"
+
+def _input_fingerprint(input_filename):
+    # Path, size and modification time: an input that changed since the
+    # interrupted run does not belong to the output it left
+    status = os.stat(input_filename)
+    return f"{os.path.abspath(input_filename)}:{status.st_size}:{status.st_mtime_ns}"
+
+def _read_progress(output_filename, input_filename):
+    # (input lines done, bytes of output written for them) of an earlier run
+    # over the same input
+    try:
+        with open(_progress_filename(output_filename), 'r') as progress:
+            counts, fingerprint = progress.read().split('\n')[:2]
+        lines_done, offset = counts.split()
+        if fingerprint != _input_fingerprint(input_filename):
+            return 0, 0
+        return int(lines_done), int(offset)
+    except (OSError, ValueError):
+        return 0, 0
+
+def main(
+    input_filename, output_filename, cache=None, workers=1, chunk_size=4, line_timeout=None, resume=False,
+    canonical=CANONICAL_OUTPUT, set_engine=SET_ENGINE,
+):
+    # Every block is written and flushed as soon as it is ready, and the
+    # number of finished lines is recorded next to the output. With resume
+    # an interrupted run over the same, unchanged input continues after the
+    # last finished line; whatever a crash left of a half-written block is
+    # cut off first
+    lines_done, offset = _read_progress(output_filename, input_filename) if resume else (0, 0)
+    fingerprint = _input_fingerprint(input_filename)
+    mode = 'r+' if lines_done and os.path.exists(output_filename) else 'w'
+    if mode == 'w':
+        lines_done, offset = 0, 0
+
+    with open(output_filename, mode) as outfile:
+        outfile.seek(offset)
+        outfile.truncate()
+        expressions = read_expressions(input_filename, lines_done)
+        for block in iter_reports(expressions, cache, workers, chunk_size, line_timeout, canonical, set_engine):
+            for line in block:
+                outfile.write(line + "\n")
+            outfile.flush()
+            lines_done += 1
+            with open(_progress_filename(output_filename), 'w') as progress:
+                progress.write(f"{lines_done} {outfile.tell()}\n{fingerprint}\n")
+    # A finished run leaves nothing to resume
+    if os.path.exists(_progress_filename(output_filename)):
+        os.remove(_progress_filename(output_filename))
+
+
+# Minimization results are reused across runs from this file; None disables it
+MINIMIZATION_CACHE_PATH = "minimization_cache.sqlite"
+# Worker processes for main (1 keeps everything in this process) and the
+# per-line limit in seconds (None for no limit)
+WORKERS = os.cpu_count() or 1
+LINE_TIMEOUT = 60
+
+
+if __name__ == "__main__":
+    cache = open_cache(MINIMIZATION_CACHE_PATH) if MINIMIZATION_CACHE_PATH else None
+    main("input.eqn", "output_ENQ.txt", cache, workers=WORKERS, line_timeout=LINE_TIMEOUT, resume=True)
+    if cache is not None:
+        stats = cache.stats()
+        print(f"Minimization cache: {stats['hits']} hits, {stats['misses']} misses, {stats['entries']} entries")
+        cache.close()
+
@@ -0,0 +1,103 @@
+import re
+import sys
+
+from lazy_import import lazy_module
+
+np = lazy_module('numpy')
+
+# Compact form of the canonical SOP/POS sections. A canonical SOP over n
+# variables can hold 2^n terms, so instead of spelling every term out the
+# report can list the minterm (or maxterm) numbers as ranges, or as a hex
+# bitmap when that is shorter:
+#
+#   SOP: compact(minterms=0-3,7,9-12; variables=A,B,C,D)
+#   POS: compact(maxterms=hex:f0ff; variables=A,B,C,D)
+#
+# expand_line turns such a line back into the exact text the full mode writes.
+
+_COMPACT = re.compile(r'compact\((minterms|maxterms)=([^;]*); variables=([^)]*)\)')
+OMITTED = "omitted"
+
+
+def to_ranges(indices):
+    indices = np.asarray(indices, dtype=np.int64)
+    if indices.size == 0:
+        return ""
+    # A run ends wherever the next index is not the successor
+    breaks = np.flatnonzero(np.diff(indices) != 1)
+    starts = indices[np.concatenate(([0], breaks + 1))]
+    ends = indices[np.concatenate((breaks, [indices.size - 1]))]
+    return ",".join(str(s) if s == e else f"{s}-{e}" for s, e in zip(starts.tolist(), ends.tolist()))
+
+
+def from_ranges(text):
+    if not text:
+        return []
+    indices = []
+    for part in text.split(","):
+        first, _, last = part.partition("-")
+        indices.extend(range(int(first), int(last or first) + 1))
+    return indices
+
+
+def to_bitmap(indices, num_vars):
+    # Byte k holds rows 8k..8k+7, lowest row in the lowest bit
+    bits = np.zeros(max(8, 1 << num_vars), dtype=np.uint8)
+    bits[np.asarray(indices, dtype=np.int64)] = 1
+    return np.packbits(bits, bitorder='little').tobytes().hex()
+
+
+def from_bitmap(text):
+    bits = np.unpackbits(np.frombuffer(bytes.fromhex(text), dtype=np.uint8), bitorder='little')
+    return np.flatnonzero(bits).tolist()
+
+
+def compact(kind, indices, variables):
+    # kind is 'minterms' or 'maxterms'; picks whichever encoding is shorter
+    ranges = to_ranges(indices)
+    if len(ranges) > (1 << len(variables)) // 4:
+        encoded = f"hex:{to_bitmap(indices, len(variables))}"
+    else:
+        encoded = ranges
+    return f"compact({kind}={encoded}; variables={','.join(variables)})"
+
+
+def omitted(count):
+    return f"{OMITTED} ({count} terms)"
+
+
+def parse_compact(text):
+    # (kind, indices, variables) of a compact section, None for anything else
+    match = _COMPACT.search(text)
+    if match is None:
+        return None
+    kind, encoded, variables = match.groups()
+    indices = from_bitmap(encoded[4:]) if encoded.startswith("hex:") else from_ranges(encoded)
+    return kind, indices, variables.split(",") if variables else []
+
+
+def expand_line(line):
+    # Full text of a report line; lines that are not compact come back as they are
+    parsed = parse_compact(line)
+    if parsed is None:
+        return line
+    from boolean_EQN import maxterms_to_POS, minterms_to_SOP
+    kind, indices, variables = parsed
+    label = line[:line.index("compact(")]
+    # Inverse sections reuse the other set of indices, the label says which form it is
+    if label.rstrip().rstrip(":").endswith("SOP"):
+        return label + minterms_to_SOP(indices, variables)
+    return label + maxterms_to_POS(indices, variables)
+
+
+def expand_file(input_filename, output_file):
+    with open(input_filename, 'r') as infile:
+        for line in infile:
+            output_file.write(expand_line(line.rstrip("\n")) + "\n")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 2:
+        print("usage: python canonical_io.py <report file>")
+        sys.exit(1)
+    expand_file(sys.argv[1], sys.stdout)
@@ -0,0 +1,279 @@
+# Heuristic two-level minimizer in the style of Espresso-II. Covers are lists of
+# (value, mask) cubes over num_vars bits, the same encoding QM's Node uses:
+# mask has a 1 for every variable the cube cares about and value holds the
+# polarity of those literals. Nothing here enumerates the 2^n minterms.
+
+UNIVERSE = (0, 0)
+# Complements can grow exponentially (a wide SOP's minimal POS usually does),
+# so minimize_POS gives up beyond this many OFF-set cubes
+MAX_COMPLEMENT_CUBES = 4096
+
+
+class CoverTooLarge(ValueError):
+    pass
+
+
+def _bits(mask):
+    while mask:
+        low = mask & -mask
+        yield low
+        mask ^= low
+
+
+def intersects(a, b):
+    return ((a[0] ^ b[0]) & a[1] & b[1]) == 0
+
+
+def contains(a, b):
+    # True when cube a covers cube b
+    return (a[1] & ~b[1]) == 0 and ((a[0] ^ b[0]) & a[1]) == 0
+
+
+def cofactor(cover, cube):
+    value, mask = cube
+    return [(v & ~mask, m & ~mask) for v, m in cover if ((v ^ value) & m & mask) == 0]
+
+
+def _split_variable(cover):
+    # Most binate variable (appears in both polarities in the most cubes), or
+    # None when the cover is unate
+    positive = {}
+    negative = {}
+    for value, mask in cover:
+        for bit in _bits(mask):
+            if value & bit:
+                positive[bit] = positive.get(bit, 0) + 1
+            else:
+                negative[bit] = negative.get(bit, 0) + 1
+    binate = [bit for bit in positive if bit in negative]
+    if not binate:
+        return None
+    return max(binate, key=lambda bit: (positive[bit] + negative[bit], bit))
+
+
+def tautology(cover, num_vars):
+    if any(mask == 0 for _, mask in cover):
+        return True
+    if not cover:
+        return False
+    # The cubes cannot fill the space if their sizes don't add up to it
+    if sum(1 << (num_vars - mask.bit_count()) for _, mask in cover) < (1 << num_vars):
+        return False
+    bit = _split_variable(cover)
+    if bit is None:
+        # A unate cover is a tautology only if it holds the universal cube
+        return False
+    return tautology(cofactor(cover, (0, bit)), num_vars) and tautology(cofactor(cover, (bit, bit)), num_vars)
+
+
+def complement(cover, num_vars, limit=None):
+    if not cover:
+        return [UNIVERSE]
+    if any(mask == 0 for _, mask in cover):
+        return []
+    if len(cover) == 1:
+        # De Morgan on a single cube, written as disjoint cubes
+        value, mask = cover[0]
+        result = []
+        prefix_value, prefix_mask = 0, 0
+        for bit in _bits(mask):
+            result.append((prefix_value | (~value & bit), prefix_mask | bit))
+            prefix_value |= value & bit
+            prefix_mask |= bit
+        return result
+    bit = _split_variable(cover)
+    if bit is None:
+        # Unate: split on the most used variable instead
+        counts = {}
+        for _, mask in cover:
+            for b in _bits(mask):
+                counts[b] = counts.get(b, 0) + 1
+        bit = max(counts, key=lambda b: (counts[b], b))
+    low = complement(cofactor(cover, (0, bit)), num_vars, limit)
+    high = complement(cofactor(cover, (bit, bit)), num_vars, limit)
+    # Cubes present in both halves do not depend on the split variable
+    shared = set(low) & set(high)
+    result = [cube for cube in low if cube in shared]
+    result += [(v, m | bit) for v, m in low if (v, m) not in shared]
+    result += [(v | bit, m | bit) for v, m in high if (v, m) not in shared]
+    if limit is not None and len(result) > limit:
+        raise CoverTooLarge(f"complement needs more than {limit} cubes")
+    return result
+
+
+def supercube(cover):
+    mask = -1
+    ones = -1
+    zeros = -1
+    for v, m in cover:
+        mask &= m
+        ones &= v
+        zeros &= ~v & m
+    mask &= ones | zeros
+    return (ones & mask, mask)
+
+
+def _drop_contained(cover):
+    result = []
+    for cube in sorted(set(cover), key=lambda c: c[1].bit_count()):
+        if not any(contains(kept, cube) for kept in result):
+            result.append(cube)
+    return result
+
+
+def expand(cover, off_set):
+    result = []
+    # Largest cubes first, they are the most likely to swallow the others
+    for cube in sorted(cover, key=lambda c: c[1].bit_count()):
+        if any(contains(kept, cube) for kept in result):
+            continue
+        value, mask = cube
+        conflicts = [(value ^ v) & mask & m for v, m in off_set]
+        while True:
+            # A literal can be raised unless it alone keeps some OFF cube disjoint
+            blocked = 0
+            for conflict in conflicts:
+                if conflict & (conflict - 1) == 0:
+                    blocked |= conflict
+            free = mask & ~blocked
+            if not free:
+                break
+            # Raise the literal that separates the fewest OFF cubes, keeping the
+            # others available for later raises
+            usage = {bit: 0 for bit in _bits(free)}
+            for conflict in conflicts:
+                for bit in _bits(conflict & free):
+                    usage[bit] += 1
+            bit = min(usage, key=lambda b: (usage[b], b))
+            mask &= ~bit
+            value &= ~bit
+            conflicts = [conflict & ~bit for conflict in conflicts]
+        result.append((value, mask))
+    return _drop_contained(result)
+
+
+def irredundant(cover, num_vars):
+    kept = list(cover)
+    # Try dropping the smallest cubes first
+    for cube in sorted(cover, key=lambda c: (-c[1].bit_count(), c)):
+        rest = [c for c in kept if c != cube]
+        if tautology(cofactor(rest, cube), num_vars):
+            kept = rest
+    return kept
+
+
+def reduce(cover, num_vars):
+    current = list(cover)
+    for cube in sorted(cover, key=lambda c: (c[1].bit_count(), c)):
+        index = current.index(cube)
+        rest = current[:index] + current[index + 1:]
+        # Shrink the cube to the part of it no other cube covers
+        uncovered = complement(cofactor(rest, cube), num_vars)
+        if not uncovered:
+            current = rest
+            continue
+        value, mask = supercube(uncovered)
+        current[index] = (cube[0] | value, cube[1] | mask)
+    return current
+
+
+def cost(cover):
+    return (len(cover), sum(mask.bit_count() for _, mask in cover))
+
+
+def espresso(cover, num_vars):
+    cover = _drop_contained(cover)
+    if not cover:
+        return []
+    off_set = complement(cover, num_vars)
+    if not off_set:
+        return [UNIVERSE]
+    best = irredundant(expand(cover, off_set), num_vars)
+    while True:
+        candidate = irredundant(expand(reduce(best, num_vars), off_set), num_vars)
+        if cost(candidate) >= cost(best):
+            return best
+        best = candidate
+
+
+def cube_to_literals(cube, variables):
+    value, mask = cube
+    num_vars = len(variables)
+    literals = []
+    for k, var in enumerate(variables):
+        bit = 1 << (num_vars - 1 - k)
+        if mask & bit:
+            literals.append(var if value & bit else f"~{var}")
+    return literals
+
+
+def cover_to_SOP(cover, variables):
+    if not cover:
+        return "False"
+    if any(mask == 0 for _, mask in cover):
+        return "True"
+    terms = []
+    for cube in sorted(cover, key=lambda c: (c[1].bit_count(), cube_to_literals(c, variables))):
+        literals = cube_to_literals(cube, variables)
+        terms.append(literals[0] if len(literals) == 1 else f"({' & '.join(literals)})")
+    return " | ".join(terms)
+
+
+def cover_to_POS(off_cover, variables):
+    # Each cube of the OFF-set cover becomes one clause of the product
+    if not off_cover:
+        return "True"
+    if any(mask == 0 for _, mask in off_cover):
+        return "False"
+    clauses = []
+    for cube in sorted(off_cover, key=lambda c: (c[1].bit_count(), cube_to_literals(c, variables))):
+        literals = [lit[1:] if lit.startswith('~') else f"~{lit}" for lit in cube_to_literals(cube, variables)]
+        clauses.append(literals[0] if len(literals) == 1 else f"({' | '.join(literals)})")
+    return " & ".join(clauses)
+
+
+def minimize_SOP(cover, variables):
+    return cover_to_SOP(espresso(cover, len(variables)), variables)
+
+
+def minimize_POS(cover, variables, limit=MAX_COMPLEMENT_CUBES):
+    # Minimizes the complement as a sum of products and dualizes it; raises
+    # CoverTooLarge when the OFF-set cover passes the limit
+    off_set = complement(_drop_contained(cover), len(variables), limit)
+    return cover_to_POS(espresso(off_set, len(variables)), variables)
+
+
+def minimize_multi_output(covers, num_vars, initial=None):
+    # Minimizes several outputs over the same variables so that product terms
+    # are shared where possible. covers holds each output's ON-set cover and
+    # initial, if given, a minimized cover per output to draw candidates from.
+    # Returns one cover per output whose cubes are reused across outputs.
+    own = initial if initial is not None else [espresso(cover, num_vars) for cover in covers]
+    candidates = list(dict.fromkeys(cube for cover in own for cube in cover))
+    implicants = [
+        [cube for cube in candidates if tautology(cofactor(cover, cube), num_vars)]
+        for cover in covers
+    ]
+    usage = {cube: sum(cube in terms for terms in implicants) for cube in candidates}
+    selected = own
+    # The first pass keeps the terms that could be shared most widely, the
+    # second one re-ranks them by how many outputs actually kept them
+    for _ in range(2):
+        selected = []
+        for terms in implicants:
+            kept = list(terms)
+            # Single literals need no product LUT, so they are dropped last
+            for cube in sorted(terms, key=lambda c: (c[1].bit_count() == 1, usage[c], -c[1].bit_count(), c)):
+                rest = [c for c in kept if c != cube]
+                if tautology(cofactor(rest, cube), num_vars):
+                    kept = rest
+            selected.append(kept)
+        usage = {cube: sum(cube in terms for terms in selected) for cube in candidates}
+    # Fall back to the independent covers if sharing did not pay off
+    if _distinct_products(selected) > _distinct_products(own):
+        return [list(cover) for cover in own]
+    return selected
+
+
+def _distinct_products(covers):
+    return len({cube for cover in covers for cube in cover if cube[1].bit_count() > 1})
@@ -0,0 +1,173 @@
+import os
+
+import bitstream
+import lut_logic
+import placement
+import timing
+from lut_mapper import map_expressions
+
+# Arrival times, critical path and slack go here as JSON; None to skip
+TIMING_REPORT_PATH = "timing_report.json"
+
+# Annealing chains run for the placement, and processes running them; the
+# placement is the same for any number of processes
+PLACEMENT_CHAINS = 4
+PLACEMENT_WORKERS = min(PLACEMENT_CHAINS, os.cpu_count() or 1)
+
+# Binary bitstream (bitstream.py), loaded back with FPGA.from_bitstream; None to skip
+BITSTREAM_PATH = "bitstream.bin"
+
+
+class FPGABackend:
+    # What both FPGA simulators share: mapping the expressions onto their
+    # luts, the resource summary, timing, placement and the bitstream
+
+    mapping = None  # lut_mapper.LUTMapping of the assigned expressions
+    mapped_expressions = None  # (expressions, formula names) it was built from
+    shared_logic_savings = None  # set by calculate_shared_logic_savings
+    placement = None  # placement.Placement of the used LUTs, see place_luts
+
+    def assign_mapping(self, sop_expressions, formula_names):
+        # Technology mapping (lut_mapper): the expressions become one
+        # AND-inverter graph, covered by LUTs of at most lut_type inputs with
+        # the fewest LUT levels first and the fewest LUTs second.
+        # formula_names maps a name to the index of the expression it stands for
+        mapping = map_expressions(sop_expressions, self.lut_type, formula_names)
+        if len(mapping.functions) > len(self.luts):
+            raise Exception("Not enough LUTs available.")
+        for lut_id, function in enumerate(mapping.functions):
+            self.luts[lut_id].assign_function(function)
+        self.mapping = mapping
+        self.mapped_expressions = (sop_expressions, formula_names)
+        self.shared_logic_savings = None
+        for lut_id in mapping.outputs:
+            self.final_or_lut_ids.append(lut_id)  # LUT computing the whole expression
+            self.expression_outputs.append(f"Output of LUT {lut_id}")
+        return mapping
+
+    def extract_referenced_luts(self, function):
+        return lut_logic.referenced_luts(function)
+
+    def update_lut_connections(self):
+        # Re-derive every connection from the functions. assign_function keeps
+        # them current, so this is only needed after a function was changed
+        # without it
+        self.luts.reconnect_all()
+
+    @property
+    def num_connections(self):
+        return self.luts.num_connections
+
+    @property
+    def netlist(self):
+        # CSR snapshot of the connections and functions, see LUTFabric.netlist
+        return self.luts.netlist
+
+    def calculate_resource_allocation(self):
+        # Calculate the percentage of LUTs used
+        luts_used = sum(1 for lut in self.luts if lut.function is not None)
+        percent_luts_used = (luts_used / len(self.luts)) * 100
+
+        # Calculate the percentage of connections used; every netlist edge is
+        # one input and one output connection
+        total_possible_connections = len(self.luts) * (len(self.luts) - 1)
+        connections_used = 2 * self.num_connections
+        percent_connections_used = (connections_used / total_possible_connections) * 100 if total_possible_connections else 0
+
+        # Estimate total memory required (example calculation)
+        memory_per_lut = 64  # Assuming each LUT requires 64 bytes (for example)
+        memory_per_connection = 8  # Assuming each connection requires 8 bytes (for example)
+        total_memory = (luts_used * memory_per_lut) + (connections_used * memory_per_connection)
+
+        return percent_luts_used, percent_connections_used, total_memory
+
+    def calculate_shared_logic_savings(self):
+        # LUTs that structural hashing saved: the expressions are mapped again
+        # with every term on its own logic, once per mapping
+        if self.shared_logic_savings is None:
+            expressions, formula_names = self.mapped_expressions
+            separate = map_expressions(expressions, self.lut_type, formula_names, structural_hashing=False)
+            self.shared_logic_savings = len(separate.functions) - len(self.mapping.functions)
+        return self.shared_logic_savings
+
+    def display_resource_allocation_summary(self):
+        percent_luts_used, percent_connections_used, total_memory = self.calculate_resource_allocation()
+        print(f"Resource Allocation Summary:")
+        print(f"  % of LUTs Used: {percent_luts_used:.2f}%")
+        print(f"  % of Connections Used: {percent_connections_used:.2f}%")
+        print(f"  Total Memory Required: {total_memory} bytes")
+        if self.mapping is not None:
+            print(f"  LUTs Saved by Shared Logic: {self.calculate_shared_logic_savings()}")
+
+    def analyze_timing(self, lut_delay=timing.LUT_DELAY, connection_delay=timing.CONNECTION_DELAY, clock_period=None):
+        # Static timing of the mapped network up to the output ports, see timing.py
+        outputs = [lut.id if lut is not None else None for lut in self.system_outputs]
+        return timing.analyze(self.netlist, outputs, lut_delay, connection_delay, clock_period=clock_period)
+
+    def display_timing_report(self, report=None):
+        if report is None:
+            report = self.analyze_timing()
+        print("Timing Summary:")
+        print(f"  Logic Depth: {report.depth} LUT level(s)")
+        print(f"  Critical Path Delay: {report.critical_delay:.2f}")
+        print(f"  Critical Path: {' -> '.join(f'LUT {lut_id}' for lut_id in report.critical_path)}")
+        for output in report.outputs:
+            print(f"  Output port {output['port']} (LUT {output['lut']}): arrival {output['arrival']:.2f}, slack {output['slack']:.2f}")
+
+    def place_luts(self, schedule=None, chains=1, workers=1, seed=0, width=None, height=None):
+        # Anneal the used LUTs onto a grid (placement.py); the system inputs
+        # are pads left of it in variable order, the output ports pads right of it
+        readers = {var: [] for var in self.luts.max_variables}
+        for lut_id, function in self.netlist.functions.items():
+            for signal in lut_logic.parse_function(function)[1]:
+                if signal in readers:
+                    readers[signal].append(lut_id)
+        input_luts = list(readers.values())
+        outputs = [lut.id if lut is not None else None for lut in self.system_outputs]
+        self.placement = placement.place(
+            self.netlist, input_luts, outputs, width, height, schedule, chains, workers, seed
+        )
+        return self.placement
+
+    def display_placement_summary(self):
+        congestion = self.placement.congestion()
+        print("Placement Summary:")
+        print(f"  Grid: {self.placement.width} x {self.placement.height}")
+        print(f"  Total Wirelength (HPWL): {self.placement.wirelength}")
+        print(f"  Peak Channel Demand: {congestion.peak:.2f} tracks")
+        for channel, peak, mean in congestion.channels():
+            print(f"  Channel {channel}: peak {peak:.2f}, mean {mean:.2f} tracks")
+
+    def write_bitstream(self, filename):
+        # Binary bitstream with the INIT bits, routing and placement (bitstream.py);
+        # returns its size in bytes
+        return bitstream.write(self, filename)
+
+    @classmethod
+    def from_bitstream(cls, filename):
+        with bitstream.load(filename) as stream:
+            return stream.to_fpga(cls)
+
+
+def run_backend(fpga):
+    # The end of both mains, once the outputs are assigned
+    timing_report = fpga.analyze_timing()
+    fpga.display_timing_report(timing_report)
+    if TIMING_REPORT_PATH:
+        timing_report.to_json(TIMING_REPORT_PATH)
+
+    fpga.place_luts(chains=PLACEMENT_CHAINS, workers=PLACEMENT_WORKERS)
+    fpga.display_placement_summary()
+
+    text_bitstream = fpga.generate_bitstream()
+    print("Generated Bitstream:")
+    print(text_bitstream)
+    if BITSTREAM_PATH:
+        # The binary format only routes system inputs the FPGA has, e.g. not
+        # the variables of an input file with more than num_system_inputs
+        try:
+            size = fpga.write_bitstream(BITSTREAM_PATH)
+        except ValueError as error:
+            print(f"Binary bitstream not written: {error}")
+        else:
+            print(f"Binary bitstream written to {BITSTREAM_PATH} ({size} bytes)")
@@ -1,264 +1,179 @@
-import json
-import re
-
-class LUT:
-    def __init__(self, id, num_inputs, function=None, max_variables=None):
-        self.id = id
-        self.num_inputs = num_inputs
-        self.function = function
-        self.input_connections = set()  # LUTs that provide input to this LUT
-        self.output_connections = set()  # LUTs that receive output from this LUT
-        self.variables = set()
-        self.max_variables = max_variables
-
-    def assign_function(self, function):
-        self.function = function
-        self.extract_variables(function)
-
-    def extract_variables(self, function):
-        # Filter variables based on the maximum number of input ports
-        if self.max_variables:
-            valid_variables = set(self.max_variables)
-            self.variables = set(filter(lambda x: x in valid_variables, function))
-        else:
-            self.variables = set(filter(str.isalpha, function))
-
-    def add_input_connection(self, lut_id):
-        self.input_connections.add(lut_id)
-
-    def add_output_connection(self, lut_id):
-        self.output_connections.add(lut_id)
-
-    def display(self):
-        input_connections_info = f"Input from: LUT(s) {', '.join(map(str, self.input_connections))}" if self.input_connections else ""
-        output_connections_info = f"Output to: LUT(s) {', '.join(map(str, self.output_connections))}" if self.output_connections else ""
-        connections_info = (input_connections_info + " | " + output_connections_info).strip(' | ')
-        return f"LUT {self.id} ({self.num_inputs}-input): Function: {self.function if self.function else 'Not assigned'} | {connections_info}"
-
-class FPGA:
-    def __init__(self, num_luts, lut_type, num_inputs, num_outputs):
-        self.luts = [LUT(id, lut_type) for id in range(num_luts)]
-        self.num_inputs = num_inputs
-        self.system_inputs = [None] * num_inputs
-        self.num_outputs = num_outputs
-        self.system_outputs = [None] * num_outputs
-        self.input_variable_map = {}
-        self.final_or_lut_ids = []  # Track LUTs with final OR operations
-        # Define variable names based on the number of inputs (e.g., 'A', 'B', 'C', ...)
-        variable_names = [chr(i) for i in range(65, 65 + num_inputs)]  # ASCII 65 is 'A'
-        self.luts = [LUT(id, lut_type, max_variables=variable_names) for id in range(num_luts)]
-
-    def split_and_assign_functions(self, sop_expressions):
-        lut_id = 0
-        formula_to_lut_output = {}  # Mapping from formula name to LUT output
-
-        for index, expression in enumerate(sop_expressions):
-            terms = expression.split('|')
-            lut_outputs = []
-
-            for term in terms:
-                # Replace formula names (e.g., F1, F2) with corresponding LUT outputs
-                for formula_name, lut_output in formula_to_lut_output.items():
-                    term = term.replace(formula_name, lut_output)
-
-                if lut_id >= len(self.luts):
-                    raise Exception("Not enough LUTs available.")
-                self.luts[lut_id].assign_function(term)
-                lut_outputs.append(f"Output of LUT {lut_id}")
-                lut_id += 1
-
-            # Combine LUT outputs for the current expression
-            if lut_outputs:
-                combined_output = ' | '.join(lut_outputs)
-                if lut_id >= len(self.luts):
-                    raise Exception("Not enough LUTs available.")
-                self.luts[lut_id].assign_function(combined_output)
-                formula_to_lut_output[f'F{index+1}'] = f"Output of LUT {lut_id}"
-                self.final_or_lut_ids.append(lut_id)  # Add LUT ID of final OR operation
-                lut_id += 1
-
-    def assign_term_to_lut(self, term, lut_id):
-        if lut_id < len(self.luts):
-            self.luts[lut_id].assign_function(term)
-            return f"Output of LUT {lut_id}"
-        return term
-
-    def split_and_combine_complex_term(self, variables, start_lut_id):
-        split_outputs = []
-        lut_used = 0
-        i = 0
-        while i < len(variables):
-            num_vars_for_lut = min(len(variables) - i, self.luts[start_lut_id].num_inputs)
-            sub_term = ' & '.join(variables[i:i + num_vars_for_lut])
-            if start_lut_id + lut_used < len(self.luts):
-                self.luts[start_lut_id + lut_used].assign_function(sub_term)
-                split_outputs.append(f"Output of LUT {start_lut_id + lut_used}")
-                lut_used += 1
-            else:
-                print("Not enough LUTs to implement the logic")
-                break
-            i += num_vars_for_lut
-        return split_outputs, lut_used
-
-    def extract_referenced_luts(self, function):
-        referenced_luts = []
-        if function:
-            parts = function.split('|')
-            for part in parts:
-                part = part.strip()
-                if "Output of LUT" in part:
-                    matches = re.findall(r'Output of LUT (\d+)', part)
-                    for match in matches:
-                        try:
-                            lut_id = int(match)
-                            referenced_luts.append(lut_id)
-                        except ValueError:
-                            print(f"Warning: Unable to extract LUT ID from '{match}'.")
-        return referenced_luts
-
-    def update_lut_connections(self):
-        # Reset existing connections
-        for lut in self.luts:
-            lut.input_connections.clear()
-            lut.output_connections.clear()
-
-        # Update connections based on current functions
-        for lut in self.luts:
-            if lut.function:
-                referenced_luts = self.extract_referenced_luts(lut.function)
-                for ref_lut_id in referenced_luts:
-                    lut.add_input_connection(ref_lut_id)
-                    if ref_lut_id < len(self.luts):
-                        self.luts[ref_lut_id].add_output_connection(lut.id)
-    
-    def assign_or_luts_to_outputs(self):
-        for i, lut_id in enumerate(self.final_or_lut_ids):
-            if i < self.num_outputs:
-                self.system_outputs[i] = self.luts[lut_id]
-            else:
-                print(f"Not enough output ports for LUT {lut_id}")
-
-    def display_all_lut_assignments(self):
-        self.update_lut_connections()
-        for lut in self.luts:
-            print(lut.display())
-        self.display_output_assignments()
-
-    def display_output_assignments(self):
-        print("Output Port Assignments:")
-        for i, lut in enumerate(self.system_outputs):
-            if lut is not None:
-                print(f"Output port {i} is connected to LUT {lut.id}")
-            else:
-                print(f"Output port {i} is unassigned")
-                
-    def calculate_resource_allocation(self):
-        # Calculate the percentage of LUTs used
-        luts_used = sum(1 for lut in self.luts if lut.function is not None)
-        percent_luts_used = (luts_used / len(self.luts)) * 100
-
-        # Calculate the percentage of connections used
-        total_possible_connections = len(self.luts) * (len(self.luts) - 1)
-        connections_used = sum(len(lut.input_connections) + len(lut.output_connections) for lut in self.luts)
-        percent_connections_used = (connections_used / total_possible_connections) * 100 if total_possible_connections else 0
-
-        # Estimate total memory required (example calculation)
-        memory_per_lut = 64  # Assuming each LUT requires 64 bytes (for example)
-        memory_per_connection = 8  # Assuming each connection requires 8 bytes (for example)
-        total_memory = (luts_used * memory_per_lut) + (connections_used * memory_per_connection)
-
-        return percent_luts_used, percent_connections_used, total_memory
-
-    def display_resource_allocation_summary(self):
-        percent_luts_used, percent_connections_used, total_memory = self.calculate_resource_allocation()
-        print(f"Resource Allocation Summary:")
-        print(f"  % of LUTs Used: {percent_luts_used:.2f}%")
-        print(f"  % of Connections Used: {percent_connections_used:.2f}%")
-        print(f"  Total Memory Required: {total_memory} bytes")
-
-    def map_variables_to_luts(self):
-        var_to_lut_map = {}
-        for lut in self.luts:
-            for var in lut.variables:
-                if var not in var_to_lut_map:
-                    var_to_lut_map[var] = []
-                var_to_lut_map[var].append(lut.id)
-        return var_to_lut_map
-
-    def display_input_assignments(self):
-        var_to_lut_map = self.map_variables_to_luts()
-        print("Input Port Assignments:")
-        for var, lut_ids in var_to_lut_map.items():
-            luts_str = ', '.join(map(str, lut_ids))
-            print(f"Variable '{var}' is assigned to LUT {luts_str}")
-    def generate_lut_configurations(self):
-        self.update_lut_connections()
-        lut_configs = []
-        for lut in self.luts:
-            input_conn = ','.join(map(str, lut.input_connections))
-            output_conn = ','.join(map(str, lut.output_connections))
-            lut_config = f"LUT{lut.id};{lut.num_inputs};{lut.function};Inputs:{input_conn};Outputs:{output_conn}"
-            lut_configs.append(lut_config)
-        return ';'.join(lut_configs)
-    def generate_io_assignments(self):
-        input_assignments = ';'.join([f"Input{idx}->LUTs:{','.join(map(str, self.map_variables_to_luts().get(var, [])))}" for idx, var in enumerate(self.input_variable_map.keys())])
-        output_assignments = ';'.join([f"Output{idx}->LUT{lut.id}" for idx, lut in enumerate(self.system_outputs) if lut is not None])
-        return f"{input_assignments};{output_assignments}"
-    def generate_bitstream(self):
-        lut_configurations = self.generate_lut_configurations()
-        io_assignments = self.generate_io_assignments()
-        return f"{lut_configurations};{io_assignments}"
-
-def read_connections_from_file(file_path):
-    with open(file_path, 'r') as file:
-        return json.load(file)
-    
-# New function to read formulas from file
-def read_formulas_from_file(filename):
-    with open(filename, 'r') as file:
-        return [line.split('=')[1].strip() for line in file.readlines()]
-
-# Function to parse and process inter-dependent SOP formulas
-def parse_and_process_sop_formulas(input_formulas):
-    sop_expressions = []
-    formula_map = {}
-
-    for line in input_formulas:
-        formula_name, formula_expr = line.split('=')
-        formula_map[formula_name.strip()] = formula_expr.strip()
-
-    for expr in formula_map.values():
-        processed_expr = expr
-        for name, formula in formula_map.items():
-            processed_expr = processed_expr.replace(name, f"({formula})")
-        sop_expressions.append(processed_expr)
-
-    return sop_expressions
-
-
-
-
-# Example usage
-if __name__ == "__main__":
-    num_luts = int(input("Enter the number of LUTs: "))
-    lut_type = int(input("Enter the number of inputs for LUTs (4 or 6): "))
-    num_system_inputs = int(input("Enter the number of system inputs: "))
-    num_system_outputs = int(input("Enter the number of system outputs: "))
-
-    fpga = FPGA(num_luts, lut_type, num_system_inputs, num_system_outputs)
-
-    # Process SOP expressions and assign to LUTs
-    input_formulas = read_formulas_from_file("input.eqn")
-    fpga.split_and_assign_functions(input_formulas)
-
-    # Assign final OR LUTs to output ports
-    fpga.assign_or_luts_to_outputs()
-
-    # Display LUT assignments, input assignments, and resource allocation
-    fpga.display_all_lut_assignments()
-    
-    fpga.display_input_assignments()
-    fpga.display_resource_allocation_summary()
-    bitstream = fpga.generate_bitstream()
-    print("Generated Bitstream:")
-    print(bitstream)
\ No newline at end of file
+import json
+
+from fpga_backend import FPGABackend, run_backend
+import sop_parser
+from lut_fabric import LUTFabric
+from lut_mapper import formula_order
+
+class FPGA(FPGABackend):
+    def __init__(self, num_luts, lut_type, num_inputs, num_outputs):
+        self.lut_type = lut_type
+        self.num_inputs = num_inputs
+        self.system_inputs = [None] * num_inputs
+        self.num_outputs = num_outputs
+        self.system_outputs = [None] * num_outputs
+        self.input_variable_map = {}
+        self.final_or_lut_ids = []  # Track LUTs with final OR operations
+        self.expression_outputs = []  # Signal carrying each mapped expression, e.g. "Output of LUT 4"
+        # Define variable names based on the number of inputs (e.g., 'A', 'B', 'C', ...)
+        variable_names = [chr(i) for i in range(65, 65 + num_inputs)]  # ASCII 65 is 'A'
+        self.luts = LUTFabric(num_luts, lut_type, max_variables=variable_names)
+
+    def split_and_assign_functions(self, sop_expressions, formula_names=None):
+        # See FPGABackend.assign_mapping. formula_names holds the name of every expression (F1, F2, ... by
+        # default); a name used in another expression stands for the output
+        # of that formula, which is built once whatever the order
+        if formula_names is None:
+            formula_names = [f'F{idx+1}' for idx in range(len(sop_expressions))]
+        formula_names = {name: idx for idx, name in enumerate(formula_names)}
+        return self.assign_mapping(sop_expressions, formula_names)
+
+    def assign_term_to_lut(self, term, lut_id):
+        if lut_id < len(self.luts):
+            self.luts[lut_id].assign_function(term)
+            return f"Output of LUT {lut_id}"
+        return term
+
+    def split_and_combine_complex_term(self, variables, start_lut_id):
+        split_outputs = []
+        lut_used = 0
+        i = 0
+        while i < len(variables):
+            num_vars_for_lut = min(len(variables) - i, self.luts[start_lut_id].num_inputs)
+            sub_term = ' & '.join(variables[i:i + num_vars_for_lut])
+            if start_lut_id + lut_used < len(self.luts):
+                self.luts[start_lut_id + lut_used].assign_function(sub_term)
+                split_outputs.append(f"Output of LUT {start_lut_id + lut_used}")
+                lut_used += 1
+            else:
+                print("Not enough LUTs to implement the logic")
+                break
+            i += num_vars_for_lut
+        return split_outputs, lut_used
+
+    def assign_or_luts_to_outputs(self):
+        for i, lut_id in enumerate(self.final_or_lut_ids):
+            if i < self.num_outputs:
+                self.system_outputs[i] = self.luts[lut_id]
+            else:
+                print(f"Not enough output ports for LUT {lut_id}")
+
+    def display_all_lut_assignments(self):
+        netlist = self.netlist
+        for lut in self.luts:
+            print(lut.display(netlist.describe_connections(lut.id)))
+        self.display_output_assignments()
+
+    def display_output_assignments(self):
+        print("Output Port Assignments:")
+        for i, lut in enumerate(self.system_outputs):
+            if lut is not None:
+                print(f"Output port {i} is connected to LUT {lut.id}")
+            else:
+                print(f"Output port {i} is unassigned")
+                
+    def map_variables_to_luts(self):
+        var_to_lut_map = {}
+        for lut in self.luts:
+            for var in lut.variables:
+                if var not in var_to_lut_map:
+                    var_to_lut_map[var] = []
+                var_to_lut_map[var].append(lut.id)
+        return var_to_lut_map
+
+    def display_input_assignments(self):
+        var_to_lut_map = self.map_variables_to_luts()
+        print("Input Port Assignments:")
+        for var, lut_ids in var_to_lut_map.items():
+            luts_str = ', '.join(map(str, lut_ids))
+            print(f"Variable '{var}' is assigned to LUT {luts_str}")
+    def generate_lut_configurations(self):
+        netlist = self.netlist
+        lut_configs = []
+        for lut in self.luts:
+            input_conn = ','.join(map(str, netlist.fanin_of(lut.id)))
+            output_conn = ','.join(map(str, netlist.fanout_of(lut.id)))
+            lut_config = f"LUT{lut.id};{lut.num_inputs};{lut.function};Inputs:{input_conn};Outputs:{output_conn}"
+            if self.placement is not None and lut.id in self.placement.positions:
+                lut_config += ";Site:{},{}".format(*self.placement.positions[lut.id])
+            lut_configs.append(lut_config)
+        return ';'.join(lut_configs)
+    def generate_io_assignments(self):
+        input_assignments = ';'.join([f"Input{idx}->LUTs:{','.join(map(str, self.map_variables_to_luts().get(var, [])))}" for idx, var in enumerate(self.input_variable_map.keys())])
+        output_assignments = ';'.join([f"Output{idx}->LUT{lut.id}" for idx, lut in enumerate(self.system_outputs) if lut is not None])
+        return f"{input_assignments};{output_assignments}"
+    def generate_bitstream(self):
+        lut_configurations = self.generate_lut_configurations()
+        io_assignments = self.generate_io_assignments()
+        if self.placement is not None:
+            io_assignments += f";Grid:{self.placement.width}x{self.placement.height}"
+        return f"{lut_configurations};{io_assignments}"
+
+def read_connections_from_file(file_path):
+    with open(file_path, 'r') as file:
+        return json.load(file)
+    
+# Reads "name = expression" lines
+def read_formula_definitions(filename):
+    with open(filename, 'r') as file:
+        return parse_formula_definitions(file.readlines())
+
+# New function to read formulas from file
+def read_formulas_from_file(filename):
+    return [expression for _, expression in read_formula_definitions(filename)]
+
+def parse_formula_definitions(input_formulas):
+    definitions = []
+    names = set()
+    for line in input_formulas:
+        if not line.strip():
+            continue
+        if '=' not in line:
+            raise ValueError(f"Expected 'name = expression', found {line.strip()!r}")
+        formula_name, formula_expr = line.split('=', 1)
+        formula_name = formula_name.strip()
+        if formula_name in names:
+            raise ValueError(f"Formula {formula_name} is defined twice")
+        names.add(formula_name)
+        definitions.append((formula_name, formula_expr.strip()))
+    return definitions
+
+# Function to parse and process inter-dependent SOP formulas. Returns the
+# names and expressions with every formula after the ones it refers to;
+# references stay names rather than being inlined, split_and_assign_functions
+# maps each formula once and feeds its LUT output to the formulas using it.
+# Raises lut_mapper.FormulaCycle for formulas defined in terms of each other
+def parse_and_process_sop_formulas(input_formulas):
+    definitions = parse_formula_definitions(input_formulas)
+    names = [name for name, _ in definitions]
+    nodes = [sop_parser.parse(expression) for _, expression in definitions]
+    order = formula_order(nodes, {name: idx for idx, name in enumerate(names)})
+    return [names[idx] for idx in order], [definitions[idx][1] for idx in order]
+
+
+
+# Example usage
+if __name__ == "__main__":
+    num_luts = int(input("Enter the number of LUTs: "))
+    lut_type = int(input("Enter the number of inputs for LUTs (4 or 6): "))
+    num_system_inputs = int(input("Enter the number of system inputs: "))
+    num_system_outputs = int(input("Enter the number of system outputs: "))
+
+    fpga = FPGA(num_luts, lut_type, num_system_inputs, num_system_outputs)
+
+    # Process SOP expressions and assign to LUTs
+    definitions = read_formula_definitions("input.eqn")
+    fpga.split_and_assign_functions(
+        [expression for _, expression in definitions], [name for name, _ in definitions]
+    )
+
+    # Assign final OR LUTs to output ports
+    fpga.assign_or_luts_to_outputs()
+
+    # Display LUT assignments, input assignments, and resource allocation
+    fpga.display_all_lut_assignments()
+    
+    fpga.display_input_assignments()
+    fpga.display_resource_allocation_summary()
+
+    run_backend(fpga)
\ No newline at end of file
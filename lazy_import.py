@@ -0,0 +1,25 @@
+import importlib
+
+# sympy and NumPy take most of a second to import, which the FPGA tools pay on
+# every launch even when all minimized expressions come from the cache.
+# Modules bind them with lazy_module instead and the import happens on the
+# first attribute access, i.e. the first time a path really needs them.
+
+
+class LazyModule:
+
+    def __init__(self, name) -> None:
+        self.__dict__['_name'] = name
+
+    def __getattr__(self, attribute):
+        module = importlib.import_module(self._name)
+        # Copy the namespace so later lookups are plain instance attributes
+        self.__dict__.update(module.__dict__)
+        return getattr(module, attribute)
+
+    def __repr__(self):
+        return f"<lazy module '{self._name}'>"
+
+
+def lazy_module(name):
+    return LazyModule(name)
@@ -0,0 +1,203 @@
+from array import array
+
+import lut_logic
+from netlist import Netlist
+
+# Columnar storage for the LUTs of an FPGA. A LUT is a row: its input count
+# and the id of its function in a table of distinct function texts, one
+# byte and four bytes. Variables and INIT bits are kept per distinct
+# function, and connections only for LUTs that have any, so an unused LUT
+# costs five bytes. fpga.luts[i] hands out a LUT view of row i. The columns
+# are stdlib arrays like the ones of netlist.Netlist, for the same reason.
+
+UNASSIGNED = -1
+_NO_CONNECTIONS = frozenset()
+
+
+class LUT:
+    # View of one row of a LUTFabric; holds nothing but the row number
+    __slots__ = ('fabric', 'id')
+
+    def __init__(self, fabric, id):
+        self.fabric = fabric
+        self.id = id
+
+    @property
+    def num_inputs(self):
+        return self.fabric.num_inputs[self.id]
+
+    @property
+    def function(self):
+        return self.fabric.function_of(self.id)
+
+    @function.setter
+    def function(self, function):
+        self.fabric.assign(self.id, function)
+
+    @property
+    def max_variables(self):
+        return self.fabric.max_variables
+
+    @property
+    def variables(self):
+        return self.fabric.variables_of(self.id)
+
+    @property
+    def init(self):
+        return self.fabric.init_of(self.id)
+
+    @property
+    def input_connections(self):
+        return self.fabric.fanin.get(self.id, _NO_CONNECTIONS)
+
+    @property
+    def output_connections(self):
+        return self.fabric.fanout.get(self.id, _NO_CONNECTIONS)
+
+    def assign_function(self, function):
+        self.fabric.assign(self.id, function)
+
+    def extract_variables(self, function):
+        # Variables follow from the function, see LUTFabric.variables_of
+        return self.fabric.variables_of(self.id)
+
+    def add_input_connection(self, lut_id):
+        self.fabric.add_connection(lut_id, self.id)
+
+    def add_output_connection(self, lut_id):
+        self.fabric.add_connection(self.id, lut_id)
+
+    def display(self, connections_info=None):
+        if connections_info is None:
+            input_connections_info = f"Input from: LUT(s) {', '.join(map(str, self.input_connections))}" if self.input_connections else ""
+            output_connections_info = f"Output to: LUT(s) {', '.join(map(str, self.output_connections))}" if self.output_connections else ""
+            connections_info = (input_connections_info + " | " + output_connections_info).strip(' | ')
+        return f"LUT {self.id} ({self.num_inputs}-input): Function: {self.function if self.function else 'Not assigned'} | {connections_info}"
+
+
+class LUTFabric:
+
+    def __init__(self, num_luts, lut_type, max_variables=None) -> None:
+        self.num_inputs = array('b', [lut_type]) * num_luts
+        self.function_ids = array('i', [UNASSIGNED]) * num_luts
+        self.max_variables = max_variables
+        self.functions = []  # function id -> text
+        self._function_index = {}  # text -> function id
+        self._variables = []  # function id -> variable set
+        self._init = []  # function id -> INIT bits, None until first asked for
+        self.fanin = {}  # LUT id -> ids of the LUTs driving it
+        self.fanout = {}  # LUT id -> ids of the LUTs it drives
+        self.num_connections = 0
+        self.dirty = True  # Functions or connections changed since the netlist snapshot
+        self._netlist = None
+
+    def __len__(self):
+        return len(self.function_ids)
+
+    def __getitem__(self, lut_id):
+        if lut_id < 0:
+            lut_id += len(self)
+        if not 0 <= lut_id < len(self):
+            raise IndexError("LUT index out of range")
+        return LUT(self, lut_id)
+
+    def __iter__(self):
+        for lut_id in range(len(self)):
+            yield LUT(self, lut_id)
+
+    def function_of(self, lut_id):
+        function_id = self.function_ids[lut_id]
+        return None if function_id == UNASSIGNED else self.functions[function_id]
+
+    def _intern(self, function):
+        function_id = self._function_index.get(function)
+        if function_id is None:
+            function_id = len(self.functions)
+            self._function_index[function] = function_id
+            self.functions.append(function)
+            if self.max_variables:
+                valid_variables = set(self.max_variables)
+                self._variables.append(set(filter(lambda x: x in valid_variables, function)))
+            else:
+                self._variables.append(set(filter(str.isalpha, function)))
+            self._init.append(None)
+        return function_id
+
+    def variables_of(self, lut_id):
+        function_id = self.function_ids[lut_id]
+        return set() if function_id == UNASSIGNED else self._variables[function_id]
+
+    def init_of(self, lut_id):
+        function_id = self.function_ids[lut_id]
+        if function_id == UNASSIGNED:
+            return None
+        if self._init[function_id] is None:
+            self._init[function_id] = lut_logic.function_table(self.functions[function_id])[1]
+        return self._init[function_id]
+
+    def assign(self, lut_id, function):
+        function_id = UNASSIGNED if function is None else self._intern(function)
+        if function_id != self.function_ids[lut_id]:
+            self.function_ids[lut_id] = function_id
+            self.dirty = True
+        self.connect(lut_id)
+
+    def add_connection(self, source, sink):
+        drivers = self.fanin.setdefault(sink, set())
+        if source not in drivers:
+            drivers.add(source)
+            self.fanout.setdefault(source, set()).add(sink)
+            self.num_connections += 1
+            self.dirty = True
+
+    def remove_connection(self, source, sink):
+        drivers = self.fanin.get(sink)
+        if drivers and source in drivers:
+            drivers.discard(source)
+            if not drivers:
+                del self.fanin[sink]
+            sinks = self.fanout[source]
+            sinks.discard(sink)
+            if not sinks:
+                del self.fanout[source]
+            self.num_connections -= 1
+            self.dirty = True
+
+    def connect(self, lut_id):
+        # Only the edges into lut_id that its function adds or drops are
+        # touched, so an edit costs O(fan-in) however large the fabric is
+        referenced = set()
+        for ref_lut_id in lut_logic.referenced_luts(self.function_of(lut_id)):
+            if ref_lut_id < len(self):
+                referenced.add(ref_lut_id)
+            else:
+                print(f"Warning: LUT {lut_id} references LUT {ref_lut_id}, which does not exist.")
+        current = self.fanin.get(lut_id, _NO_CONNECTIONS)
+        for ref_lut_id in current - referenced:
+            self.remove_connection(ref_lut_id, lut_id)
+        for ref_lut_id in referenced - current:
+            self.add_connection(ref_lut_id, lut_id)
+
+    def reconnect_all(self):
+        # Re-derive every connection from the functions
+        self.fanin.clear()
+        self.fanout.clear()
+        self.num_connections = 0
+        for lut_id, function_id in enumerate(self.function_ids):
+            if function_id != UNASSIGNED:
+                self.connect(lut_id)
+        self.dirty = True
+
+    @property
+    def netlist(self):
+        # CSR snapshot of the connections and functions, rebuilt only when
+        # they changed since the last one
+        if self.dirty:
+            self._netlist = Netlist.from_fanin(
+                len(self),
+                (sorted(self.fanin.get(lut_id, ())) for lut_id in range(len(self))),
+                {lut_id: self.functions[function_id]
+                 for lut_id, function_id in enumerate(self.function_ids) if function_id != UNASSIGNED},
+            )
+            self.dirty = False
+        return self._netlist
@@ -0,0 +1,51 @@
+import re
+
+import sop_parser
+
+# Reads the function text the FPGA classes store on each LUT, e.g.
+# "(A & ~B)" or "Output of LUT 3 | Output of LUT 7 | H", into a parse tree,
+# the ordered list of signals driving the LUT and its INIT truth table.
+#
+# A signal is either the name of a system input ('A') or the id of the LUT
+# whose output it is (an int). INIT bit r is the LUT output for the input
+# row r, where pin j carries bit j of r (pin 0 is the least significant).
+
+LUT_REFERENCE = re.compile(r'Output of LUT (\d+)')
+_LUT_NAME = re.compile(r'^_lut_(\d+)$')
+
+
+def _lut_name(lut_id):
+    return f"_lut_{lut_id}"
+
+
+def signal_of(name):
+    match = _LUT_NAME.match(name)
+    return int(match.group(1)) if match else name
+
+
+def parse_function(function):
+    # (parse tree, input signals) of a LUT function; system inputs come first
+    # by name, then driving LUTs by id
+    text = LUT_REFERENCE.sub(lambda m: _lut_name(m.group(1)), function)
+    node = sop_parser.parse(text)
+    signals = [signal_of(name) for name in sop_parser.variables_of(node)]
+    names = sorted(signal for signal in signals if isinstance(signal, str))
+    luts = sorted(signal for signal in signals if isinstance(signal, int))
+    return node, names + luts
+
+
+def referenced_luts(function):
+    return sorted({int(lut_id) for lut_id in LUT_REFERENCE.findall(function)}) if function else []
+
+
+def truth_table(node, inputs):
+    # INIT bits of the LUT as an int. sop_parser numbers rows with the first
+    # variable as the most significant bit, so the pins are handed over reversed
+    pins = [_lut_name(signal) if isinstance(signal, int) else signal for signal in reversed(inputs)]
+    return sop_parser.compile_int(node, pins)
+
+
+def function_table(function):
+    # (input signals, INIT bits) of a LUT function text
+    node, inputs = parse_function(function)
+    return inputs, truth_table(node, inputs)
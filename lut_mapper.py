@@ -0,0 +1,418 @@
+import heapq
+
+import espresso
+import sop_parser
+
+# Technology mapping of minimized expressions onto K-input LUTs. The
+# expressions become one AND-inverter graph (AIG); every AND node gets a
+# small set of K-feasible cuts (sets of at most K nodes that separate it from
+# the inputs), kept to the best few per node (priority cuts). A first pass
+# picks for each node the cut giving the lowest LUT depth, then two recovery
+# passes trade cuts for fewer LUTs without making any output deeper: one by
+# area flow, one by exact local area. The chosen cuts of the nodes that end
+# up used are the LUTs.
+#
+# Literals are 2 * node + complement. Node 0 is the constant, so literal 0 is
+# False and literal 1 is True. The AIG is structurally hashed: an AND of two
+# literals already built, in either order, is the existing node, so logic
+# that several expressions share maps to LUTs with fan-out.
+
+CUTS_PER_NODE = 8
+_NO_REQUIREMENT = float('inf')
+
+
+class FormulaCycle(ValueError):
+    pass
+
+
+class AIG:
+
+    def __init__(self, structural_hashing=True) -> None:
+        self.fanins = [None]  # node -> (literal, literal) for AND nodes, None otherwise
+        self.inputs = {}  # input name -> node
+        self.input_names = {}  # node -> input name
+        self.strash = {} if structural_hashing else None  # (literal, literal) -> literal
+        self.strash_hits = 0
+
+    def is_and(self, node):
+        return self.fanins[node] is not None
+
+    def input(self, name):
+        if name not in self.inputs:
+            node = len(self.fanins)
+            self.fanins.append(None)
+            self.inputs[name] = node
+            self.input_names[node] = name
+        return 2 * self.inputs[name]
+
+    def conjoin(self, a, b):
+        if a == 0 or b == 0 or a == b ^ 1:
+            return 0
+        if a == 1 or a == b:
+            return b
+        if b == 1:
+            return a
+        key = (a, b) if a < b else (b, a)
+        if self.strash is not None and key in self.strash:
+            self.strash_hits += 1
+            return self.strash[key]
+        self.fanins.append(key)
+        literal = 2 * (len(self.fanins) - 1)
+        if self.strash is not None:
+            self.strash[key] = literal
+        return literal
+
+    def disjoin(self, a, b):
+        return self.conjoin(a ^ 1, b ^ 1) ^ 1
+
+    def add_expression(self, node, signals, memo):
+        # Literal of a parse tree from sop_parser. signals maps names that
+        # stand for an already built literal (formula references); every other
+        # name is an input. memo, when given, holds the literal of every
+        # subtree built so far, so a term written the same way twice is not
+        # even walked again
+        if memo is not None and node in memo:
+            return memo[node]
+        kind = node[0]
+        if kind == 'var':
+            literal = signals[node[1]] if node[1] in signals else self.input(node[1])
+        elif kind == 'const':
+            literal = 1 if node[1] else 0
+        elif kind == 'not':
+            literal = self.add_expression(node[1], signals, memo) ^ 1
+        else:
+            # n-ary AND/OR as a balanced tree keeps the AIG shallow; with the
+            # operands sorted the tree does not depend on how they were
+            # written, so hashing finds it again
+            literals = [self.add_expression(child, signals, memo) for child in node[1]]
+            if self.strash is not None:
+                literals.sort()
+            combine = self.conjoin if kind == 'and' else self.disjoin
+            while len(literals) > 1:
+                literals = [
+                    combine(literals[k], literals[k + 1]) if k + 1 < len(literals) else literals[k]
+                    for k in range(0, len(literals), 2)
+                ]
+            literal = literals[0]
+        if memo is not None:
+            memo[node] = literal
+        return literal
+
+    def fanout_counts(self, outputs):
+        counts = [0] * len(self.fanins)
+        for fanins in self.fanins:
+            if fanins is not None:
+                counts[fanins[0] >> 1] += 1
+                counts[fanins[1] >> 1] += 1
+        for literal in outputs:
+            counts[literal >> 1] += 1
+        return counts
+
+
+class LUTMapping:
+
+    def __init__(self, functions, outputs, depth, shared_nodes=0) -> None:
+        self.functions = functions  # function text of LUT start, start + 1, ...
+        self.outputs = outputs  # LUT id computing each expression
+        self.depth = depth  # LUTs on the longest input-to-output path
+        self.shared_nodes = shared_nodes  # AND nodes found again by structural hashing
+
+
+class _Mapper:
+
+    def __init__(self, aig, outputs, lut_size, cuts_per_node) -> None:
+        self.aig = aig
+        self.outputs = outputs
+        self.lut_size = lut_size
+        self.cuts_per_node = cuts_per_node
+        size = len(aig.fanins)
+        self.fanouts = aig.fanout_counts(outputs)
+        self.cuts = [()] * size  # priority cuts of every AND node
+        self.cut_of = [None] * size  # chosen cut
+        self.arrival = [0] * size
+        self.flow = [0.0] * size
+        self.refs = [0] * size
+        self.required = [_NO_REQUIREMENT] * size
+
+    def _cut_set(self, node):
+        trivial = frozenset((node,))
+        return [trivial] if not self.aig.is_and(node) else [trivial] + list(self.cuts[node])
+
+    def _enumerate(self, node):
+        a, b = (literal >> 1 for literal in self.aig.fanins[node])
+        found = set()
+        for cut_a in self._cut_set(a):
+            for cut_b in self._cut_set(b):
+                cut = cut_a | cut_b
+                if len(cut) <= self.lut_size:
+                    found.add(cut)
+        # A cut containing another one is never better
+        kept = []
+        for cut in sorted(found, key=len):
+            if not any(other < cut for other in kept):
+                kept.append(cut)
+        return kept
+
+    def _cut_arrival(self, cut):
+        return 1 + max(self.arrival[leaf] for leaf in cut)
+
+    def _cut_flow(self, cut):
+        return 1 + sum(self.flow[leaf] for leaf in cut)
+
+    def _choose(self, node, cut, estimated_refs):
+        self.cut_of[node] = cut
+        self.arrival[node] = self._cut_arrival(cut)
+        self.flow[node] = self._cut_flow(cut) / max(1, estimated_refs)
+
+    def _reference(self, node):
+        # Marks the cut of node used; returns how many LUTs that adds
+        area = 0
+        stack = [node]
+        while stack:
+            current = stack.pop()
+            area += 1
+            for leaf in self.cut_of[current]:
+                if self.aig.is_and(leaf):
+                    self.refs[leaf] += 1
+                    if self.refs[leaf] == 1:
+                        stack.append(leaf)
+        return area
+
+    def _dereference(self, node):
+        area = 0
+        stack = [node]
+        while stack:
+            current = stack.pop()
+            area += 1
+            for leaf in self.cut_of[current]:
+                if self.aig.is_and(leaf):
+                    self.refs[leaf] -= 1
+                    if self.refs[leaf] == 0:
+                        stack.append(leaf)
+        return area
+
+    def _cover(self):
+        # Reference counts and required times of the current choice of cuts
+        self.refs = [0] * len(self.aig.fanins)
+        roots = [literal >> 1 for literal in self.outputs if self.aig.is_and(literal >> 1)]
+        for root in roots:
+            self.refs[root] += 1
+            if self.refs[root] == 1:
+                self._reference(root)
+        depth = max((self.arrival[root] for root in roots), default=0)
+        self.required = [_NO_REQUIREMENT] * len(self.aig.fanins)
+        for root in roots:
+            self.required[root] = depth
+        for node in range(len(self.aig.fanins) - 1, 0, -1):
+            if self.refs[node] and self.aig.is_and(node):
+                for leaf in self.cut_of[node]:
+                    self.required[leaf] = min(self.required[leaf], self.required[node] - 1)
+        return depth
+
+    def map(self):
+        and_nodes = [node for node in range(len(self.aig.fanins)) if self.aig.is_and(node)]
+        # Depth: cuts ranked by arrival, then area flow, then size
+        for node in and_nodes:
+            found = self._enumerate(node)
+            ranked = sorted(found, key=lambda cut: (self._cut_arrival(cut), self._cut_flow(cut), len(cut)))
+            self.cuts[node] = tuple(ranked[:self.cuts_per_node])
+            self._choose(node, self.cuts[node][0], self.fanouts[node])
+        self._cover()
+
+        # Area flow, under the required times of the depth-optimal cover
+        for node in and_nodes:
+            refs = self.refs[node] or self.fanouts[node]
+            feasible = [cut for cut in self.cuts[node] if self._cut_arrival(cut) <= self.required[node]]
+            if feasible:
+                cut = min(feasible, key=lambda cut: (self._cut_flow(cut), self._cut_arrival(cut), len(cut)))
+                self._choose(node, cut, refs)
+        self._cover()
+
+        # Exact area: the LUTs a cut really adds given everything else in use
+        for node in and_nodes:
+            if not self.refs[node]:
+                self.arrival[node] = self._cut_arrival(self.cut_of[node])
+                continue
+            self._dereference(node)
+            best = None
+            for cut in self.cuts[node]:
+                arrival = self._cut_arrival(cut)
+                if arrival > self.required[node]:
+                    continue
+                self.cut_of[node] = cut
+                area = self._reference(node)
+                self._dereference(node)
+                if best is None or (area, arrival, len(cut)) < best[0]:
+                    best = ((area, arrival, len(cut)), cut)
+            if best is not None:
+                self.cut_of[node] = best[1]
+            self.arrival[node] = self._cut_arrival(self.cut_of[node])
+            self._reference(node)
+        return self._cover()
+
+
+def _cut_table(aig, root, pins, inverted):
+    # Truth table of root over the pin nodes, variables[0] the most
+    # significant bit as everywhere in sop_parser. A pin in inverted is a LUT
+    # putting out the complement of its node
+    num_pins = len(pins)
+    everything = (1 << (1 << num_pins)) - 1
+    values = {}
+    for k, pin in enumerate(pins):
+        pattern = sop_parser._variable_pattern(num_pins - 1 - k, num_pins)
+        values[pin] = pattern ^ everything if pin in inverted else pattern
+    stack = [root]
+    while stack:
+        node = stack[-1]
+        if node in values:
+            stack.pop()
+            continue
+        pending = [literal >> 1 for literal in aig.fanins[node] if literal >> 1 not in values]
+        if pending:
+            stack.extend(pending)
+            continue
+        stack.pop()
+        a, b = ((values[literal >> 1] ^ everything) if literal & 1 else values[literal >> 1]
+                for literal in aig.fanins[node])
+        values[node] = a & b
+    return values[root]
+
+
+def _table_cover(table, num_pins, memo):
+    key = (table, num_pins)
+    if key not in memo:
+        full = (1 << num_pins) - 1
+        cover = [(row, full) for row in range(1 << num_pins) if (table >> row) & 1]
+        memo[key] = espresso.espresso(cover, num_pins)
+    return memo[key]
+
+
+def formula_order(nodes, formula_names):
+    # Indices of the parse trees in an order where every formula comes after
+    # the ones it refers to (Kahn's algorithm). Among the formulas that are
+    # ready the first one in the file goes first, so a file already in
+    # order is kept as it is. formula_names maps a name to the index it
+    # stands for
+    users = [[] for _ in nodes]
+    pending = []
+    for index, node in enumerate(nodes):
+        dependencies = {formula_names[name] for name in sop_parser.variables_of(node) if name in formula_names}
+        pending.append(len(dependencies))
+        for dependency in dependencies:
+            users[dependency].append(index)
+    ready = [index for index, count in enumerate(pending) if count == 0]
+    heapq.heapify(ready)
+    order = []
+    while ready:
+        index = heapq.heappop(ready)
+        order.append(index)
+        for user in users[index]:
+            pending[user] -= 1
+            if pending[user] == 0:
+                heapq.heappush(ready, user)
+    if len(order) != len(nodes):
+        raise FormulaCycle(f"Formulas refer to each other in a cycle: {_find_cycle(nodes, formula_names, pending)}")
+    return order
+
+
+def _find_cycle(nodes, formula_names, pending):
+    # Formulas left over by formula_order all wait on another left over one;
+    # following those references from any of them runs into a cycle
+    name_of = {index: name for name, index in formula_names.items()}
+    index = next(index for index, count in enumerate(pending) if count)
+    seen = []
+    while index not in seen:
+        seen.append(index)
+        index = next(
+            formula_names[name] for name in sorted(sop_parser.variables_of(nodes[index]))
+            if name in formula_names and pending[formula_names[name]]
+        )
+    cycle = seen[seen.index(index):] + [index]
+    return " -> ".join(name_of[position] for position in cycle)
+
+
+def build_aig(expressions, formula_names=None, structural_hashing=True):
+    # formula_names maps a name such as 'F1' to the index of the expression
+    # it stands for. Every formula is built once, after the ones it refers
+    # to, and a reference is the literal of the formula it names. Without
+    # structural hashing every term gets nodes of its own
+    aig = AIG(structural_hashing)
+    nodes = [sop_parser.parse(expression) for expression in expressions]
+    index_of = formula_names or {}
+    outputs = [None] * len(nodes)
+    signals = {}
+    memo = {} if structural_hashing else None
+    name_of = {index: name for name, index in index_of.items()}
+    for index in formula_order(nodes, index_of):
+        outputs[index] = aig.add_expression(nodes[index], signals, memo)
+        if index in name_of:
+            signals[name_of[index]] = outputs[index]
+    return aig, outputs
+
+
+def map_expressions(expressions, lut_size, formula_names=None, start=0, cuts_per_node=CUTS_PER_NODE,
+                    structural_hashing=True):
+    # Maps the expressions onto LUTs of at most lut_size inputs, numbered from
+    # start. Returns a LUTMapping
+    if lut_size < 2:
+        raise ValueError("LUTs need at least 2 inputs")
+    aig, outputs = build_aig(expressions, formula_names, structural_hashing)
+    mapper = _Mapper(aig, outputs, lut_size, cuts_per_node)
+    mapper.map()
+
+    # An output that is the complement of a LUT gets that LUT inverted instead
+    # of an extra one, unless another output needs the true form. LUTs
+    # reading it take the complement into their own tables
+    mapped = [node for node in range(len(aig.fanins)) if aig.is_and(node) and mapper.refs[node]]
+    true_outputs = {literal >> 1 for literal in outputs if not literal & 1}
+    inverted = {literal >> 1 for literal in outputs
+                if literal & 1 and aig.is_and(literal >> 1) and literal >> 1 not in true_outputs}
+    drives_output = {literal >> 1 for literal in outputs}
+
+    lut_of = {node: start + k for k, node in enumerate(mapped)}
+    functions = []
+    memo = {}
+    for node in mapped:
+        cut = mapper.cut_of[node]
+        pins = sorted((leaf for leaf in cut if not aig.is_and(leaf)), key=lambda leaf: aig.input_names[leaf])
+        pins += sorted((leaf for leaf in cut if aig.is_and(leaf)), key=lambda leaf: lut_of[leaf])
+        names = [aig.input_names[pin] if pin in aig.input_names else f"Output of LUT {lut_of[pin]}" for pin in pins]
+        table = _cut_table(aig, node, pins, inverted)
+        complement = table ^ ((1 << (1 << len(pins))) - 1)
+        if node in inverted:
+            cover = _table_cover(complement, len(pins), memo)
+        else:
+            cover = _table_cover(table, len(pins), memo)
+            if node not in drives_output:
+                # Only LUTs read other LUTs, which absorb an inversion in
+                # their own tables, so the cheaper polarity can be chosen
+                inverse = _table_cover(complement, len(pins), memo)
+                if espresso.cost(inverse)[::-1] < espresso.cost(cover)[::-1]:
+                    cover = inverse
+                    inverted.add(node)
+        functions.append(espresso.cover_to_SOP(cover, names))
+
+    # Outputs that are a constant, an input or an inverted shared LUT get a
+    # LUT of their own
+    extra = {}
+    output_luts = []
+    depth = 0
+    for literal in outputs:
+        node = literal >> 1
+        if aig.is_and(node) and (node in inverted or not literal & 1):
+            output_luts.append(lut_of[node])
+            depth = max(depth, mapper.arrival[node])
+            continue
+        depth = max(depth, mapper.arrival[node] + 1)
+        if literal not in extra:
+            if node == 0:
+                function = "True" if literal & 1 else "False"
+            elif node in aig.input_names:
+                function = f"~{aig.input_names[node]}" if literal & 1 else aig.input_names[node]
+            else:
+                function = f"~Output of LUT {lut_of[node]}"
+            extra[literal] = start + len(functions)
+            functions.append(function)
+        output_luts.append(extra[literal])
+    return LUTMapping(functions, output_luts, depth, aig.strash_hits)
+
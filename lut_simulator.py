@@ -0,0 +1,196 @@
+from lazy_import import lazy_module
+
+import lut_logic
+
+np = lazy_module('numpy')
+
+# Compiled simulator for the LUT networks the FPGA classes map. The LUT graph
+# is levelized once, then every LUT's INIT table is evaluated bit-sliced: each
+# signal is an array of uint64 words holding 64 input vectors per word, and a
+# LUT is a tree of 2-to-1 multiplexers over its pins.
+
+# LUTs with more pins than this are evaluated from their parse tree instead,
+# the multiplexer tree grows as 2^pins
+MAX_TABLE_INPUTS = 8
+_ONES = 0xFFFFFFFFFFFFFFFF
+
+
+class CombinationalLoop(ValueError):
+    pass
+
+
+def _mux_tree(init, pins):
+    # Output words of a LUT given the words on its pins. Cofactors that are
+    # constant stay Python bools so they cost no array operation
+    def build(bits, k):
+        full = (1 << (1 << k)) - 1
+        if bits == 0:
+            return False
+        if bits == full:
+            return True
+        half = 1 << (k - 1)
+        low = build(bits & ((1 << half) - 1), k - 1)
+        high = build(bits >> half, k - 1)
+        x = pins[k - 1]
+        if low is False:
+            return x if high is True else x & high
+        if low is True:
+            return ~x if high is False else ~x | high
+        if high is False:
+            return ~x & low
+        if high is True:
+            return x | low
+        return (x & high) | (~x & low)
+
+    return build(init, len(pins))
+
+
+def _evaluate_tree(node, values):
+    kind = node[0]
+    if kind == 'var':
+        return values[lut_logic.signal_of(node[1])]
+    if kind == 'const':
+        return node[1]
+    if kind == 'not':
+        child = _evaluate_tree(node[1], values)
+        return (not child) if isinstance(child, bool) else ~child
+    result = _evaluate_tree(node[1][0], values)
+    for child in node[1][1:]:
+        value = _evaluate_tree(child, values)
+        if isinstance(result, bool) or isinstance(value, bool):
+            constant, other = (result, value) if isinstance(result, bool) else (value, result)
+            if kind == 'and':
+                result = other if constant else False
+            else:
+                result = True if constant else other
+        else:
+            result = result & value if kind == 'and' else result | value
+    return result
+
+
+def _as_words(value, length):
+    if isinstance(value, bool):
+        return np.full(length, _ONES if value else 0, dtype=np.uint64)
+    return value
+
+
+class CompiledNetwork:
+
+    def __init__(self, fpga, outputs=None, input_names=None) -> None:
+        # outputs lists what to report: a LUT id, or a function text over
+        # system inputs and LUT outputs such as "Output of LUT 4" or "~H".
+        # By default the assigned output ports, else every expression output
+        # the mapper recorded
+        self.input_names = (
+            list(input_names) if input_names is not None
+            else [chr(65 + i) for i in range(fpga.num_inputs)]
+        )
+        if outputs is None:
+            outputs = [lut.id for lut in fpga.system_outputs if lut is not None]
+            if not outputs:
+                outputs = list(getattr(fpga, 'expression_outputs', []))
+        self.luts = {}  # LUT id -> (input signals, INIT bits or None, parse tree)
+        for lut in fpga.luts:
+            if lut.function:
+                node, inputs = lut_logic.parse_function(lut.function)
+                init = lut_logic.truth_table(node, inputs) if len(inputs) <= MAX_TABLE_INPUTS else None
+                self.luts[lut.id] = (inputs, init, node)
+        self._finish(outputs)
+
+    @classmethod
+    def from_tables(cls, tables, input_names, outputs):
+        # Network straight from INIT tables, e.g. those of a loaded bitstream,
+        # with no function text: tables maps a LUT id to (input signals, INIT
+        # bits), outputs is as for the constructor
+        network = cls.__new__(cls)
+        network.input_names = list(input_names)
+        network.luts = {lut_id: (inputs, init, None) for lut_id, (inputs, init) in tables.items()}
+        network._finish(outputs)
+        return network
+
+    def _finish(self, outputs):
+        self.outputs = []
+        for output in outputs:
+            if isinstance(output, int):
+                self.outputs.append(lut_logic.parse_function(f"Output of LUT {output}"))
+            else:
+                self.outputs.append(lut_logic.parse_function(output))
+        known = set(self.input_names) | set(self.luts)
+        for inputs in [entry[0] for entry in self.luts.values()] + [output[1] for output in self.outputs]:
+            for signal in inputs:
+                if signal not in known:
+                    raise ValueError(f"Unknown signal {signal!r} in the LUT network")
+        self.order = self._levelize()
+
+    def _levelize(self):
+        # Topological order of the LUTs (Kahn's algorithm); what is left over
+        # sits on a combinational loop
+        fanout = {lut_id: [] for lut_id in self.luts}
+        pending = {}
+        for lut_id, (inputs, _, _) in self.luts.items():
+            drivers = [signal for signal in inputs if isinstance(signal, int)]
+            pending[lut_id] = len(drivers)
+            for driver in drivers:
+                fanout[driver].append(lut_id)
+        ready = sorted(lut_id for lut_id, count in pending.items() if count == 0)
+        order = []
+        while ready:
+            lut_id = ready.pop()
+            order.append(lut_id)
+            for sink in fanout[lut_id]:
+                pending[sink] -= 1
+                if pending[sink] == 0:
+                    ready.append(sink)
+        if len(order) != len(self.luts):
+            loop = sorted(lut_id for lut_id, count in pending.items() if count)
+            raise CombinationalLoop(f"LUTs {loop} form a combinational loop")
+        return order
+
+    def simulate_words(self, input_words):
+        # input_words maps every system input to its uint64 words; returns one
+        # word array per output
+        values = dict(input_words)
+        length = len(next(iter(input_words.values()))) if input_words else 1
+        for lut_id in self.order:
+            inputs, init, node = self.luts[lut_id]
+            if init is None:
+                value = _evaluate_tree(node, values)
+            else:
+                value = _mux_tree(init, [values[signal] for signal in inputs])
+            values[lut_id] = _as_words(value, length)
+        return [_as_words(_evaluate_tree(node, values), length) for node, _ in self.outputs]
+
+    def simulate(self, vectors):
+        # vectors: (count, num_inputs) array of 0/1, one column per input in
+        # input_names order. Returns a (count, num_outputs) bool array
+        vectors = np.asarray(vectors, dtype=bool)
+        count = vectors.shape[0]
+        padded = -(-count // 64) * 64
+        bits = np.zeros((len(self.input_names), padded), dtype=bool)
+        bits[:, :count] = vectors.T
+        words = np.packbits(bits, axis=1, bitorder='little').view('<u8')
+        results = self.simulate_words({name: words[k] for k, name in enumerate(self.input_names)})
+        if not results:
+            return np.zeros((count, 0), dtype=bool)
+        packed = np.stack(results).astype('<u8').view(np.uint8)
+        return np.unpackbits(packed, axis=1, bitorder='little')[:, :count].T.astype(bool)
+
+    def exhaustive(self):
+        # Every input combination, numbered like boolean_EQN's truth tables
+        # (input_names[0] is the most significant bit). Returns a
+        # (num_outputs, words) uint64 array, bit r of the packed row r
+        from truth_table import variable_slice
+        num_vars = len(self.input_names)
+        input_words = {
+            name: variable_slice(num_vars - 1 - k, num_vars) for k, name in enumerate(self.input_names)
+        }
+        results = self.simulate_words(input_words)
+        if num_vars < 6:
+            # Only the low 2^n bits of the single word are real rows
+            mask = np.uint64((1 << (1 << num_vars)) - 1)
+            results = [words & mask for words in results]
+        return np.stack(results) if results else np.zeros((0, 1), dtype=np.uint64)
+
+
+def compile_network(fpga, outputs=None, input_names=None):
+    return CompiledNetwork(fpga, outputs, input_names)
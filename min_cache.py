@@ -0,0 +1,168 @@
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import time
+
+# Persistent store for minimization results. Entries are keyed by a hash of
+# the function itself (its packed truth table, or a canonical cube cover for
+# functions too wide to tabulate), so reformatting a line or renaming its
+# variables still hits. Results are stored with variables replaced by their
+# position and renamed back on the way out.
+
+DEFAULT_CACHE_PATH = "minimization_cache.sqlite"
+DEFAULT_MAX_ENTRIES = 10000
+# Seconds a process waits for another one holding the write lock
+LOCK_TIMEOUT = 30.0
+# A lookup only reads; the hit/miss counters and last_used times it changes
+# are written once this many lookups have piled up, and by put, stats and close
+FLUSH_EVERY = 256
+
+_PLACEHOLDER = re.compile(r'\$(\d+)')
+_IDENTIFIER = re.compile(r'[A-Za-z_][A-Za-z0-9_]*')
+
+
+def table_key(bits, num_vars):
+    # bits is the truth table as an int, bit r set for ON-set row r
+    data = bits.to_bytes(max(8, (1 << num_vars) // 8), 'little')
+    return hashlib.sha256(f"table:{num_vars}:".encode() + data).hexdigest()
+
+
+def cover_key(cover, num_vars):
+    # Same function written with its cubes in another order, repeated or
+    # contained in one another gives the same key
+    from espresso import _drop_contained
+    canonical = sorted(_drop_contained(cover))
+    return hashlib.sha256(f"cover:{num_vars}:{canonical}".encode()).hexdigest()
+
+
+def to_positional(text, variables):
+    position = {var: k for k, var in enumerate(variables)}
+    return _IDENTIFIER.sub(lambda m: f"${position[m.group()]}" if m.group() in position else m.group(), text)
+
+
+def from_positional(text, variables):
+    return _PLACEHOLDER.sub(lambda m: variables[int(m.group(1))], text)
+
+
+class MinimizationCache:
+
+    def __init__(self, path=DEFAULT_CACHE_PATH, max_entries=DEFAULT_MAX_ENTRIES) -> None:
+        self.path = path
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._pending_counts = {'hits': 0, 'misses': 0}
+        self._touched = {}  # (kind, key) -> time of the latest hit not written yet
+        # Autocommit mode; every write below takes the database lock itself, so
+        # several processes can share one file
+        self.connection = sqlite3.connect(path, timeout=LOCK_TIMEOUT, isolation_level=None)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        # WAL stays consistent without an fsync per commit; a power cut can
+        # only lose the newest entries, which are recomputed
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS entries ("
+            "kind TEXT, key TEXT, value TEXT, last_used REAL, PRIMARY KEY (kind, key))"
+        )
+        self.connection.execute("CREATE INDEX IF NOT EXISTS entries_last_used ON entries (last_used)")
+        self.connection.execute("CREATE TABLE IF NOT EXISTS counters (name TEXT PRIMARY KEY, value INTEGER)")
+
+    def get(self, kind, key):
+        row = self.connection.execute(
+            "SELECT value FROM entries WHERE kind = ? AND key = ?", (kind, key)
+        ).fetchone()
+        if row is None:
+            self.misses += 1
+            self._pending_counts['misses'] += 1
+        else:
+            self.hits += 1
+            self._pending_counts['hits'] += 1
+            self._touched[(kind, key)] = time.time()
+        if sum(self._pending_counts.values()) >= FLUSH_EVERY:
+            self.flush()
+        return None if row is None else json.loads(row[0])
+
+    def flush(self):
+        # Writes the counters and last_used times of the lookups since the last flush
+        if any(self._pending_counts.values()):
+            with self._transaction():
+                self._write_pending()
+
+    def put(self, kind, key, value):
+        with self._transaction():
+            self._write_pending()
+            self.connection.execute(
+                "INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?)",
+                (kind, key, json.dumps(value), time.time()),
+            )
+            # Least recently used entries go first once the cap is passed
+            self.connection.execute(
+                "DELETE FROM entries WHERE rowid IN ("
+                "SELECT rowid FROM entries ORDER BY last_used DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,),
+            )
+
+    def stats(self):
+        # Counters of this process next to the totals of every process
+        self.flush()
+        totals = dict(self.connection.execute("SELECT name, value FROM counters"))
+        entries = self.connection.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'total_hits': totals.get('hits', 0),
+            'total_misses': totals.get('misses', 0),
+            'entries': entries,
+        }
+
+    def clear(self):
+        self._pending_counts = dict.fromkeys(self._pending_counts, 0)
+        self._touched = {}
+        with self._transaction():
+            self.connection.execute("DELETE FROM entries")
+            self.connection.execute("DELETE FROM counters")
+
+    def close(self):
+        self.flush()
+        self.connection.close()
+
+    def _write_pending(self):
+        # Inside a transaction
+        self.connection.executemany(
+            "INSERT INTO counters VALUES (?, ?) ON CONFLICT(name) DO UPDATE SET value = value + excluded.value",
+            [(name, count) for name, count in self._pending_counts.items() if count],
+        )
+        self.connection.executemany(
+            "UPDATE entries SET last_used = ? WHERE kind = ? AND key = ?",
+            [(used, kind, key) for (kind, key), used in self._touched.items()],
+        )
+        self._pending_counts = dict.fromkeys(self._pending_counts, 0)
+        self._touched = {}
+
+    def _transaction(self):
+        return _Transaction(self.connection)
+
+
+class _Transaction:
+    # BEGIN IMMEDIATE takes the write lock up front, so two processes never
+    # both read-then-write the same rows
+
+    def __init__(self, connection) -> None:
+        self.connection = connection
+
+    def __enter__(self):
+        self.connection.execute("BEGIN IMMEDIATE")
+        return self.connection
+
+    def __exit__(self, exc_type, exc, traceback):
+        self.connection.execute("ROLLBACK" if exc_type else "COMMIT")
+        return False
+
+
+def open_cache(path=DEFAULT_CACHE_PATH, max_entries=DEFAULT_MAX_ENTRIES):
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    return MinimizationCache(path, max_entries)
@@ -0,0 +1,118 @@
+from array import array
+
+import lut_logic
+
+# Integer-indexed LUT netlist. LUT-to-LUT edges are kept as CSR arrays: the
+# fan-in of LUT i is fanin[fanin_ptr[i]:fanin_ptr[i + 1]] and its fan-out
+# the same slice of fanout, so degree queries are O(1) and the whole graph
+# costs two int32 entries per edge. INIT bits of LUTs with up to 6 pins sit
+# in a uint64 column; wider functions (the mapper does not split them yet)
+# keep theirs as Python ints in wide_init (pin j is bit j of the row, as in
+# lut_logic). The columns are stdlib arrays so the mapping path does not pay
+# for importing NumPy; np.frombuffer views them without a copy.
+
+MAX_COLUMN_PINS = 6
+
+
+class Netlist:
+
+    def __init__(self, num_luts, fanin_ptr, fanin, functions=None) -> None:
+        # fanin_ptr/fanin: the fan-in CSR, each LUT's drivers sorted and unique
+        self.num_luts = num_luts
+        self.fanin_ptr = fanin_ptr
+        self.fanin = fanin
+        self.fanout_ptr, self.fanout = _transpose(fanin_ptr, fanin, num_luts)
+        # LUT id -> function text; INIT columns are filled on first use, the
+        # mapping path itself only needs the edges
+        self.functions = {} if functions is None else functions
+        self._init = None
+        self._wide_init = None
+        self._num_pins = None
+
+    @classmethod
+    def from_fanin(cls, num_luts, fanin_lists, functions=None):
+        # fanin_lists: the sorted, unique drivers of every LUT in id order
+        fanin_ptr = array('q', [0])
+        fanin = array('i')
+        for drivers in fanin_lists:
+            fanin.extend(drivers)
+            fanin_ptr.append(len(fanin))
+        return cls(num_luts, fanin_ptr, fanin, functions)
+
+    def _compute_init(self):
+        self._init = array('Q', bytes(8 * self.num_luts))
+        self._num_pins = array('h', bytes(2 * self.num_luts))
+        self._wide_init = {}
+        for lut_id, function in self.functions.items():
+            inputs, bits = lut_logic.function_table(function)
+            self._num_pins[lut_id] = len(inputs)
+            if len(inputs) <= MAX_COLUMN_PINS:
+                self._init[lut_id] = bits
+            else:
+                self._wide_init[lut_id] = bits
+
+    @property
+    def init(self):
+        if self._init is None:
+            self._compute_init()
+        return self._init
+
+    @property
+    def wide_init(self):
+        if self._init is None:
+            self._compute_init()
+        return self._wide_init
+
+    @property
+    def num_pins(self):
+        if self._init is None:
+            self._compute_init()
+        return self._num_pins
+
+    @property
+    def num_edges(self):
+        return len(self.fanin)
+
+    def fanin_of(self, lut_id):
+        return self.fanin[self.fanin_ptr[lut_id]:self.fanin_ptr[lut_id + 1]]
+
+    def fanout_of(self, lut_id):
+        return self.fanout[self.fanout_ptr[lut_id]:self.fanout_ptr[lut_id + 1]]
+
+    def fanin_count(self, lut_id):
+        return self.fanin_ptr[lut_id + 1] - self.fanin_ptr[lut_id]
+
+    def fanout_count(self, lut_id):
+        return self.fanout_ptr[lut_id + 1] - self.fanout_ptr[lut_id]
+
+    def truth_table(self, lut_id):
+        wide_init = self.wide_init
+        if lut_id in wide_init:
+            return wide_init[lut_id]
+        return self.init[lut_id]
+
+    def describe_connections(self, lut_id):
+        # The "Input from: ... | Output to: ..." part of LUT.display
+        fanin = self.fanin_of(lut_id)
+        fanout = self.fanout_of(lut_id)
+        input_connections_info = f"Input from: LUT(s) {', '.join(map(str, fanin))}" if fanin else ""
+        output_connections_info = f"Output to: LUT(s) {', '.join(map(str, fanout))}" if fanout else ""
+        return (input_connections_info + " | " + output_connections_info).strip(' | ')
+
+
+def _transpose(ptr, indices, size):
+    # CSR of the reversed edges (counting sort); walking the sinks in order
+    # keeps every fan-out list sorted
+    counts = array('q', bytes(8 * (size + 1)))
+    for source in indices:
+        counts[source + 1] += 1
+    for k in range(size):
+        counts[k + 1] += counts[k]
+    out_ptr = array('q', counts)
+    out = array('i', bytes(4 * len(indices)))
+    for sink in range(size):
+        for k in range(ptr[sink], ptr[sink + 1]):
+            source = indices[k]
+            out[counts[source]] = sink
+            counts[source] += 1
+    return out_ptr, out
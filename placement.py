@@ -0,0 +1,285 @@
+import math
+import random
+
+# Simulated-annealing placement of the used LUTs on a width x height grid,
+# one LUT per site. System input pads sit in a column left of the grid and
+# output pads in a column right of it; pads do not move. Every signal is a
+# net: a LUT output with the LUTs it drives, a system input with the LUTs
+# reading it, an output port with the LUT driving it. The cost is the sum of
+# the half-perimeter wirelengths (HPWL) of the nets' bounding boxes. A move
+# swaps a LUT with the content of a site near it, and its cost delta comes
+# from the nets on the two moved LUTs only.
+#
+# The schedule follows VPR: the starting temperature is 20 times the spread
+# of the cost over random moves, each temperature tries
+# moves_per_temperature * LUTs^(4/3) moves, the cooling rate and the move
+# range adapt to the acceptance rate unless given, and annealing stops when
+# the temperature is small next to the cost per net.
+
+# Crossing-count correction (VPR's q) for nets of 1..10 terminals: the
+# wiring of a multi-terminal net exceeds its HPWL
+_CROSSING = (1.0, 1.0, 1.0, 1.0828, 1.1536, 1.2206, 1.2823, 1.3385, 1.3991, 1.4493)
+
+
+def crossing_factor(terminals):
+    if terminals <= len(_CROSSING):
+        return _CROSSING[terminals - 1]
+    if terminals <= 50:
+        return 1.4493 + (terminals - 10) * (2.7933 - 1.4493) / 40
+    return 2.7933 + 0.02616 * (terminals - 50)
+
+
+class AnnealingSchedule:
+
+    def __init__(self, initial_temperature=None, cooling_rate=None, moves_per_temperature=1.0,
+                 exit_ratio=0.005, max_temperatures=None) -> None:
+        self.initial_temperature = initial_temperature  # None: from the cost spread of random moves
+        self.cooling_rate = cooling_rate  # None: adaptive, see _adaptive_cooling
+        self.moves_per_temperature = moves_per_temperature  # times LUTs^(4/3)
+        self.exit_ratio = exit_ratio  # stop below exit_ratio * cost per net
+        self.max_temperatures = max_temperatures
+
+
+def _adaptive_cooling(acceptance):
+    # Cool fast while almost every move is taken or almost none is, slowly
+    # in between where the placement improves most
+    if acceptance > 0.96:
+        return 0.5
+    if acceptance > 0.8:
+        return 0.9
+    if acceptance > 0.15:
+        return 0.95
+    return 0.8
+
+
+class PlacementProblem:
+    # Plain lists only, so a chain can be sent to a worker process.
+    # Terminals 0..len(lut_ids)-1 are the LUTs, the rest the pads
+
+    def __init__(self, lut_ids, pads, nets, width, height) -> None:
+        self.lut_ids = lut_ids
+        self.pads = pads  # (x, y) of every pad terminal
+        self.nets = nets  # tuples of terminals, two or more each
+        self.width = width
+        self.height = height
+        self.block_nets = [[] for _ in lut_ids]  # LUT terminal -> nets on it
+        for net_id, net in enumerate(nets):
+            for terminal in net:
+                if terminal < len(lut_ids):
+                    self.block_nets[terminal].append(net_id)
+
+    @classmethod
+    def from_netlist(cls, netlist, input_luts=(), outputs=(), width=None, height=None):
+        # input_luts: the LUTs reading each system input; outputs: the LUT
+        # driving each output port, None when unassigned
+        lut_ids = sorted(netlist.functions)
+        if width is None or height is None:
+            side = max(1, math.ceil(math.sqrt(len(lut_ids))))
+            width, height = width or side, height or side
+        if width * height < len(lut_ids):
+            raise ValueError(f"A {width} x {height} grid has no room for {len(lut_ids)} LUTs")
+        terminal = {lut_id: k for k, lut_id in enumerate(lut_ids)}
+
+        pads = []
+        nets = []
+        for idx, readers in enumerate(input_luts):
+            pad = len(lut_ids) + len(pads)
+            pads.append((-1, idx * height // max(1, len(input_luts))))
+            nets.append((pad, *sorted(terminal[lut_id] for lut_id in set(readers) if lut_id in terminal)))
+        for lut_id in lut_ids:
+            nets.append((terminal[lut_id], *(terminal[sink] for sink in netlist.fanout_of(lut_id) if sink in terminal)))
+        for idx, lut_id in enumerate(outputs):
+            if lut_id is not None and lut_id in terminal:
+                pad = len(lut_ids) + len(pads)
+                pads.append((width, idx * height // max(1, len(outputs))))
+                nets.append((terminal[lut_id], pad))
+        return cls(lut_ids, pads, [net for net in nets if len(net) > 1], width, height)
+
+
+def _hpwl(net, xs, ys):
+    x0 = x1 = xs[net[0]]
+    y0 = y1 = ys[net[0]]
+    for terminal in net:
+        x, y = xs[terminal], ys[terminal]
+        if x < x0:
+            x0 = x
+        elif x > x1:
+            x1 = x
+        if y < y0:
+            y0 = y
+        elif y > y1:
+            y1 = y
+    return x1 - x0 + y1 - y0
+
+
+def anneal(problem, schedule=None, seed=0):
+    # One annealing chain; returns (wirelength, LUT positions as (x, y))
+    schedule = schedule or AnnealingSchedule()
+    rng = random.Random(seed)
+    width, height = problem.width, problem.height
+    nets, block_nets = problem.nets, problem.block_nets
+    num_blocks = len(problem.lut_ids)
+
+    sites = rng.sample(range(width * height), num_blocks)
+    xs = [site % width for site in sites] + [x for x, _ in problem.pads]
+    ys = [site // width for site in sites] + [y for _, y in problem.pads]
+    grid = [-1] * (width * height)  # site -> LUT terminal, -1 when empty
+    for block, site in enumerate(sites):
+        grid[site] = block
+    net_cost = [_hpwl(net, xs, ys) for net in nets]
+    cost = sum(net_cost)
+    if num_blocks == 0 or not nets or width * height == 1:
+        return cost, list(zip(xs[:num_blocks], ys[:num_blocks]))
+
+    def sweep(temperature, moves, limit):
+        # Tries moves moves at temperature (None accepts everything) and
+        # returns how many were taken and the cost after each
+        nonlocal cost
+        accepted = 0
+        costs = []
+        for _ in range(moves):
+            a = rng.randrange(num_blocks)
+            ax, ay = xs[a], ys[a]
+            bx = rng.randint(max(0, ax - limit), min(width - 1, ax + limit))
+            by = rng.randint(max(0, ay - limit), min(height - 1, ay + limit))
+            if bx == ax and by == ay:
+                continue
+            b = grid[by * width + bx]
+            xs[a], ys[a] = bx, by
+            if b < 0:
+                affected = block_nets[a]
+            else:
+                xs[b], ys[b] = ax, ay
+                affected = set(block_nets[a]).union(block_nets[b])
+            new_costs = [(net_id, _hpwl(nets[net_id], xs, ys)) for net_id in affected]
+            delta = sum(new - net_cost[net_id] for net_id, new in new_costs)
+            if temperature is None or delta <= 0 or (temperature > 0 and rng.random() < math.exp(-delta / temperature)):
+                accepted += 1
+                cost += delta
+                for net_id, new in new_costs:
+                    net_cost[net_id] = new
+                grid[by * width + bx] = a
+                grid[ay * width + ax] = b
+            else:
+                xs[a], ys[a] = ax, ay
+                if b >= 0:
+                    xs[b], ys[b] = bx, by
+            costs.append(cost)
+        return accepted, costs
+
+    max_limit = max(width, height)
+    temperature = schedule.initial_temperature
+    if temperature is None:
+        _, costs = sweep(None, num_blocks, max_limit)
+        mean = sum(costs) / max(1, len(costs))
+        temperature = 20 * math.sqrt(sum((c - mean) ** 2 for c in costs) / max(1, len(costs)))
+    moves = max(1, int(schedule.moves_per_temperature * num_blocks ** (4 / 3)))
+    limit = float(max_limit)
+    best = (cost, xs[:num_blocks], ys[:num_blocks])
+    temperatures = 0
+    while temperature > 0 and temperature >= schedule.exit_ratio * cost / len(nets):
+        accepted, _ = sweep(temperature, moves, max(1, int(limit)))
+        if cost < best[0]:
+            best = (cost, xs[:num_blocks], ys[:num_blocks])
+        acceptance = accepted / moves
+        temperature *= schedule.cooling_rate or _adaptive_cooling(acceptance)
+        # Keep about 44% of the moves accepted by narrowing the range
+        limit = min(max_limit, max(1.0, limit * (0.56 + acceptance)))
+        temperatures += 1
+        if schedule.max_temperatures is not None and temperatures >= schedule.max_temperatures:
+            break
+    # Final greedy pass
+    sweep(0, moves, max(1, int(limit)))
+    if cost < best[0]:
+        best = (cost, xs[:num_blocks], ys[:num_blocks])
+    cost, best_xs, best_ys = best
+    return cost, list(zip(best_xs, best_ys))
+
+
+class ChannelCongestion:
+    # Estimated routing demand in tracks. Horizontal channel y runs along row
+    # y, vertical channel x along column x (the pad columns -1 and width
+    # included); segment k of a channel is the stretch across column or row
+    # k. A net of n terminals needs about crossing_factor(n) wires across
+    # its bounding box in each direction, spread evenly over the channels
+    # inside it
+
+    def __init__(self, width, height) -> None:
+        self.width = width
+        self.height = height
+        self.horizontal = [[0.0] * (width + 2) for _ in range(height)]  # [y][x + 1]
+        self.vertical = [[0.0] * height for _ in range(width + 2)]  # [x + 1][y]
+
+    def add_net(self, x0, x1, y0, y1, terminals):
+        q = crossing_factor(terminals)
+        share = q / (y1 - y0 + 1)
+        for y in range(y0, y1 + 1):
+            row = self.horizontal[y]
+            for x in range(x0, x1):
+                row[x + 1] += share
+        share = q / (x1 - x0 + 1)
+        for x in range(x0, x1 + 1):
+            column = self.vertical[x + 1]
+            for y in range(y0, y1):
+                column[y] += share
+
+    def channels(self):
+        # (name, peak segment demand, mean segment demand) of every channel
+        for y, row in enumerate(self.horizontal):
+            yield f"H{y}", max(row), sum(row) / len(row)
+        for x, column in enumerate(self.vertical, -1):
+            yield f"V{x}", max(column), sum(column) / len(column)
+
+    @property
+    def peak(self):
+        return max((peak for _, peak, _ in self.channels()), default=0.0)
+
+
+class Placement:
+
+    def __init__(self, problem, positions, wirelength, seed) -> None:
+        self.width = problem.width
+        self.height = problem.height
+        self.positions = dict(zip(problem.lut_ids, positions))  # LUT id -> (x, y)
+        self.pads = problem.pads
+        self.wirelength = wirelength  # total HPWL
+        self.seed = seed  # of the chain that found it
+        self._problem = problem
+
+    @classmethod
+    def at_sites(cls, netlist, input_luts, outputs, sites, width, height):
+        # A placement given rather than annealed, e.g. read from a bitstream;
+        # sites maps every used LUT id to its (x, y)
+        problem = PlacementProblem.from_netlist(netlist, input_luts, outputs, width, height)
+        positions = [tuple(sites[lut_id]) for lut_id in problem.lut_ids]
+        xs = [x for x, _ in positions] + [x for x, _ in problem.pads]
+        ys = [y for _, y in positions] + [y for _, y in problem.pads]
+        return cls(problem, positions, sum(_hpwl(net, xs, ys) for net in problem.nets), None)
+
+    def congestion(self):
+        problem = self._problem
+        xs = [x for x, _ in self.positions.values()] + [x for x, _ in problem.pads]
+        ys = [y for _, y in self.positions.values()] + [y for _, y in problem.pads]
+        congestion = ChannelCongestion(self.width, self.height)
+        for net in problem.nets:
+            net_xs = [xs[terminal] for terminal in net]
+            net_ys = [ys[terminal] for terminal in net]
+            congestion.add_net(min(net_xs), max(net_xs), min(net_ys), max(net_ys), len(net))
+        return congestion
+
+
+def place(netlist, input_luts=(), outputs=(), width=None, height=None, schedule=None, chains=1, workers=1, seed=0):
+    # Runs chains annealing chains (seeds seed, seed + 1, ...) and keeps the
+    # shortest wirelength; with workers > 1 they run on a process pool. The
+    # result only depends on the seeds, not on the number of workers
+    problem = PlacementProblem.from_netlist(netlist, input_luts, outputs, width, height)
+    seeds = [seed + chain for chain in range(max(1, chains))]
+    if workers <= 1 or len(seeds) == 1:
+        results = [anneal(problem, schedule, chain_seed) for chain_seed in seeds]
+    else:
+        from concurrent.futures import ProcessPoolExecutor
+        with ProcessPoolExecutor(max_workers=min(workers, len(seeds))) as executor:
+            results = list(executor.map(anneal, [problem] * len(seeds), [schedule] * len(seeds), seeds))
+    best = min(range(len(seeds)), key=lambda chain: results[chain][0])
+    wirelength, positions = results[best]
+    return Placement(problem, positions, wirelength, seeds[best])
@@ -0,0 +1,317 @@
+import math
+import random
+import time
+
+from lazy_import import lazy_module
+
+np = lazy_module('numpy')
+
+
+# Row and column sets are Python ints used as bitsets: a row's int has bit c set
+# for every column c it covers, a column's int has bit r set for every row r.
+
+# Pairwise column dominance is quadratic, so it is skipped on wider charts
+COLUMN_DOMINANCE_LIMIT = 512
+# 'auto' multiplies out Petrick's product only for charts this small
+PETRICK_MAX_ROWS = 8
+# Cyclic cores of wide random functions can take the exact search minutes to
+# prove, so QM stops at this many seconds and reports the best cover found
+DEFAULT_TIME_LIMIT = 1.0
+# Cells per broadcast block while building a PackedChart
+CHART_CHUNK_CELLS = 1 << 22
+# Mask groups at least this large are matched by binary search, not broadcast
+SORTED_GROUP_MIN_ROWS = 16
+
+
+class PackedChart:
+    # Row-major coverage chart with each row's columns packed little-endian into
+    # bytes, so tens of thousands of rows and columns stay in tens of MB
+
+    def __init__(self, packed, num_columns, column_count, column_owner) -> None:
+        self.packed = packed
+        self.num_columns = num_columns
+        self.column_count = column_count  # rows covering each column
+        self.column_owner = column_owner  # some row covering each column, -1 if none
+
+    @classmethod
+    def from_cubes(cls, values, masks, columns):
+        # Row i covers column j when (columns[j] & masks[i]) == values[i]
+        values = np.asarray(values, dtype=np.int64)
+        masks = np.asarray(masks, dtype=np.int64)
+        columns = np.asarray(columns, dtype=np.int64)
+        if len(columns) and len(masks) and max(columns.max(), masks.max(), values.max()) < 2**31:
+            # Narrower words halve the memory traffic of the broadcast compare
+            values, masks, columns = values.astype(np.int32), masks.astype(np.int32), columns.astype(np.int32)
+        num_rows, num_columns = len(values), len(columns)
+        packed = np.zeros((num_rows, (num_columns + 7) // 8), dtype=np.uint8)
+        column_count = np.zeros(num_columns, dtype=np.int64)
+        column_owner = np.full(num_columns, -1, dtype=np.int64)
+        step = max(1, CHART_CHUNK_CELLS // max(1, num_columns))
+
+        # Cubes sharing a mask see the same projected columns: large groups
+        # project once and binary-search their values in the sorted projection
+        unique_masks, group_of, group_size = np.unique(masks, return_inverse=True, return_counts=True)
+        for g in np.flatnonzero(group_size >= SORTED_GROUP_MIN_ROWS):
+            group = np.flatnonzero(group_of == g)
+            keys = columns & unique_masks[g]
+            order = np.argsort(keys, kind='stable')
+            sorted_keys = keys[order]
+            for start in range(0, len(group), step):
+                rows = group[start:start + step]
+                lo = np.searchsorted(sorted_keys, values[rows], side='left')
+                hi = np.searchsorted(sorted_keys, values[rows], side='right')
+                lengths = hi - lo
+                offsets = np.repeat(lo - np.cumsum(lengths) + lengths, lengths)
+                hit_rows = np.repeat(np.arange(len(rows)), lengths)
+                hit_cols = order[offsets + np.arange(len(offsets))]
+                block = np.zeros((len(rows), num_columns), dtype=bool)
+                block[hit_rows, hit_cols] = True
+                packed[rows] = np.packbits(block, axis=1, bitorder='little')
+                column_count += np.bincount(hit_cols, minlength=num_columns)
+                column_owner[hit_cols] = rows[hit_rows]
+
+        # The remaining cubes are compared against every column in broadcast blocks
+        small = np.flatnonzero(group_size[group_of] < SORTED_GROUP_MIN_ROWS)
+        for start in range(0, len(small), step):
+            rows = small[start:start + step]
+            block = (columns[None, :] & masks[rows, None]) == values[rows, None]
+            packed[rows] = np.packbits(block, axis=1, bitorder='little')
+            column_count += block.view(np.uint8).sum(axis=0, dtype=np.int64)
+            first = block.argmax(axis=0)
+            hit = block[first, np.arange(num_columns)]
+            column_owner[hit] = rows[first[hit]]
+        return cls(packed, num_columns, column_count, column_owner)
+
+    def _unpack(self, packed_rows):
+        return np.unpackbits(packed_rows, axis=-1, bitorder='little')[..., :self.num_columns].astype(bool)
+
+    def covered_columns(self, row_ids):
+        if len(row_ids) == 0:
+            return np.zeros(self.num_columns, dtype=bool)
+        return self._unpack(np.bitwise_or.reduce(self.packed[np.asarray(row_ids)], axis=0))
+
+    def rows_touching(self, column_mask):
+        packed_mask = np.packbits(column_mask, bitorder='little')
+        return np.flatnonzero((self.packed & packed_mask).any(axis=1))
+
+    def row_bitsets(self, row_ids, column_mask):
+        # Restricts the given rows to the selected columns as int bitsets for solve_cover
+        row_ids = np.asarray(row_ids)
+        bitsets = []
+        step = max(1, CHART_CHUNK_CELLS // max(1, self.num_columns))
+        for start in range(0, len(row_ids), step):
+            sub = self._unpack(self.packed[row_ids[start:start + step]])[:, column_mask]
+            repacked = np.packbits(sub, axis=1, bitorder='little')
+            bitsets.extend(int.from_bytes(row.tobytes(), 'little') for row in repacked)
+        return bitsets
+
+
+def _bits(mask):
+    while mask:
+        low = mask & -mask
+        yield low.bit_length() - 1
+        mask ^= low
+
+
+def _column_rows(rows, active, uncovered):
+    columns = {}
+    for r in active:
+        for col in _bits(rows[r] & uncovered):
+            columns[col] = columns.get(col, 0) | (1 << r)
+    return columns
+
+
+def _reduce(rows, active, uncovered, column_dominance=False):
+    # Repeatedly takes essential rows and drops dominated rows (and columns, when
+    # asked; a dominated column stays dominated in every subproblem, so that is
+    # only done once at the root).
+    # Returns (rows taken, remaining active rows, remaining columns, column -> rows)
+    taken = []
+    while True:
+        active = [r for r in active if rows[r] & uncovered]
+        columns = _column_rows(rows, active, uncovered)
+        if len(columns) != uncovered.bit_count():
+            return taken, active, uncovered, None  # some column cannot be covered
+
+        essential = set()
+        for row_mask in columns.values():
+            if row_mask & (row_mask - 1) == 0:
+                essential.add(row_mask.bit_length() - 1)
+        if essential:
+            for r in essential:
+                taken.append(r)
+                uncovered &= ~rows[r]
+            active = [r for r in active if r not in essential]
+            if not uncovered:
+                return taken, [], 0, {}
+            continue
+
+        # Row dominance: a row whose columns are a subset of another row's can go
+        dominated = set()
+        for r in active:
+            cover = rows[r] & uncovered
+            dominators = -1
+            for col in _bits(cover):
+                dominators &= columns[col]
+                if dominators == 1 << r:
+                    break
+            dominators &= ~(1 << r)
+            for other in _bits(dominators):
+                if other in dominated:
+                    continue
+                if rows[other] & uncovered != cover or other < r:
+                    dominated.add(r)
+                    break
+        if dominated:
+            active = [r for r in active if r not in dominated]
+            continue
+
+        # Column dominance: covering a column whose rows are a subset of another
+        # column's rows covers that other column too
+        if column_dominance and len(columns) <= COLUMN_DOMINANCE_LIMIT:
+            order = sorted(columns, key=lambda col: columns[col].bit_count())
+            dropped = 0
+            kept = []
+            for col in order:
+                row_mask = columns[col]
+                if any(columns[k] & ~row_mask == 0 for k in kept):
+                    dropped |= 1 << col
+                else:
+                    kept.append(col)
+            if dropped:
+                # Fewer columns can expose new essential or dominated rows
+                uncovered &= ~dropped
+                continue
+        return taken, active, uncovered, columns
+
+
+def _lower_bound(rows, columns, uncovered):
+    # Columns sharing no row need distinct rows, so a greedy independent set of
+    # columns bounds the rows still needed
+    used_rows = 0
+    independent = 0
+    for row_mask in sorted(columns.values(), key=int.bit_count):
+        if not row_mask & used_rows:
+            used_rows |= row_mask
+            independent += 1
+    # Each chosen row r covers at most |r| columns, so charging every column
+    # 1/|widest row covering it| never exceeds the cover size
+    width = {}
+    fractional = 0.0
+    for row_mask in columns.values():
+        widest = 0
+        for r in _bits(row_mask):
+            if r not in width:
+                width[r] = (rows[r] & uncovered).bit_count()
+            widest = max(widest, width[r])
+        fractional += 1.0 / widest
+    return max(independent, math.ceil(fractional - 1e-9))
+
+
+def greedy_cover(rows, universe, rng=None):
+    uncovered = universe
+    chosen = []
+    candidates = [r for r in range(len(rows)) if rows[r] & universe]
+    while uncovered:
+        if rng is None:
+            best = max(candidates, key=lambda r: (rows[r] & uncovered).bit_count())
+        else:
+            best_gain = max((rows[r] & uncovered).bit_count() for r in candidates)
+            best = rng.choice([r for r in candidates if (rows[r] & uncovered).bit_count() == best_gain])
+        if not rows[best] & uncovered:
+            raise ValueError("Chart has a column no row covers")
+        chosen.append(best)
+        uncovered &= ~rows[best]
+    # Drop rows made redundant by later picks
+    for r in list(reversed(chosen)):
+        rest = 0
+        for other in chosen:
+            if other != r:
+                rest |= rows[other]
+        if rest & universe == universe:
+            chosen.remove(r)
+    return chosen
+
+
+def petrick(rows, universe):
+    # Multiplies out the product of per-column row sums, keeping only
+    # non-absorbed products
+    products = {frozenset()}
+    for col in _bits(universe):
+        col_rows = [r for r in range(len(rows)) if (rows[r] >> col) & 1]
+        if not col_rows:
+            raise ValueError("Chart has a column no row covers")
+        expanded = set()
+        for product in products:
+            if any(r in product for r in col_rows):
+                expanded.add(product)
+            else:
+                for r in col_rows:
+                    expanded.add(product | {r})
+        minimal = sorted(expanded, key=len)
+        products = set()
+        for product in minimal:
+            if not any(kept <= product for kept in products):
+                products.add(product)
+    best = min(products, key=lambda product: (len(product), sorted(product)))
+    return sorted(best)
+
+
+def branch_and_bound(rows, universe, time_limit=None):
+    deadline = None if time_limit is None else time.perf_counter() + time_limit
+    best = greedy_cover(rows, universe)
+    optimal = True
+    taken, active, uncovered, _ = _reduce(
+        rows, [r for r in range(len(rows)) if rows[r] & universe], universe, column_dominance=True
+    )
+    stack = [(taken, active, uncovered)]
+    while stack:
+        if deadline is not None and time.perf_counter() > deadline:
+            optimal = False
+            break
+        chosen, active, uncovered = stack.pop()
+        taken, active, uncovered, columns = _reduce(rows, active, uncovered)
+        chosen = chosen + taken
+        if columns is None or len(chosen) >= len(best):
+            continue
+        if not uncovered:
+            best = chosen
+            continue
+        if len(chosen) + _lower_bound(rows, columns, uncovered) >= len(best):
+            continue
+        # Branch on the hardest column; in the k-th child the rows tried by
+        # earlier siblings are excluded since those covers were already explored
+        branch_col = min(columns, key=lambda col: columns[col].bit_count())
+        branch_rows = sorted(_bits(columns[branch_col]), key=lambda r: (rows[r] & uncovered).bit_count())
+        excluded = set()
+        children = []
+        for r in reversed(branch_rows):
+            remaining = [a for a in active if a != r and a not in excluded]
+            children.append((chosen + [r], remaining, uncovered & ~rows[r]))
+            excluded.add(r)
+        # Push so that the widest row is explored first
+        stack.extend(reversed(children))
+    return sorted(best), optimal
+
+
+def solve_cover(rows, num_columns, method='auto', time_limit=None, seed=0):
+    # Returns (selected row indices, whether the result is proven minimum)
+    universe = (1 << num_columns) - 1
+    if not universe:
+        return [], True
+    if method == 'petrick' or (method == 'auto' and len(rows) <= PETRICK_MAX_ROWS):
+        return petrick(rows, universe), True
+    if method in ('auto', 'bnb'):
+        return branch_and_bound(rows, universe, time_limit)
+    if method == 'greedy':
+        deadline = None if time_limit is None else time.perf_counter() + time_limit
+        best = greedy_cover(rows, universe)
+        rng = random.Random(seed)
+        while deadline is not None and time.perf_counter() < deadline:
+            candidate = greedy_cover(rows, universe, rng)
+            if len(candidate) < len(best):
+                best = candidate
+        taken, active, uncovered, columns = _reduce(rows, list(range(len(rows))), universe, column_dominance=True)
+        bound = len(taken) + (_lower_bound(rows, columns, uncovered) if columns else 0)
+        return sorted(best), len(best) <= bound
+    raise ValueError(f"Unknown cover method '{method}'")
@@ -0,0 +1,275 @@
+import functools
+import re
+
+# Tokenizer and recursive-descent parser for the expression syntax of
+# input.eqn, replacing sympy.sympify on the hot path:
+#
+#   expr   := term ('|' term)*
+#   term   := factor ('&' factor)*
+#   factor := '~' factor | atom ("'" | '!S')*
+#   atom   := identifier | '0' | '1' | 'True' | 'False' | '(' expr ')'
+#
+# Identifiers may be longer than one letter (F1, IN_23). The AST is made of
+# tuples so parses can be cached and shared:
+#   ('var', name), ('const', bool), ('not', node), ('and', nodes), ('or', nodes)
+
+_TOKEN = re.compile(r"\s*(?:([A-Za-z_][A-Za-z0-9_]*)|([01])\b|(!S)|([&|~'()]))")
+_CONSTANTS = {'True': True, 'False': False, '1': True, '0': False}
+PARSE_CACHE_SIZE = 4096
+
+
+class ExpressionSyntaxError(ValueError):
+
+    def __init__(self, message, expression, position) -> None:
+        super().__init__(f"{message} at position {position}: {expression}")
+        self.expression = expression
+        self.position = position
+
+
+def tokenize(expression):
+    # (kind, text, position) triples; kind is 'name', 'const' or the operator itself
+    tokens = []
+    position = 0
+    end = len(expression.rstrip())
+    while position < end:
+        match = _TOKEN.match(expression, position)
+        if match is None or match.end() == position:
+            offset = len(expression) - len(expression[position:].lstrip())
+            raise ExpressionSyntaxError(f"Unexpected character {expression[offset]!r}", expression, offset)
+        name, constant, bang, operator = match.groups()
+        start = match.start(match.lastindex)
+        if name is not None:
+            tokens.append(('const' if name in _CONSTANTS else 'name', name, start))
+        elif constant is not None:
+            tokens.append(('const', constant, start))
+        elif bang is not None:
+            tokens.append(("'", bang, start))
+        else:
+            tokens.append((operator, operator, start))
+        position = match.end()
+    tokens.append(('end', '', end))
+    return tokens
+
+
+class _Parser:
+
+    def __init__(self, expression) -> None:
+        self.expression = expression
+        self.tokens = tokenize(expression)
+        self.index = 0
+
+    def peek(self):
+        return self.tokens[self.index][0]
+
+    def take(self, kind):
+        token = self.tokens[self.index]
+        if token[0] != kind:
+            found = f"{token[1]!r}" if token[0] != 'end' else "end of expression"
+            expected = "expression" if kind == 'atom' else f"'{kind}'"
+            raise ExpressionSyntaxError(f"Expected {expected}, found {found}", self.expression, token[2])
+        self.index += 1
+        return token
+
+    def parse(self):
+        node = self.expr()
+        self.take('end')
+        return node
+
+    def expr(self):
+        nodes = [self.term()]
+        while self.peek() == '|':
+            self.index += 1
+            nodes.append(self.term())
+        return nodes[0] if len(nodes) == 1 else ('or', tuple(nodes))
+
+    def term(self):
+        nodes = [self.factor()]
+        while self.peek() == '&':
+            self.index += 1
+            nodes.append(self.factor())
+        return nodes[0] if len(nodes) == 1 else ('and', tuple(nodes))
+
+    def factor(self):
+        if self.peek() == '~':
+            self.index += 1
+            return negate(self.factor())
+        node = self.atom()
+        while self.peek() == "'":
+            self.index += 1
+            node = negate(node)
+        return node
+
+    def atom(self):
+        kind = self.peek()
+        if kind == 'name':
+            return ('var', self.take('name')[1])
+        if kind == 'const':
+            return ('const', _CONSTANTS[self.take('const')[1]])
+        if kind == '(':
+            self.index += 1
+            node = self.expr()
+            self.take(')')
+            return node
+        return self.take('atom')
+
+
+def negate(node):
+    if node[0] == 'not':
+        return node[1]
+    if node[0] == 'const':
+        return ('const', not node[1])
+    return ('not', node)
+
+
+@functools.lru_cache(maxsize=PARSE_CACHE_SIZE)
+def parse(expression):
+    return _Parser(expression).parse()
+
+
+def variables_of(node):
+    if node[0] == 'var':
+        return {node[1]}
+    if node[0] == 'const':
+        return set()
+    if node[0] == 'not':
+        return variables_of(node[1])
+    return set().union(*(variables_of(child) for child in node[1]))
+
+
+def is_literal_clause(node):
+    # A literal, or an AND or OR of literals once nested ANDs/ORs are
+    # flattened; sympy's simplify_logic returns such expressions unchanged
+    if node[0] in ('var', 'const') or (node[0] == 'not' and node[1][0] == 'var'):
+        return True
+    kind = node[0]
+    stack = list(node[1]) if kind in ('and', 'or') else []
+    while stack:
+        child = stack.pop()
+        if child[0] == kind:
+            stack.extend(child[1])
+        elif not (child[0] in ('var', 'const') or (child[0] == 'not' and child[1][0] == 'var')):
+            return False
+    return kind in ('and', 'or')
+
+
+def check_variables(node, known):
+    unknown = variables_of(node) - set(known)
+    if unknown:
+        raise ValueError(f"Unknown variable '{sorted(unknown)[0]}' in expression")
+
+
+def to_sympy(node):
+    import sympy
+    if node[0] == 'var':
+        return sympy.Symbol(node[1])
+    if node[0] == 'const':
+        return sympy.true if node[1] else sympy.false
+    if node[0] == 'not':
+        return sympy.Not(to_sympy(node[1]))
+    args = [to_sympy(child) for child in node[1]]
+    return sympy.And(*args) if node[0] == 'and' else sympy.Or(*args)
+
+
+def to_cover(node, variables):
+    # (value, mask) cubes when the expression is written as a sum of products
+    # of literals, None otherwise
+    num_vars = len(variables)
+    position = {var: 1 << (num_vars - 1 - k) for k, var in enumerate(variables)}
+    check_variables(node, position)
+    if node == ('const', True):
+        return [(0, 0)]
+    if node == ('const', False):
+        return []
+    cubes = []
+    for term in (node[1] if node[0] == 'or' else (node,)):
+        literals = term[1] if term[0] == 'and' else (term,)
+        value, mask = 0, 0
+        for literal in literals:
+            negated = literal[0] == 'not'
+            if negated:
+                literal = literal[1]
+            if literal[0] != 'var':
+                return None
+            bit = position[literal[1]]
+            if mask & bit and bool(value & bit) == negated:
+                break  # x & ~x, the term is empty
+            mask |= bit
+            if not negated:
+                value |= bit
+        else:
+            cubes.append((value, mask))
+    return cubes
+
+
+def compile_table(node, variables):
+    # Closure computing the packed truth table words of the expression with
+    # NumPy ops; shared subexpressions are evaluated once
+    from truth_table import TruthTable, row_mask, variable_slice
+    num_vars = len(variables)
+    positions = {var: num_vars - 1 - k for k, var in enumerate(variables)}
+    check_variables(node, positions)
+
+    def evaluate():
+        mask = row_mask(num_vars)
+        cache = {}
+
+        def visit(node):
+            if node in cache:
+                return cache[node]
+            kind = node[0]
+            if kind == 'var':
+                words = variable_slice(positions[node[1]], num_vars)
+            elif kind == 'const':
+                words = TruthTable.constant(node[1], num_vars).words
+            elif kind == 'not':
+                words = ~visit(node[1]) & mask
+            else:
+                words = visit(node[1][0]).copy()
+                for child in node[1][1:]:
+                    if kind == 'and':
+                        words &= visit(child)
+                    else:
+                        words |= visit(child)
+            cache[node] = words
+            return words
+
+        return TruthTable(visit(node), num_vars)
+
+    return evaluate
+
+
+def _variable_pattern(position, num_vars):
+    # Rows whose counter has bit `position` set, as an int with bit r for row r
+    period = 1 << (position + 1)
+    block = ((1 << (period >> 1)) - 1) << (period >> 1)
+    rows = 1 << num_vars
+    return block * (((1 << rows) - 1) // ((1 << period) - 1))
+
+
+def compile_int(node, variables):
+    # Truth table as a Python int, bit r set when row r is in the ON-set. Big
+    # int operations do the bit-parallel work, so this needs no NumPy
+    num_vars = len(variables)
+    positions = {var: num_vars - 1 - k for k, var in enumerate(variables)}
+    check_variables(node, positions)
+    everything = (1 << (1 << num_vars)) - 1
+    cache = {}
+
+    def visit(node):
+        if node in cache:
+            return cache[node]
+        kind = node[0]
+        if kind == 'var':
+            bits = _variable_pattern(positions[node[1]], num_vars)
+        elif kind == 'const':
+            bits = everything if node[1] else 0
+        elif kind == 'not':
+            bits = everything ^ visit(node[1])
+        else:
+            bits = visit(node[1][0])
+            for child in node[1][1:]:
+                bits = bits & visit(child) if kind == 'and' else bits | visit(child)
+        cache[node] = bits
+        return bits
+
+    return visit(node)
@@ -0,0 +1,53 @@
+import itertools
+import os
+import subprocess
+import sys
+
+import pytest
+
+import sop_parser
+from bdd import BDD
+
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+EXPRESSIONS = ["(A & B) | (~A & C)", "~(A | ~B) & C | D", "A & ~A", "True", "(B & ~D) | (A & C & D) | ~C"]
+
+
+@pytest.mark.parametrize("expression", EXPRESSIONS)
+def test_from_ast_matches_the_truth_table(expression):
+    variables = ["A", "B", "C", "D"]
+    node = sop_parser.parse(expression)
+    manager = BDD(variables)
+    root = manager.from_ast(node)
+    expected = sop_parser.compile_int(node, variables)
+    assert list(manager.iter_minterms(root)) == [row for row in range(16) if expected >> row & 1]
+    assert manager.sat_count(root) == bin(expected).count("1")
+
+
+def test_from_ast_rejects_unknown_variables():
+    with pytest.raises(ValueError):
+        BDD(["A"]).from_ast(sop_parser.parse("A & B"))
+
+
+@pytest.mark.parametrize("order", list(itertools.permutations("ABC")))
+def test_reorder_and_sift_keep_the_function(order):
+    manager = BDD(list("ABC"))
+    root = manager.from_ast(sop_parser.parse("(A & B) | (~A & C) | (B & ~C)"))
+    minterms = list(manager.iter_minterms(root))
+    reordered, (moved,) = manager.reorder([root], list(order))
+    assert list(reordered.iter_minterms(moved)) == minterms
+    sifted, (best,) = reordered.sift([moved])
+    assert list(sifted.iter_minterms(best)) == minterms
+    assert sifted.size([best]) <= reordered.size([moved])
+
+
+def test_bdd_engine_does_not_load_sympy():
+    script = (
+        "import sys, boolean_EQN\n"
+        "boolean_EQN.get_minterms('(A & B) | C', ['A', 'B', 'C'], set_engine='bdd')\n"
+        "print('sympy' in sys.modules)\n"
+    )
+    output = subprocess.run([sys.executable, "-c", script], capture_output=True, text=True, check=True,
+                            cwd=REPO).stdout
+    assert output.strip() == "False"
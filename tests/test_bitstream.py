@@ -0,0 +1,104 @@
+import numpy as np
+import pytest
+
+import bitstream
+import fpga_backend
+import fpga_inter_dependent_simulation
+import fpga_simulator
+import lut_simulator
+
+DESIGNS = {
+    fpga_simulator.FPGA: [
+        "(A & B & ~C) | (D & E & F)",
+        "(A & B & ~C) | (~D & G)",
+        "H | (~A & C & E & ~F)",
+    ],
+    # F1 is the output of the first formula
+    fpga_inter_dependent_simulation.FPGA: [
+        "(A & B & ~C) | (D & E & F)",
+        "(F1 & ~G) | (B & H)",
+        "(F1 & ~E) | (~A & C & D & ~F)",
+    ],
+}
+
+
+def mapped_fpga(fpga_class, lut_type, placed):
+    expressions = DESIGNS[fpga_class]
+    fpga = fpga_class(40, lut_type, 8, len(expressions))
+    fpga.split_and_assign_functions(expressions)
+    fpga.assign_or_luts_to_outputs()
+    if placed:
+        fpga.place_luts(seed=0)
+    return fpga
+
+
+def output_luts(fpga):
+    return [lut.id for lut in fpga.system_outputs if lut is not None]
+
+
+@pytest.mark.parametrize("placed", [False, True])
+@pytest.mark.parametrize("lut_type", [4, 6])
+@pytest.mark.parametrize("fpga_class", list(DESIGNS))
+def test_round_trip(tmp_path, fpga_class, lut_type, placed):
+    fpga = mapped_fpga(fpga_class, lut_type, placed)
+    path = str(tmp_path / "bitstream.bin")
+    size = fpga.write_bitstream(path)
+    with open(path, 'rb') as file:
+        data = file.read()
+    assert size == len(data)
+    outputs = output_luts(fpga)
+    expected = lut_simulator.compile_network(fpga, outputs).exhaustive()
+
+    with bitstream.load(path) as stream:
+        assert np.array_equal(stream.compile_network().exhaustive(), expected)
+
+    rebuilt = fpga_class.from_bitstream(path)
+    assert type(rebuilt) is fpga_class
+    assert output_luts(rebuilt) == outputs
+    assert np.array_equal(lut_simulator.compile_network(rebuilt, outputs).exhaustive(), expected)
+    if placed:
+        assert rebuilt.placement.positions == fpga.placement.positions
+        assert rebuilt.placement.wirelength == fpga.placement.wirelength
+    else:
+        assert rebuilt.placement is None
+    assert bitstream.encode(rebuilt) == data
+
+
+@pytest.mark.parametrize("corrupt, message", [
+    (lambda data: data.__setitem__(0, ord('X')), "Not a LUT bitstream"),
+    (lambda data: data.__setitem__(4, bitstream.VERSION + 1), "version"),
+    (lambda data: data.__setitem__(len(data) // 2, data[len(data) // 2] ^ 1), "checksum"),
+    (lambda data: data.__delitem__(slice(-3, None)), "checksum"),
+])
+def test_corrupted_bitstreams_are_rejected(tmp_path, corrupt, message):
+    data = bytearray(bitstream.encode(mapped_fpga(fpga_simulator.FPGA, 4, True)))
+    corrupt(data)
+    with pytest.raises(bitstream.BitstreamError, match=message):
+        bitstream.Bitstream(bytes(data))
+    path = tmp_path / "corrupt.bin"
+    path.write_bytes(data)
+    with pytest.raises(bitstream.BitstreamError, match=message):
+        bitstream.load(str(path))
+
+
+def test_empty_file_is_rejected(tmp_path):
+    path = tmp_path / "empty.bin"
+    path.write_bytes(b"")
+    with pytest.raises(bitstream.BitstreamError):
+        bitstream.load(str(path))
+
+
+def test_main_skips_the_binary_for_inputs_the_fpga_lacks(tmp_path, monkeypatch, capsys):
+    path = tmp_path / "bitstream.bin"
+    monkeypatch.setattr(fpga_backend, 'TIMING_REPORT_PATH', None)
+    monkeypatch.setattr(fpga_backend, 'PLACEMENT_WORKERS', 1)
+    monkeypatch.setattr(fpga_backend, 'BITSTREAM_PATH', str(path))
+    # 8 variables on an FPGA with 6 system inputs
+    fpga = fpga_simulator.FPGA(100, 4, 6, 1)
+    fpga.split_and_assign_functions(["(A & B & ~C) | (D & E & F) | (G & ~H)"])
+    fpga.assign_or_luts_to_outputs()
+    fpga_backend.run_backend(fpga)
+    out = capsys.readouterr().out
+    assert "Generated Bitstream:" in out
+    assert "Binary bitstream not written: LUT" in out
+    assert not path.exists()
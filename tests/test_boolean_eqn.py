@@ -0,0 +1,140 @@
+import random
+
+import pytest
+
+import boolean_EQN
+
+
+def random_sop(rng, variables, terms):
+    products = []
+    for _ in range(terms):
+        chosen = rng.sample(variables, rng.randint(1, len(variables)))
+        products.append("(" + " & ".join(("~" if rng.random() < 0.5 else "") + var for var in chosen) + ")")
+    return " | ".join(products)
+
+
+EXPRESSIONS = [
+    "(A & B) | (~A & C)",
+    "A | ~A",
+    "(A & ~A)",
+    "(A & B & ~C & D) | (~B & D) | C",
+] + [random_sop(random.Random(seed), list("ABCDE")[:3 + seed % 3], 1 + seed % 5) for seed in range(12)]
+
+
+@pytest.mark.parametrize("set_engine", ["table", "bdd"])
+@pytest.mark.parametrize("expression", EXPRESSIONS)
+def test_sets_match_sympy_reference(expression, set_engine):
+    variables = boolean_EQN.extract_variables(expression)
+    assert boolean_EQN.get_minterms(expression, variables, set_engine) == boolean_EQN.get_minterms_sympy(expression, variables)
+    assert boolean_EQN.get_maxterms(expression, variables, set_engine) == boolean_EQN.get_maxterms_sympy(expression, variables)
+
+
+@pytest.mark.parametrize("expression", EXPRESSIONS + [random_sop(random.Random(1), [f"X{k}" for k in range(9)], 6)])
+def test_counts_match_the_sets(expression):
+    variables = boolean_EQN.extract_variables(expression)
+    analysis = boolean_EQN.ExpressionAnalysis(expression, variables)
+    assert analysis.table.count() == len(analysis.table.on_set())
+    assert analysis.count_minterms() == len(boolean_EQN.get_minterms(expression, variables))
+
+
+def test_sympy_reference_reads_primed_variables():
+    # "A!S" is the input files' spelling of ~A
+    assert boolean_EQN.get_minterms_sympy("(A!S & B)", ["A", "B"]) == boolean_EQN.get_minterms("(~A & B)", ["A", "B"])
+
+
+def test_wide_line_counts_sets_instead_of_listing_them(monkeypatch):
+    def no_table(*args):
+        raise AssertionError("built the 2^n truth table")
+    monkeypatch.setattr(boolean_EQN.sop_parser, "compile_table", no_table)
+    variables = [f"X{k}" for k in range(30)]
+    expression = f"({' & '.join(variables[:15])}) | (~{variables[15]} & {' & '.join(variables[16:])})"
+    report = dict(line.split(": ", 1) for line in boolean_EQN.analyze_line(expression) if ": " in line)
+    minterms = 2 * (1 << 15) - 1  # two 15-literal terms over disjoint variables
+    assert report["Number of ON-Set minterms"] == str(minterms)
+    assert report["Number of ON-Set maxterms"] == str((1 << 30) - minterms)
+    assert report["ON-Set minterms"].startswith("omitted")
+    assert report["Prime Implicants"].startswith("Not computed")
+    assert report["Minimization engine"] == "SOP espresso, POS espresso"
+
+
+def test_saved_literals_count_multi_character_names():
+    report = dict(line.split(": ", 1) for line in boolean_EQN.analyze_line(
+        "(IN_1 & X1 & X2) | (IN_1 & ~X1 & X2) | (IN_1 & X2 & ~IN_10)"
+    ) if ": " in line)
+    assert report["Minimized SOP"] == "IN_1 & X2"
+    # X1 and IN_10 are gone
+    assert report["Saved literals (vs canonical SOP)"] == "2"
+    assert report["Saved literals (vs canonical POS)"] == "2"
+    assert boolean_EQN.extract_literals("(A!S & IN_1) | True") == {"A", "IN_1"}
+
+
+def test_line_limit_is_skipped_outside_the_main_thread():
+    from concurrent.futures import ThreadPoolExecutor
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        block = executor.submit(boolean_EQN._analyze_line_limited, "(A & B)", None, 5).result()
+    assert block[0] == "SOP: (A & B)"
+
+
+def test_line_limit_cuts_off_a_slow_line(monkeypatch):
+    import time
+    monkeypatch.setattr(boolean_EQN, "analyze_line", lambda *args: time.sleep(5))
+    block = boolean_EQN._analyze_line_limited("(A & B)", None, 0.05)
+    assert block[0] == "Timed out after 0.05 s: (A & B)"
+
+
+def _interrupted_run(monkeypatch, input_path, output_path):
+    # Stops main after the first report block, as a crash or ^C would
+    real = boolean_EQN.iter_reports
+
+    def interrupted(*args):
+        for count, block in enumerate(real(*args)):
+            if count == 1:
+                raise KeyboardInterrupt
+            yield block
+
+    monkeypatch.setattr(boolean_EQN, "iter_reports", interrupted)
+    with pytest.raises(KeyboardInterrupt):
+        boolean_EQN.main(str(input_path), str(output_path), resume=True)
+    monkeypatch.setattr(boolean_EQN, "iter_reports", real)
+
+
+def _fresh_report(tmp_path, input_path):
+    reference = tmp_path / "reference.txt"
+    boolean_EQN.main(str(input_path), str(reference))
+    return reference.read_text()
+
+
+def test_resume_continues_an_interrupted_run(tmp_path, monkeypatch):
+    input_path = tmp_path / "input.eqn"
+    input_path.write_text("(A & B)\n(A | ~C)\n(B & ~D) | C\n")
+    output_path = tmp_path / "output.txt"
+    _interrupted_run(monkeypatch, input_path, output_path)
+    boolean_EQN.main(str(input_path), str(output_path), resume=True)
+    assert output_path.read_text() == _fresh_report(tmp_path, input_path)
+
+
+def test_resume_starts_over_when_the_input_changed(tmp_path, monkeypatch):
+    input_path = tmp_path / "input.eqn"
+    input_path.write_text("(A & B)\n(A | ~C)\n(B & ~D) | C\n")
+    output_path = tmp_path / "output.txt"
+    _interrupted_run(monkeypatch, input_path, output_path)
+    input_path.write_text("(~A & B & C)\n(D | ~E)\n")
+    boolean_EQN.main(str(input_path), str(output_path), resume=True)
+    assert output_path.read_text() == _fresh_report(tmp_path, input_path)
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_bad_lines_do_not_abort_the_batch(tmp_path, workers):
+    input_path = tmp_path / "input.eqn"
+    input_path.write_text("(A & B)\n(A & & B)\n(A & ~A)\n(B | ~C)\n")
+    output_path = tmp_path / "output.txt"
+    boolean_EQN.main(str(input_path), str(output_path), workers=workers, chunk_size=1, line_timeout=30)
+    blocks = [
+        boolean_EQN.analyze_line("(A & B)"),
+        ["Failed (ExpressionSyntaxError: Expected expression, found '&' at position 5: (A & & B)): (A & & B)", "\n"],
+        boolean_EQN.analyze_line("(A & ~A)"),
+        boolean_EQN.analyze_line("(B | ~C)"),
+    ]
+    assert output_path.read_text() == "".join(line + "\n" for block in blocks for line in block)
+    # An unsatisfiable line has no prime implicants
+    assert "Number of Prime Implicants: 0" in blocks[2]
@@ -0,0 +1,36 @@
+import numpy as np
+
+import bitstream
+import fpga_simulator
+import lut_logic
+import lut_simulator
+from lut_fabric import LUTFabric
+
+
+def test_netlist_follows_reassigned_functions():
+    fabric = LUTFabric(3, 4, max_variables=['A', 'B', 'C'])
+    fabric.assign(0, "(A & B)")
+    fabric.assign(1, "Output of LUT 0 | C")
+    assert fabric.netlist.functions == {0: "(A & B)", 1: "Output of LUT 0 | C"}
+    # Same connections, new function over system inputs only
+    fabric.assign(0, "(A & ~C)")
+    assert fabric.netlist.functions[0] == "(A & ~C)"
+    fabric.assign(1, None)
+    assert fabric.netlist.functions == {0: "(A & ~C)"}
+    assert list(fabric.netlist.fanin_of(1)) == []
+
+
+def test_fpga_netlist_after_reassigning_a_lut():
+    fpga = fpga_simulator.FPGA(4, 4, 3, 1)
+    fpga.split_and_assign_functions(["(A & B) | C"])
+    fpga.assign_or_luts_to_outputs()
+    lut_id = fpga.system_outputs[0].id
+    assert fpga.netlist.truth_table(lut_id) == lut_logic.function_table("(A & B) | C")[1]
+    fpga.luts[lut_id].assign_function("(A & ~B)")
+    assert fpga.netlist.functions[lut_id] == "(A & ~B)"
+    assert fpga.netlist.truth_table(lut_id) == lut_logic.function_table("(A & ~B)")[1]
+    reference = fpga_simulator.FPGA(4, 4, 3, 1)
+    reference.luts[lut_id].assign_function("(A & ~B)")
+    expected = lut_simulator.compile_network(reference, [lut_id]).exhaustive()
+    with bitstream.Bitstream(bitstream.encode(fpga)) as stream:
+        assert np.array_equal(stream.compile_network().exhaustive(), expected)
@@ -0,0 +1,126 @@
+import random
+import re
+
+import numpy as np
+import pytest
+
+import fpga_backend
+import fpga_inter_dependent_simulation
+import fpga_simulator
+import lut_logic
+import lut_mapper
+import lut_simulator
+import sop_parser
+
+# The inter-dependent formulas of the README
+README_FORMULAS = [
+    ("F1", "(A & B) | (~C & D) | (E & ~F)"),
+    ("F2", "(F1 & ~A) | (B & C & ~F1) | (~E & F)"),
+    ("F3", "(~F2 & D) | (A & ~B & E) | (F1 & ~C)"),
+]
+
+
+def inlined(definitions):
+    # Every expression with the formulas it names written out in place
+    expanded = {}
+    for name, expression in definitions:
+        expanded[name] = re.sub(
+            r"[A-Za-z_][A-Za-z0-9_]*",
+            lambda m: f"({expanded[m.group(0)]})" if m.group(0) in expanded else m.group(0),
+            expression,
+        )
+    return [expanded[name] for name, _ in definitions]
+
+
+def mapped_fpga(definitions, lut_type, variables):
+    fpga = fpga_inter_dependent_simulation.FPGA(500, lut_type, len(variables), len(definitions))
+    fpga.split_and_assign_functions([expression for _, expression in definitions], [name for name, _ in definitions])
+    return fpga
+
+
+def assert_maps_correctly(definitions, lut_type):
+    expressions = inlined(definitions)
+    variables = sorted(set().union(*(sop_parser.variables_of(sop_parser.parse(e)) for e in expressions)))
+    fpga = mapped_fpga(definitions, lut_type, variables)
+    got = lut_simulator.compile_network(fpga, fpga.final_or_lut_ids, variables).exhaustive()
+    for k, expression in enumerate(expressions):
+        expected = sop_parser.compile_table(sop_parser.parse(expression), variables)().words
+        assert np.array_equal(got[k], expected), expression
+    for function in fpga.netlist.functions.values():
+        assert len(lut_logic.parse_function(function)[1]) <= lut_type, function
+    return fpga
+
+
+def random_sop(rng, names, max_terms=5):
+    products = []
+    for _ in range(rng.randint(1, max_terms)):
+        chosen = rng.sample(names, rng.randint(1, min(5, len(names))))
+        products.append("(" + " & ".join(("~" if rng.random() < 0.5 else "") + name for name in chosen) + ")")
+    return " | ".join(products)
+
+
+def random_formulas(rng):
+    # Formulas over A..H that may read the ones before them, some of them
+    # complemented outright
+    definitions = []
+    for idx in range(rng.randint(1, 5)):
+        names = list("ABCDEFGH")[:rng.randint(2, 8)] + [name for name, _ in definitions]
+        expression = random_sop(rng, names)
+        if rng.random() < 0.2:
+            expression = f"~({expression})"
+        definitions.append((f"F{idx + 1}", expression))
+    return definitions
+
+
+@pytest.mark.parametrize("lut_type", [2, 3, 4, 5, 6])
+@pytest.mark.parametrize("seed", range(8))
+def test_random_sops_map_to_their_truth_tables(seed, lut_type):
+    rng = random.Random(seed)
+    definitions = [(f"F{idx + 1}", random_sop(rng, list("ABCDEFGH"), 8)) for idx in range(rng.randint(1, 4))]
+    assert_maps_correctly(definitions, lut_type)
+
+
+@pytest.mark.parametrize("lut_type", [2, 4, 6])
+@pytest.mark.parametrize("seed", range(12))
+def test_random_inter_dependent_formulas_map_to_their_truth_tables(seed, lut_type):
+    assert_maps_correctly(random_formulas(random.Random(seed)), lut_type)
+
+
+def test_constant_and_input_outputs_get_a_lut_each():
+    assert_maps_correctly([("F1", "A | ~A"), ("F2", "A & ~A"), ("F3", "~B"), ("F4", "C")], 4)
+
+
+def test_formula_cycle_is_reported():
+    with pytest.raises(lut_mapper.FormulaCycle, match="F1 -> F2 -> F1|F2 -> F1 -> F2"):
+        lut_mapper.map_expressions(["F2 & A", "F1 | B", "C"], 4, {'F1': 0, 'F2': 1, 'F3': 2})
+    with pytest.raises(lut_mapper.FormulaCycle, match="F1 -> F1"):
+        lut_mapper.map_expressions(["F1 & A"], 4, {'F1': 0})
+    with pytest.raises(lut_mapper.FormulaCycle):
+        fpga_inter_dependent_simulation.parse_and_process_sop_formulas(["F1 = F3 | A", "F2 = B", "F3 = F1 & F2"])
+
+
+def test_luts_need_two_inputs():
+    with pytest.raises(ValueError):
+        lut_mapper.map_expressions(["A & B"], 1)
+
+
+def test_complemented_outputs_read_by_other_formulas_need_no_inverter_lut():
+    fpga = assert_maps_correctly(README_FORMULAS, 4)
+    functions = fpga.netlist.functions.values()
+    assert not [function for function in functions if re.fullmatch(r"~Output of LUT \d+", function)]
+    assert len(functions) == 8
+    # F1 and F2 are read inverted by F2 and F3, and come out of their own LUTs
+    fpga.assign_or_luts_to_outputs()
+    assert [output['arrival'] for output in fpga.analyze_timing().outputs] == [2, 3, 4]
+
+
+def test_shared_logic_savings_are_counted_once_per_mapping(monkeypatch):
+    fpga = fpga_simulator.FPGA(40, 2, 5, 2)
+    fpga.split_and_assign_functions(["(A & B & C) | D", "(A & B & C) | E"])
+    calls = []
+    unhashed = fpga_backend.map_expressions
+    monkeypatch.setattr(fpga_backend, "map_expressions", lambda *args, **kwargs: calls.append(kwargs) or unhashed(*args, **kwargs))
+    # A & B & C is two 2-input LUTs, built once instead of twice
+    assert fpga.calculate_shared_logic_savings() == 2
+    assert fpga.calculate_shared_logic_savings() == 2
+    assert calls == [{'structural_hashing': False}]
@@ -0,0 +1,60 @@
+import numpy as np
+import pytest
+
+import fpga_simulator
+import lut_simulator
+import sop_parser
+
+
+def configured_fpga(functions, num_inputs, lut_type=4):
+    fpga = fpga_simulator.FPGA(len(functions) + 2, lut_type, num_inputs, 1)
+    for lut_id, function in enumerate(functions):
+        fpga.luts[lut_id].assign_function(function)
+    return fpga
+
+
+def reference(expression, variables):
+    return sop_parser.compile_table(sop_parser.parse(expression), variables)().words
+
+
+def test_exhaustive_matches_the_expressions():
+    # LUT 2 is F = (A & B) | (C & ~D) written over two LUTs, LUT 3 reads it inverted
+    fpga = configured_fpga(["(A & B)", "(C & ~D)", "Output of LUT 0 | Output of LUT 1", "~Output of LUT 2 & E"], 5)
+    variables = list("ABCDE")
+    got = lut_simulator.compile_network(fpga, [2, 3, "~Output of LUT 2 | A"]).exhaustive()
+    assert np.array_equal(got[0], reference("(A & B) | (C & ~D)", variables))
+    assert np.array_equal(got[1], reference("~((A & B) | (C & ~D)) & E", variables))
+    assert np.array_equal(got[2], reference("~((A & B) | (C & ~D)) | A", variables))
+
+
+def test_simulate_agrees_with_exhaustive():
+    fpga = configured_fpga(["(A & ~B) | C", "Output of LUT 0 & (D | ~E)", "(Output of LUT 1 & F) | (~A & G)"], 7)
+    network = lut_simulator.compile_network(fpga, [0, 1, 2])
+    table = network.exhaustive()
+    rng = np.random.default_rng(0)
+    vectors = rng.integers(0, 2, size=(300, 7))
+    rows = vectors @ (1 << np.arange(6, -1, -1))
+    expected = ((table[:, rows >> 6] >> (rows & 63).astype(np.uint64)) & np.uint64(1)).T.astype(bool)
+    assert np.array_equal(network.simulate(vectors), expected)
+
+
+def test_wide_luts_are_evaluated_from_their_parse_tree():
+    # More pins than MAX_TABLE_INPUTS: no INIT multiplexer tree
+    names = [chr(65 + k) for k in range(lut_simulator.MAX_TABLE_INPUTS + 2)]
+    expression = f"({' & '.join(names[:5])}) | ({' & '.join('~' + name for name in names[5:])})"
+    fpga = configured_fpga([expression], len(names), lut_type=len(names))
+    network = lut_simulator.compile_network(fpga, [0])
+    assert network.luts[0][1] is None
+    assert np.array_equal(network.exhaustive()[0], reference(expression, names))
+
+
+def test_combinational_loop_is_rejected():
+    fpga = configured_fpga(["Output of LUT 1 & A", "Output of LUT 0 | B"], 2)
+    with pytest.raises(lut_simulator.CombinationalLoop):
+        lut_simulator.compile_network(fpga, [0])
+
+
+def test_unknown_signals_are_rejected():
+    fpga = configured_fpga(["(A & Z)"], 2)
+    with pytest.raises(ValueError, match="Unknown signal 'Z'"):
+        lut_simulator.compile_network(fpga, [0])
@@ -0,0 +1,40 @@
+import sqlite3
+
+import min_cache
+
+
+def test_hits_need_no_write_lock(tmp_path):
+    path = str(tmp_path / "cache.sqlite")
+    cache = min_cache.open_cache(path)
+    cache.put("SOP", "key", {'result': "$0", 'engine': "sympy"})
+    # Another connection holds the write lock; lookups still go through
+    blocker = sqlite3.connect(path, isolation_level=None)
+    blocker.execute("BEGIN IMMEDIATE")
+    cache.connection.execute("PRAGMA busy_timeout = 100")
+    assert cache.get("SOP", "key") == {'result': "$0", 'engine': "sympy"}
+    assert cache.get("SOP", "other") is None
+    blocker.execute("ROLLBACK")
+    blocker.close()
+    cache.close()
+
+
+def test_counters_and_last_used_are_written_in_batches(tmp_path):
+    path = str(tmp_path / "cache.sqlite")
+    cache = min_cache.open_cache(path)
+    cache.put("SOP", "key", {'result': "$0", 'engine': "sympy"})
+    written = cache.connection.execute("SELECT last_used FROM entries").fetchone()[0]
+    for _ in range(3):
+        cache.get("SOP", "key")
+    cache.get("SOP", "missing")
+    assert dict(cache.connection.execute("SELECT name, value FROM counters")) == {}
+    stats = cache.stats()
+    assert (stats['hits'], stats['total_hits'], stats['total_misses']) == (3, 3, 1)
+    assert cache.connection.execute("SELECT last_used FROM entries").fetchone()[0] >= written
+    for _ in range(min_cache.FLUSH_EVERY):
+        cache.get("SOP", "key")
+    assert dict(cache.connection.execute("SELECT name, value FROM counters"))['hits'] == 3 + min_cache.FLUSH_EVERY
+    cache.close()
+
+    reopened = min_cache.open_cache(path)
+    assert reopened.stats()['total_hits'] == 3 + min_cache.FLUSH_EVERY
+    reopened.close()
@@ -0,0 +1,46 @@
+import lut_logic
+from netlist import Netlist
+
+# LUT 0 and 1 read system inputs, 2 reads both, 3 reads 2 and 0; LUT 4 is unused
+FUNCTIONS = {
+    0: "(A & B)",
+    1: "(~C | D)",
+    2: "(Output of LUT 0 & ~Output of LUT 1)",
+    3: "Output of LUT 2 | (Output of LUT 0 & E)",
+}
+
+
+def example():
+    return Netlist.from_fanin(5, [[], [], [0, 1], [0, 2], []], dict(FUNCTIONS))
+
+
+def test_fanin_and_fanout_slices():
+    netlist = example()
+    assert [list(netlist.fanin_of(lut_id)) for lut_id in range(5)] == [[], [], [0, 1], [0, 2], []]
+    assert [list(netlist.fanout_of(lut_id)) for lut_id in range(5)] == [[2, 3], [2], [3], [], []]
+    assert [netlist.fanin_count(lut_id) for lut_id in range(5)] == [0, 0, 2, 2, 0]
+    assert [netlist.fanout_count(lut_id) for lut_id in range(5)] == [2, 1, 1, 0, 0]
+    assert netlist.num_edges == 4
+
+
+def test_init_column_matches_lut_logic():
+    netlist = example()
+    for lut_id, function in FUNCTIONS.items():
+        inputs, bits = lut_logic.function_table(function)
+        assert netlist.truth_table(lut_id) == bits
+        assert netlist.num_pins[lut_id] == len(inputs)
+    assert netlist.init[4] == 0
+
+
+def test_wide_functions_keep_their_bits_outside_the_column():
+    function = " & ".join(f"X{k}" for k in range(8))
+    netlist = Netlist.from_fanin(1, [[]], {0: function})
+    assert netlist.wide_init == {0: 1 << 255}
+    assert netlist.truth_table(0) == 1 << 255
+
+
+def test_describe_connections():
+    netlist = example()
+    assert netlist.describe_connections(0) == "Output to: LUT(s) 2, 3"
+    assert netlist.describe_connections(2) == "Input from: LUT(s) 0, 1 | Output to: LUT(s) 3"
+    assert netlist.describe_connections(4) == ""
@@ -0,0 +1,69 @@
+import pytest
+
+import fpga_simulator
+import lut_logic
+import placement
+
+
+def mapped_fpga():
+    fpga = fpga_simulator.FPGA(40, 4, 8, 4)
+    fpga.split_and_assign_functions([
+        "(A & B & ~C) | (D & E & F)",
+        "(A & B & ~C) | (~D & G)",
+        "H | (~A & C & E & ~F)",
+        "(B & ~E & G) | (C & D & H) | (~A & F)",
+    ])
+    fpga.assign_or_luts_to_outputs()
+    return fpga
+
+
+def test_every_used_lut_gets_its_own_site():
+    fpga = mapped_fpga()
+    result = fpga.place_luts(seed=3)
+    used = sorted(fpga.netlist.functions)
+    assert sorted(result.positions) == used
+    sites = list(result.positions.values())
+    assert len(set(sites)) == len(sites)
+    assert all(0 <= x < result.width and 0 <= y < result.height for x, y in sites)
+    assert result.width * result.height >= len(used)
+
+
+def test_wirelength_is_the_hpwl_of_the_sites():
+    fpga = mapped_fpga()
+    result = fpga.place_luts(seed=1)
+    readers = {var: [] for var in fpga.luts.max_variables}
+    for lut_id, function in fpga.netlist.functions.items():
+        for signal in lut_logic.parse_function(function)[1]:
+            if signal in readers:
+                readers[signal].append(lut_id)
+    outputs = [lut.id for lut in fpga.system_outputs]
+    given = placement.Placement.at_sites(
+        fpga.netlist, list(readers.values()), outputs, result.positions, result.width, result.height
+    )
+    assert given.wirelength == result.wirelength
+
+
+@pytest.mark.parametrize("seed", range(3))
+def test_annealing_does_at_least_as_well_as_greedy_descent(seed):
+    fpga = mapped_fpga()
+    greedy = placement.AnnealingSchedule(initial_temperature=0)
+    assert fpga.place_luts(seed=seed).wirelength <= fpga.place_luts(schedule=greedy, seed=seed).wirelength
+
+
+def test_result_does_not_depend_on_the_number_of_workers():
+    fpga = mapped_fpga()
+    serial = fpga.place_luts(chains=2, workers=1, seed=5)
+    parallel = fpga.place_luts(chains=2, workers=2, seed=5)
+    assert (serial.positions, serial.wirelength, serial.seed) == (parallel.positions, parallel.wirelength, parallel.seed)
+
+
+def test_congestion_covers_every_channel():
+    result = mapped_fpga().place_luts(seed=0)
+    channels = list(result.congestion().channels())
+    assert len(channels) == result.height + result.width + 2
+    assert result.congestion().peak > 0
+
+
+def test_grid_too_small_is_rejected():
+    with pytest.raises(ValueError, match="no room"):
+        mapped_fpga().place_luts(width=2, height=2)
@@ -0,0 +1,56 @@
+import pytest
+
+import timing
+from lut_simulator import CombinationalLoop
+from netlist import Netlist
+
+
+def chain():
+    # 0 -> 1 -> 2 and a lone LUT 3; ports 0 and 1 are driven by 2 and 3
+    functions = {
+        0: "(A & B)",
+        1: "Output of LUT 0 | C",
+        2: "(Output of LUT 0 & ~Output of LUT 1) | D",
+        3: "(~A & E)",
+    }
+    return Netlist.from_fanin(4, [[], [0], [0, 1], []], functions)
+
+
+def test_unit_delays_count_levels():
+    report = timing.analyze(chain(), [2, 3, None])
+    assert report.arrival == {0: 1.0, 1: 2.0, 2: 3.0, 3: 1.0}
+    assert report.level == {0: 1, 1: 2, 2: 3, 3: 1}
+    assert report.depth == 3
+    assert report.critical_path == [0, 1, 2]
+    assert report.critical_delay == 3.0
+    assert [(output['port'], output['lut'], output['slack']) for output in report.outputs] == [(0, 2, 0.0), (1, 3, 2.0)]
+    assert report.slack(0) == 0.0
+    assert report.slack(3) == 2.0
+
+
+def test_clock_period_and_delay_models():
+    report = timing.analyze(
+        chain(), [2, 3], lut_delay=lambda lut_id: 4.0 if lut_id == 3 else 1.0,
+        connection_delay=0.5, clock_period=6.0,
+    )
+    assert report.arrival == {0: 1.0, 1: 2.5, 2: 4.0, 3: 4.0}
+    # On a tie the lower port wins the critical path
+    assert report.critical_path == [0, 1, 2]
+    assert [output['slack'] for output in report.outputs] == [2.0, 2.0]
+    # Back from the port through LUT 2, a wire, LUT 1 and a wire
+    assert report.required[0] == 6.0 - 1.0 - 0.5 - 1.0 - 0.5
+    assert report.slack(0) == 2.0
+
+
+def test_json_report_has_no_infinite_times():
+    # LUT 3 drives no port, so nothing requires it
+    report = timing.analyze(chain(), [2])
+    luts = {entry['lut']: entry for entry in report.to_dict()['luts']}
+    assert luts[3]['required'] is None and luts[3]['slack'] is None
+    assert '"required": null' in report.to_json()
+
+
+def test_combinational_loop_is_reported():
+    netlist = Netlist.from_fanin(2, [[1], [0]], {0: "Output of LUT 1 & A", 1: "Output of LUT 0 | B"})
+    with pytest.raises(CombinationalLoop):
+        timing.analyze(netlist, [0])
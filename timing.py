@@ -0,0 +1,147 @@
+import json
+
+from lut_simulator import CombinationalLoop
+
+# Static timing analysis of a mapped LUT network. The LUTs are levelized once
+# over the CSR netlist, then arrival times go forward and required times go
+# backward in topological order, both in time linear in LUTs plus
+# connections.
+#
+# The delay models are a number or a function: lut_delay(lut_id) is the time
+# from any pin of the LUT to its output, connection_delay(source, sink) the
+# time on the wire from LUT source to LUT sink. System inputs arrive at
+# input_arrival. With the defaults an arrival time is the number of LUT
+# levels in front of a signal.
+
+LUT_DELAY = 1.0
+CONNECTION_DELAY = 0.0
+INPUT_ARRIVAL = 0.0
+
+
+def _as_model(delay):
+    return delay if callable(delay) else (lambda *_: delay)
+
+
+def _finite(time):
+    return None if time == float('inf') else time
+
+
+class TimingReport:
+
+    def __init__(self, arrival, required, level, critical_path, outputs) -> None:
+        self.arrival = arrival  # LUT id -> time its output settles
+        self.required = required  # LUT id -> latest time its output may settle, inf if no output needs it
+        self.level = level  # LUT id -> LUTs on the longest path ending in it
+        self.critical_path = critical_path  # LUT ids from a system input to the latest output
+        self.outputs = outputs  # one dict per output port: port, lut, arrival, required, slack
+
+    @property
+    def critical_delay(self):
+        return self.arrival[self.critical_path[-1]] if self.critical_path else 0.0
+
+    @property
+    def depth(self):
+        return max((self.level[output['lut']] for output in self.outputs), default=0)
+
+    def slack(self, lut_id):
+        return self.required[lut_id] - self.arrival[lut_id]
+
+    def to_dict(self):
+        return {
+            'critical_delay': self.critical_delay,
+            'depth': self.depth,
+            'critical_path': self.critical_path,
+            'outputs': self.outputs,
+            # JSON has no infinity; a LUT no output needs has null required
+            # time and slack
+            'luts': [
+                {'lut': lut_id, 'level': self.level[lut_id], 'arrival': self.arrival[lut_id],
+                 'required': _finite(self.required[lut_id]), 'slack': _finite(self.slack(lut_id))}
+                for lut_id in sorted(self.arrival)
+            ],
+        }
+
+    def to_json(self, filename=None):
+        text = json.dumps(self.to_dict(), indent=2)
+        if filename is not None:
+            with open(filename, 'w') as file:
+                file.write(text)
+        return text
+
+
+def levelize(netlist, lut_ids):
+    # Topological order of lut_ids (Kahn's algorithm over the fan-in CSR)
+    active = set(lut_ids)
+    pending = {}
+    for lut_id in lut_ids:
+        pending[lut_id] = sum(1 for source in netlist.fanin_of(lut_id) if source in active)
+    ready = [lut_id for lut_id in lut_ids if pending[lut_id] == 0]
+    order = []
+    while ready:
+        lut_id = ready.pop()
+        order.append(lut_id)
+        for sink in netlist.fanout_of(lut_id):
+            if sink in pending:
+                pending[sink] -= 1
+                if pending[sink] == 0:
+                    ready.append(sink)
+    if len(order) != len(lut_ids):
+        loop = sorted(lut_id for lut_id, count in pending.items() if count)
+        raise CombinationalLoop(f"LUTs {loop} form a combinational loop")
+    return order
+
+
+def analyze(netlist, outputs, lut_delay=LUT_DELAY, connection_delay=CONNECTION_DELAY,
+            input_arrival=INPUT_ARRIVAL, clock_period=None):
+    # outputs lists the LUT id driving each output port (None for an
+    # unassigned port). Required times come from clock_period, or from the
+    # latest output when it is None, so the critical path has zero slack
+    lut_delay = _as_model(lut_delay)
+    connection_delay = _as_model(connection_delay)
+    lut_ids = sorted(netlist.functions)
+    order = levelize(netlist, lut_ids)
+
+    arrival = {}
+    level = {}
+    latest_fanin = {}  # LUT id -> fan-in its arrival comes from, None for system inputs
+    for lut_id in order:
+        start, driver, depth = input_arrival, None, 0
+        for source in netlist.fanin_of(lut_id):
+            if source in arrival:
+                time = arrival[source] + connection_delay(source, lut_id)
+                # On a tie a LUT beats the system inputs, so the critical
+                # path follows the logic
+                if time > start or (driver is None and time == start):
+                    start, driver = time, source
+                depth = max(depth, level[source])
+        arrival[lut_id] = start + lut_delay(lut_id)
+        level[lut_id] = depth + 1
+        latest_fanin[lut_id] = driver
+
+    ports = [(port, lut_id) for port, lut_id in enumerate(outputs) if lut_id is not None]
+    latest = max((arrival[lut_id] for _, lut_id in ports), default=0.0)
+    period = latest if clock_period is None else clock_period
+
+    required = {lut_id: float('inf') for lut_id in lut_ids}
+    for _, lut_id in ports:
+        required[lut_id] = period
+    for lut_id in reversed(order):
+        budget = required[lut_id] - lut_delay(lut_id)
+        for source in netlist.fanin_of(lut_id):
+            if source in required:
+                required[source] = min(required[source], budget - connection_delay(source, lut_id))
+
+    critical_path = []
+    if ports:
+        lut_id = max(ports, key=lambda port: (arrival[port[1]], -port[0]))[1]
+        while lut_id is not None:
+            critical_path.append(lut_id)
+            lut_id = latest_fanin[lut_id]
+        critical_path.reverse()
+
+    report_outputs = [
+        {'port': port, 'lut': lut_id, 'arrival': arrival[lut_id], 'required': period,
+         'slack': period - arrival[lut_id]}
+        for port, lut_id in ports
+    ]
+    return TimingReport(arrival, required, level, critical_path, report_outputs)
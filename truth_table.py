@@ -0,0 +1,71 @@
+from lazy_import import lazy_module
+
+np = lazy_module('numpy')
+
+
+# Bit pattern of the row counter for bit positions 0..5 inside one 64-bit word
+_LOW_PATTERNS = [
+    0xAAAAAAAAAAAAAAAA,
+    0xCCCCCCCCCCCCCCCC,
+    0xF0F0F0F0F0F0F0F0,
+    0xFF00FF00FF00FF00,
+    0xFFFF0000FFFF0000,
+    0xFFFFFFFF00000000,
+]
+_ALL_ONES = 0xFFFFFFFFFFFFFFFF
+
+
+def num_words(num_vars):
+    return max(1, (1 << num_vars) >> 6)
+
+
+def row_mask(num_vars):
+    # Only the low 2^n bits of the single word are valid rows when n < 6
+    if num_vars >= 6:
+        return np.uint64(_ALL_ONES)
+    return np.uint64((1 << (1 << num_vars)) - 1)
+
+
+def variable_slice(position, num_vars):
+    # Packed column of the truth table for the row-counter bit `position`
+    nwords = num_words(num_vars)
+    if position < 6:
+        words = np.full(nwords, _LOW_PATTERNS[position], dtype=np.uint64)
+    else:
+        index = np.arange(nwords, dtype=np.uint64)
+        selected = (index >> np.uint64(position - 6)) & np.uint64(1)
+        words = np.where(selected == 1, np.uint64(_ALL_ONES), np.uint64(0))
+    return words & row_mask(num_vars)
+
+
+class TruthTable:
+
+    def __init__(self, words, num_vars) -> None:
+        self.words = words
+        self.num_vars = num_vars
+
+    @classmethod
+    def constant(cls, value, num_vars):
+        words = np.full(num_words(num_vars), _ALL_ONES if value else 0, dtype=np.uint64)
+        return cls(words & row_mask(num_vars), num_vars)
+
+    def __invert__(self):
+        return TruthTable(~self.words & row_mask(self.num_vars), self.num_vars)
+
+    def bits(self):
+        # One bool per row, row i at index i
+        as_bytes = self.words.astype('<u8').view(np.uint8)
+        return np.unpackbits(as_bytes, bitorder='little')[:1 << self.num_vars].astype(bool)
+
+    def on_set(self):
+        return np.flatnonzero(self.bits())
+
+    def off_set(self):
+        return np.flatnonzero(~self.bits())
+
+    def count(self):
+        # Popcount of the words, without a byte per row
+        if hasattr(np, 'bitwise_count'):
+            return int(np.bitwise_count(self.words).sum(dtype=np.int64))
+        byte_counts = np.unpackbits(np.arange(256, dtype=np.uint8)[:, None], axis=1).sum(axis=1)
+        return int(byte_counts[self.words.view(np.uint8)].sum(dtype=np.int64))